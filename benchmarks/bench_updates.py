@@ -0,0 +1,86 @@
+#
+# bench_updates.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measures the update throughput of the bot for different worker counts.
+
+Every update runs a handler that performs one lookup against a fake upstream with a fixed
+latency, like /pota_parks_range does against the POTA API. Run from the repository root:
+
+    python benchmarks/bench_updates.py --updates 200 --chats 50 --latency 0.05
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import time
+import httpx
+from telegram import Chat, Message, Update
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from programs.updates import ChatOrderedUpdateProcessor
+from programs.upstream import UpstreamPool
+
+def make_updates(count: int, chats: int) -> list[Update]:
+    now = datetime.datetime.now()
+    return [Update(i, message=Message(i, now, Chat(i % chats + 1, Chat.PRIVATE), text="/pota_parks_range JN39"))
+            for i in range(count)]
+
+async def run(workers: int, updates: list[Update], latency: float) -> float:
+    async def handler(request: httpx.Request):
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json=[])
+
+    upstream = UpstreamPool(pool_size=max(workers, 10), transport=httpx.MockTransport(handler))
+    processor = ChatOrderedUpdateProcessor(workers, max_pending=len(updates))
+
+    async def handle(update: Update):
+        response = await upstream.get("https://api.pota.app/park/grids/JN39")
+        response.json()
+
+    start = time.perf_counter()
+    async with processor:
+        # Wie Application: ein Task pro Update, sobald mehr als ein Worker erlaubt ist
+        await asyncio.gather(*(processor.process_update(update, handle(update)) for update in updates))
+    elapsed = time.perf_counter() - start
+    await upstream.aclose()
+    return elapsed
+
+async def main():
+    parser = argparse.ArgumentParser(description="Update-Durchsatz in Abhängigkeit von der Worker-Anzahl")
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latenz des Upstreams in Sekunden")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    updates = make_updates(args.updates, args.chats)
+    print(f"{args.updates} Updates, {args.chats} Chats, {args.latency * 1000:.0f} ms Upstream-Latenz")
+    print(f"{'Worker':>6} {'Dauer (s)':>10} {'Updates/s':>10}")
+    for workers in args.workers:
+        elapsed = await run(workers, updates, args.latency)
+        print(f"{workers:>6} {elapsed:>10.2f} {args.updates / elapsed:>10.1f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
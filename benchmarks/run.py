@@ -0,0 +1,232 @@
+#
+# run.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Offline micro-benchmarks of the hot paths of the bot: distance calculation, Maidenhead
+conversion, parsing of recorded API payloads and rendering of the HTML replies.
+
+Run from the repository root:
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare results.json
+
+Results are written as JSON (nanoseconds per operation, median and minimum of several
+repeats) together with the commit and interpreter, so runs of different commits can be
+compared with --compare.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import timeit
+from typing import Callable
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+import maidenhead
+import util
+from programs import metrics
+from programs.pota.api import POTAAPI
+from programs.pota.pota import POTA
+from programs.prefix_index import PrefixIndex
+from programs.trigram_index import TrigramIndex
+
+BATCH_SIZES = (1, 100, 10000)
+
+# Name -> Funktion, die die Eingaben vorbereitet und die zu messende Funktion sowie die Anzahl der Elemente liefert
+BENCHMARKS: dict[str, Callable[[], tuple[Callable[[], object], int]]] = {}
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+def points(n: int, seed: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    rng = random.Random(seed)
+    return (np.array([rng.uniform(-89.0, 89.0) for _ in range(n)]),
+            np.array([rng.uniform(-179.0, 179.0) for _ in range(n)]))
+
+for size in BATCH_SIZES:
+    @benchmark(f"haversine.scalar[{size}]")
+    def _(size=size):
+        lats, lons = points(size)
+        lats, lons = lats.tolist(), lons.tolist()
+        return (lambda: [util.haversine_distance(49.2, 7.0, lat, lon) for lat, lon in zip(lats, lons)]), size
+
+    @benchmark(f"haversine.vector[{size}]")
+    def _(size=size):
+        lats, lons = points(size)
+        return (lambda: util.haversine_distances(49.2, 7.0, lats, lons)), size
+
+    @benchmark(f"maidenhead.encode.scalar[{size}]")
+    def _(size=size):
+        lats, lons = points(size)
+        lats, lons = lats.tolist(), lons.tolist()
+        return (lambda: [maidenhead.encode(lat, lon, 6) for lat, lon in zip(lats, lons)]), size
+
+    @benchmark(f"maidenhead.encode.array[{size}]")
+    def _(size=size):
+        lats, lons = points(size)
+        return (lambda: maidenhead.encode_array(lats, lons, 6)), size
+
+    @benchmark(f"maidenhead.decode.scalar[{size}]")
+    def _(size=size):
+        locators = maidenhead.encode_array(*points(size), 6).tolist()
+        return (lambda: [maidenhead.decode(locator) for locator in locators]), size
+
+    @benchmark(f"maidenhead.decode.array[{size}]")
+    def _(size=size):
+        locators = maidenhead.encode_array(*points(size), 6)
+        return (lambda: maidenhead.decode_array(locators)), size
+
+@benchmark("parse.park_grid")
+def _():
+    text = fixture("park_grid_jn39.json")
+    return (lambda: POTAAPI.parse_parks(json.loads(text))), len(json.loads(text))
+
+@benchmark("parse.profile")
+def _():
+    text = fixture("profile_dk8ys.json")
+    return (lambda: POTAAPI.parse_profile(json.loads(text))), 1
+
+@benchmark("serialize.profile.round_trip")
+def _():
+    profile = POTAAPI.parse_profile(json.loads(fixture("profile_dk8ys.json")))
+    return (lambda: type(profile).from_bytes(profile.to_bytes())), 1
+
+@benchmark("serialize.parks.round_trip")
+def _():
+    parks = POTAAPI.parse_parks(json.loads(fixture("park_grid_jn39.json")))
+    return (lambda: [type(park).from_bytes(park.to_bytes()) for park in parks]), len(parks)
+
+@benchmark("render.profile")
+def _():
+    profile = POTAAPI.parse_profile(json.loads(fixture("profile_dk8ys.json")))
+    return (lambda: POTA.render_profile("dk8ys", profile)), 1
+
+@benchmark("render.parks_range")
+def _():
+    parks = POTAAPI.parse_parks(json.loads(fixture("park_grid_jn39.json")))
+    distances = util.haversine_distances(49.2, 7.0, [p.coordinates[0] for p in parks], [p.coordinates[1] for p in parks])
+    nearest = [(parks[i], float(distances[i])) for i in util.nearest_k(distances, 25, 50)]
+    return (lambda: POTA.render_parks_range("JN39MF", 50, nearest)), 1
+
+@benchmark("prefix_index.search")
+def _():
+    # Größenordnung des weltweiten POTA-Katalogs
+    codes = [f"{prefix}-{i:04d}" for prefix in ("DE", "US", "K", "F", "I", "G", "VE", "JA") for i in range(10000)]
+    index = PrefixIndex(codes, [f"Naturpark Nummer {i}" for i in range(len(codes))])
+    return (lambda: index.search("DE-069", 20)), 1
+
+@benchmark("trigram_index.search")
+def _():
+    rng = random.Random(1)
+    syllables = ["bach", "wald", "berg", "see", "natur", "hain", "feld", "stein", "au", "bruch", "moor", "heide"]
+    index = TrigramIndex()
+    for i in range(80000):
+        words = ["".join(rng.choice(syllables) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(1, 3))]
+        index.add(f"DE-{i:05d}", " ".join(words) + " Naturpark DE-BY")
+    index.compact()
+    return (lambda: index.search("Heidesee Wlad", 10)), 1
+
+@benchmark("metrics.histogram.observe")
+def _():
+    series = metrics.Histogram("bench_seconds", "Benchmark").labels()
+    return (lambda: series.observe(0.042)), 1
+
+@benchmark("metrics.counter.labels_inc")
+def _():
+    counter = metrics.Counter("bench_total", "Benchmark", ("command",))
+    return (lambda: counter.labels("pota_park").inc()), 1
+
+def measure(fn: Callable[[], object], repeat: int, min_time: float) -> dict:
+    timer = timeit.Timer(fn)
+    # Anzahl der Aufrufe so wählen, dass eine Wiederholung mindestens min_time dauert
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    times = [t / number * 1e9 for t in timer.repeat(repeat, number)]
+    return {"ns_per_op": statistics.median(times), "min_ns_per_op": min(times), "number": number, "repeat": repeat}
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-Benchmarks der Hot Paths")
+    parser.add_argument("-o", "--output", help="Ergebnisse als JSON in diese Datei schreiben")
+    parser.add_argument("-c", "--compare", help="Mit den Ergebnissen einer früheren Ausführung vergleichen")
+    parser.add_argument("-k", "--filter", default="", help="Nur Benchmarks ausführen, deren Name diesen Text enthält")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Mindestdauer einer Wiederholung in Sekunden")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        fn, items = setup()
+        result = measure(fn, args.repeat, args.min_time)
+        result["items"] = items
+        result["ns_per_item"] = result["ns_per_op"] / items
+        results[name] = result
+
+        line = f"{name:<34} {result['ns_per_op'] / 1000:>12.2f} µs/op {result['ns_per_item']:>12.1f} ns/item"
+        if name in baseline:
+            line += f"  {result['ns_per_op'] / baseline[name]['ns_per_op']:>6.2f}x"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -46,10 +46,263 @@ class Config:
     def pota_default_range(self):
         return self._data.get("pota_default_range", 50)
 
+    @property
+    def pota_max_range(self):
+        """Größter Suchradius von /pota_parks_range in km"""
+        return self._data.get("pota_max_range", 500)
+
     @property
     def webhook_url(self):
         return self._data.get("webhook_url", "")
+
+    @property
+    def profile_sample_rate(self):
+        """Anteil der Befehlsaufrufe, die im Profiling-Modus aufgezeichnet werden"""
+        return self._data.get("profile_sample_rate", 0.1)
+
+    @property
+    def profile_interval(self):
+        """Abstand der Stack-Samples im Profiling-Modus in Sekunden"""
+        return self._data.get("profile_interval", 0.005)
+
+    @property
+    def metrics_port(self):
+        """Port des Metrik-Endpunkts (/metrics), 0 deaktiviert ihn"""
+        return self._data.get("metrics_port", 0)
+
+    @property
+    def metrics_host(self):
+        """Adresse, an die der Metrik-Endpunkt gebunden wird, standardmäßig nur lokal erreichbar"""
+        return self._data.get("metrics_host", "127.0.0.1")
+
+    @property
+    def data_dir(self):
+        return self._data.get("data_dir", "data")
+
+    @property
+    def pota_catalog_url(self):
+        return self._data.get("pota_catalog_url", "https://pota.app/all_parks_ext.csv")
+
+    @property
+    def pota_catalog_interval(self):
+        """Abstand zwischen zwei Downloads des Parkkatalogs in Sekunden"""
+        return self._data.get("pota_catalog_interval", 86400)
+
+    @property
+    def pota_catalog_max_age(self):
+        """Alter in Sekunden, ab dem der Parkkatalog nicht mehr für Abfragen verwendet wird"""
+        return self._data.get("pota_catalog_max_age", 7 * 86400)
+
+    @property
+    def pota_spot_interval(self):
+        """Abfrageintervall der POTA-Spots in Sekunden"""
+        return self._data.get("pota_spot_interval", 60)
+
+    @property
+    def pota_max_spots(self):
+        return self._data.get("pota_max_spots", 15)
+
+    @property
+    def pota_inline_results(self):
+        """Maximale Anzahl der Parks in den Antworten auf Inline-Anfragen"""
+        return self._data.get("pota_inline_results", 20)
+
+    @property
+    def pota_inline_cache_time(self):
+        """Sekunden, die Telegram die Antwort auf eine Inline-Anfrage zwischenspeichert"""
+        return self._data.get("pota_inline_cache_time", 300)
+
+    @property
+    def pota_search_results(self):
+        """Maximale Anzahl der Parks in der Antwort auf /pota_search"""
+        return self._data.get("pota_search_results", 10)
+
+    @property
+    def pota_max_subscriptions(self):
+        """Maximale Anzahl an Spot-Abos pro Chat"""
+        return self._data.get("pota_max_subscriptions", 50)
+
+    @property
+    def pota_alert_cooldown(self):
+        """Sperrzeit in Sekunden, bevor derselbe Aktivierer im selben Park erneut gemeldet wird"""
+        return self._data.get("pota_alert_cooldown", 1800)
+
+    @property
+    def dlbota_max_bunkers(self):
+        return self._data.get("dlbota_max_bunkers", 25)
+
+    @property
+    def dlbota_default_range(self):
+        return self._data.get("dlbota_default_range", 50)
+
+    @property
+    def dlbota_max_range(self):
+        """Größter Suchradius von /dlbota_bunkers_range in km"""
+        return self._data.get("dlbota_max_range", 500)
+
+    @property
+    def dlbota_catalog_url(self):
+        """Quelle der vollständigen Bunkerliste, leer deaktiviert den Katalog und /dlbota_bunkers_range"""
+        return self._data.get("dlbota_catalog_url", "")
+
+    @property
+    def dlbota_catalog_interval(self):
+        """Abstand zwischen zwei Downloads der Bunkerliste in Sekunden"""
+        return self._data.get("dlbota_catalog_interval", 86400)
+
+    @property
+    def dlbota_catalog_max_age(self):
+        return self._data.get("dlbota_catalog_max_age", 7 * 86400)
+
+    @property
+    def concurrent_updates(self):
+        """Anzahl gleichzeitig verarbeiteter Updates, 1 verarbeitet alle Updates nacheinander"""
+        return self._data.get("concurrent_updates", 8)
+
+    @property
+    def outbound_global_rate(self):
+        """Maximale Anzahl gesendeter Nachrichten pro Sekunde über alle Chats"""
+        return self._data.get("outbound_global_rate", 30)
+
+    @property
+    def outbound_chat_rate(self):
+        """Maximale Anzahl gesendeter Nachrichten pro Sekunde in einen privaten Chat"""
+        return self._data.get("outbound_chat_rate", 1)
+
+    @property
+    def outbound_group_rate(self):
+        """Maximale Anzahl gesendeter Nachrichten pro Sekunde in eine Gruppe"""
+        return self._data.get("outbound_group_rate", 20 / 60)
+
+    @property
+    def http_pool_size(self):
+        return self._data.get("http_pool_size", 10)
+
+    @property
+    def http_timeout(self):
+        return self._data.get("http_timeout", 10.0)
+
+    @property
+    def http_connect_timeout(self):
+        return self._data.get("http_connect_timeout", 5.0)
+
+    @property
+    def http_retries(self):
+        """Anzahl der Wiederholungen einer GET-Anfrage nach Verbindungsfehlern oder vorübergehenden Fehlerantworten"""
+        return self._data.get("http_retries", 2)
+
+    @property
+    def http_backoff(self):
+        """Basis der exponentiell wachsenden, zufällig gestreuten Wartezeit vor einer Wiederholung in Sekunden"""
+        return self._data.get("http_backoff", 0.2)
+
+    @property
+    def circuit_failure_threshold(self):
+        """Anzahl aufeinanderfolgender Fehlschläge, nach denen Anfragen an einen Host sofort abgewiesen werden"""
+        return self._data.get("circuit_failure_threshold", 5)
+
+    @property
+    def circuit_reset_timeout(self):
+        """Sekunden, nach denen ein abgewiesener Host mit einer einzelnen Anfrage erneut geprüft wird"""
+        return self._data.get("circuit_reset_timeout", 30)
+
+    @property
+    def upstream_deadline(self):
+        """Maximale Dauer einer Abfrage einschließlich Wiederholungen in Sekunden"""
+        return self._data.get("upstream_deadline", 8)
+
+    @property
+    def upstream_deadlines(self):
+        """Abweichende maximale Dauer je Endpunkt in Sekunden"""
+        return self._data.get("upstream_deadlines", {})
     
+    @property
+    def lookup_concurrency(self):
+        """Maximale Anzahl gleichzeitiger Abfragen, wenn ein Befehl mehrere Referenzen oder Rufzeichen abfragt"""
+        return self._data.get("lookup_concurrency", 4)
+
+    @property
+    def lookup_max_keys(self):
+        """Maximale Anzahl an Referenzen oder Rufzeichen je Befehl"""
+        return self._data.get("lookup_max_keys", 10)
+
+    @property
+    def cache_max_entries(self):
+        return self._data.get("cache_max_entries", 2048)
+
+    @property
+    def cache_max_bytes(self):
+        return self._data.get("cache_max_bytes", 8 * 1024 * 1024)
+
+    @property
+    def cache_ttl(self):
+        """Lebensdauer der Cache-Einträge in Sekunden je Endpunkt"""
+        return {
+            "pota.park": 86400,
+            "pota.grid": 86400,
+            "pota.profile": 3600,
+            "dlbota.profile": 3600,
+        } | self._data.get("cache_ttl", {})
+
+    @property
+    def cache_db(self):
+        """SQLite-Datei des persistenten Caches im Datenverzeichnis, leer deaktiviert ihn"""
+        return self._data.get("cache_db", "cache.sqlite3")
+
+    @property
+    def cache_preload(self):
+        """Anzahl der meistgenutzten Einträge, die beim Start aus dem persistenten Cache geladen werden"""
+        return self._data.get("cache_preload", 1000)
+
+    @property
+    def cache_flush_interval(self):
+        """Intervall in Sekunden, in dem neue Einträge in den persistenten Cache geschrieben werden"""
+        return self._data.get("cache_flush_interval", 5)
+
+    @property
+    def map_workers(self):
+        """Anzahl der Prozesse, die Umkreiskarten zeichnen, 0 deaktiviert die Karten"""
+        return self._data.get("map_workers", 2)
+
+    @property
+    def map_cache_size(self):
+        """Anzahl der gesendeten Karten, deren Telegram-file_id wiederverwendet wird"""
+        return self._data.get("map_cache_size", 512)
+
+    @property
+    def lazy_programs(self):
+        """Programme erst beim ersten Befehl oder im Hintergrund nach dem Start laden"""
+        return self._data.get("lazy_programs", True)
+
+    @property
+    def program_warmup_delay(self):
+        """Verzögerung in Sekunden, nach der die Programme im Hintergrund geladen werden, negativ deaktiviert es"""
+        return self._data.get("program_warmup_delay", 1)
+
+    @property
+    def program_max_upstream_calls(self):
+        """Maximale Anzahl gleichzeitiger Upstream-Abfragen je Programm, weitere warten auf einen freien Platz"""
+        return self._data.get("program_max_upstream_calls", 8)
+
+    @property
+    def program_max_commands(self):
+        """Maximale Anzahl gleichzeitig bearbeiteter oder wartender Befehle je Programm, weitere werden als ausgelastet beantwortet"""
+        return self._data.get("program_max_commands", 32)
+
+    @property
+    def program_budgets(self):
+        """Abweichende Budgets je Programm, z.B. {"dlbota": {"max_upstream_calls": 4, "max_commands": 16}}"""
+        return self._data.get("program_budgets", {})
+
+    @property
+    def state_url(self):
+        """Gemeinsamer Zustand mehrerer Instanzen: memory:, sqlite:<Datei> im Datenverzeichnis oder redis://host:port/db, leer deaktiviert ihn"""
+        return self._data.get("state_url", "")
+
+    @property
+    def cache_stale_ttl(self):
+        return self._data.get("cache_stale_ttl", 86400)
+
     def as_dict(self):
         """Gibt die gesamte Konfiguration als Dictionary zurück"""
         return self._data
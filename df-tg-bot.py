@@ -21,12 +21,29 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import time
+# Vor allen anderen Importen, damit --startup-report die Importzeit enthält
+_STARTED = time.perf_counter()
+
 import argparse
 import logging
+import os
 from telegram.ext import ApplicationBuilder, CommandHandler
 from config import Config
-from programs.pota.pota import POTA
-from dlbota import DLBOTA
+from programs.cache import ResponseCache
+from programs import metrics
+from programs.dlbota.manifest import MANIFEST as DLBOTA_MANIFEST
+from programs.lazy import LazyProgram
+from programs.maps import MapRenderer
+from programs.outbound import OutboundScheduler
+from programs.pota.manifest import MANIFEST as POTA_MANIFEST
+from programs.profiling import CommandProfiler
+from programs.startup import StartupReport
+from programs.state import open_backend
+from programs.updates import ChatOrderedUpdateProcessor
+from programs.upstream import UpstreamPool
+
+_IMPORTED = time.perf_counter()
 
 help_texts = []
 logger: logging.Logger
@@ -56,6 +73,22 @@ def parse_argv():
         default=False,
         help="Führt den Bot im Entwicklungsmodus aus, d.h. Polling anstelle von Webhooks.",
     )
+    parser.add_argument(
+        "-p", "--profile",
+        nargs="?",
+        type=float,
+        const=True,
+        default=None,
+        metavar="ANTEIL",
+        help="Aktiviert das Profiling der Befehle, optional mit dem Anteil der aufgezeichneten Aufrufe (0-1). "
+             "Die Profile werden beim Beenden als Collapsed Stacks gespeichert."
+    )
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        default=False,
+        help="Gibt die Dauer der einzelnen Startphasen (Importe, Initialisierung, Laden der Programme) aus."
+    )
     parser.add_argument(
         "token",
         help="Telegram Bot Token (von BotFather erhalten)"
@@ -66,16 +99,86 @@ def parse_argv():
 def add_help_text(command, description):
     help_texts.append(f"/{command} - {description}")
 
-def start(config_path, token, development):
+def start(config_path, token, development, profile=None, startup_report=False):
     logger.info("Starte Draussenfunker Telegram Bot, Version %s", VERSION)
-    cfg = Config(config_path)
-    app = ApplicationBuilder().token(token).build()
+    report = StartupReport(_STARTED)
+    report.add("Importe", _IMPORTED - _STARTED, _STARTED)
+    with report.phase("Konfiguration"):
+        cfg = Config(config_path)
+    with report.phase("Upstream-Pool und Cache"):
+        upstream = UpstreamPool.from_config(cfg)
+        # Gemeinsamer Zustand, damit mehrere Instanzen hinter dem Webhook Cache und Abos teilen
+        state = open_backend(cfg.state_url, cfg.data_dir)
+        cache = ResponseCache.from_config(cfg, state)
+    # Der Prozesspool für die Karten startet erst beim ersten Kartenaufruf
+    maps = MapRenderer.from_config(cfg)
+
+    metrics_server = metrics.MetricsServer(cfg.metrics_port, cfg.metrics_host) if cfg.metrics_port else None
+    cache_stats = metrics.gauge("bot_cache", "Counters and fill level of the response cache", ("stat",))
+    for stat in cache.stats:
+        cache_stats.labels(stat).set_function(lambda stat=stat: cache.stats[stat])
+
+    async def warmup(context=None):
+        for program in programs:
+            await program.load()
+        if startup_report:
+            print(report.format(), flush=True)
+
+    async def post_init(app):
+        with report.phase("post_init"):
+            outbound.start()
+            cache.start(cfg.cache_flush_interval)
+            if metrics_server is not None:
+                try:
+                    await metrics_server.start()
+                except OSError as e:
+                    # Ohne Metriken weiterlaufen statt den Bot nicht zu starten
+                    logger.error("Metrik-Endpunkt %s:%d konnte nicht gestartet werden: %s", cfg.metrics_host, cfg.metrics_port, e)
+            if profile is not None:
+                profiler.enable(None if profile is True else profile)
+        if not cfg.lazy_programs:
+            await warmup()
+        elif cfg.program_warmup_delay >= 0 and app.job_queue is not None:
+            # Die JobQueue startet erst, wenn der Webhook bzw. das Polling läuft
+            app.job_queue.run_once(warmup, cfg.program_warmup_delay, name="program_warmup")
+        elif startup_report:
+            print(report.format(), flush=True)
+
+    async def post_shutdown(app):
+        if profiler.enabled:
+            profiler.disable()
+        for path in profiler.dump():
+            logger.info("Profil gespeichert: %s", path)
+        if metrics_server is not None:
+            await metrics_server.stop()
+        await outbound.stop()
+        await cache.aclose()
+        await upstream.aclose()
+        if state is not None:
+            await state.close()
+        if maps is not None:
+            maps.close()
+
+    with report.phase("Application"):
+        builder = ApplicationBuilder().token(token).post_init(post_init).post_shutdown(post_shutdown)
+        if cfg.concurrent_updates > 1:
+            # Updates verschiedener Chats parallel, Updates eines Chats weiterhin nacheinander verarbeiten
+            builder.concurrent_updates(ChatOrderedUpdateProcessor(cfg.concurrent_updates))
+        app = builder.build()
+        outbound = OutboundScheduler.from_config(app.bot, cfg)
     logger.debug("Konfiguration geladen: %s", cfg)
     logger.debug("Bot Token: %s", token)
-    pota = POTA(app, cfg)
-    dlbota = DLBOTA(app, add_help_text)
-    app.add_handler(CommandHandler("help", lambda update, context: update.message.reply_text("\n".join(help_texts))))
-    app.add_handler(CommandHandler("start", lambda update, context: update.message.reply_text("Willkommen! Benutze /help für eine Liste der Befehle.")))
+    with report.phase("Befehle registrieren"):
+        # Die Programme werden erst beim ersten Befehl oder durch warmup geladen
+        programs = [LazyProgram(app, manifest, (cfg, upstream, cache, outbound, maps, state), report)
+                    for manifest in (POTA_MANIFEST, DLBOTA_MANIFEST)]
+        for program in programs:
+            help_texts.extend(program.help_texts)
+        profiler = CommandProfiler(programs, cfg.profile_sample_rate, cfg.profile_interval,
+                                   os.path.join(cfg.data_dir, "profiles"))
+        app.add_handler(CommandHandler("profile", profiler.admin_cmd(cfg.admin_id)))
+        app.add_handler(CommandHandler("help", lambda update, context: update.message.reply_text("\n".join(help_texts))))
+        app.add_handler(CommandHandler("start", lambda update, context: update.message.reply_text("Willkommen! Benutze /help für eine Liste der Befehle.")))
 
     if development:
         logger.info("Starte Bot im Entwicklungsmodus (Polling)...")
@@ -103,4 +206,4 @@ if __name__ == "__main__":
         level=logging.INFO
     )
     
-    start(args.config, args.token, args.development)
\ No newline at end of file
+    start(args.config, args.token, args.development, args.profile, args.startup_report)
\ No newline at end of file
@@ -0,0 +1,198 @@
+#
+# maidenhead.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+from functools import lru_cache
+import numpy as np
+
+# Paare des Locators: Field (A-R), Square (0-9), Subsquare (a-x),
+# Extended Square (0-9), Extended Subsquare (a-x)
+_BASES = (18, 10, 24, 10, 24)
+_LON_SIZES = (20.0, 2.0, 2.0 / 24, 0.2 / 24, 0.2 / 24 / 24)
+_LAT_SIZES = (10.0, 1.0, 1.0 / 24, 0.1 / 24, 0.1 / 24 / 24)
+PRECISIONS = (2, 4, 6, 8, 10)
+
+# Mittlerer Abstand zweier Breitengrade in km
+KM_PER_DEGREE = 111.2
+
+def _check_precision(precision):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Locator-Länge muss eine von {PRECISIONS} sein.")
+
+def _is_letter_pair(i):
+    return i % 2 == 0
+
+def encode(lat, lon, precision=6):
+    """
+    Wandelt Koordinaten in einen Maidenhead-Locator der gewünschten Länge um.
+    :param lat: Breitengrad (float), z. B. 48.137154
+    :param lon: Längengrad (float), z. B. 11.576124
+    :param precision: Länge des Locators (2, 4, 6, 8 oder 10)
+    :return: Maidenhead-Locator (z. B. 'JN58sd')
+    """
+    _check_precision(precision)
+    if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+        raise ValueError("Koordinaten außerhalb des gültigen Bereichs.")
+
+    # Shift Koordinaten in positives System
+    lon += 180.0
+    lat += 90.0
+
+    result = []
+    for i in range(precision // 2):
+        x = min(int(lon // _LON_SIZES[i]), _BASES[i] - 1)
+        y = min(int(lat // _LAT_SIZES[i]), _BASES[i] - 1)
+        lon -= x * _LON_SIZES[i]
+        lat -= y * _LAT_SIZES[i]
+        if _is_letter_pair(i):
+            base = ord('A') if i == 0 else ord('a')
+            result.append(chr(base + x) + chr(base + y))
+        else:
+            result.append(str(x) + str(y))
+    return "".join(result)
+
+@lru_cache(maxsize=4096)
+def _decode_corner(locator):
+    n = len(locator)
+    _check_precision(n)
+    lon = lat = 0.0
+    for i in range(n // 2):
+        a, b = locator[2 * i], locator[2 * i + 1]
+        if _is_letter_pair(i):
+            x, y = ord(a) - ord('A'), ord(b) - ord('A')
+        else:
+            x, y = ord(a) - ord('0'), ord(b) - ord('0')
+        if not (0 <= x < _BASES[i] and 0 <= y < _BASES[i]):
+            raise ValueError(f"Ungültiger Maidenhead-Locator: {locator}")
+        lon += x * _LON_SIZES[i]
+        lat += y * _LAT_SIZES[i]
+    i = n // 2 - 1
+    return lat - 90.0, lon - 180.0, _LAT_SIZES[i], _LON_SIZES[i]
+
+def decode(locator):
+    """
+    Wandelt einen Maidenhead-Locator (2, 4, 6, 8 oder 10 Zeichen) in die Koordinaten
+    des Zentrumspunkts um. Häufig abgefragte Locatoren werden zwischengespeichert.
+    :param locator: Maidenhead-Locator (z. B. 'JN58sd')
+    :return: (latitude, longitude) in Dezimalgrad
+    """
+    lat, lon, lat_size, lon_size = _decode_corner(locator.strip().upper())
+    return lat + lat_size / 2.0, lon + lon_size / 2.0
+
+def bounds(locator):
+    """
+    Liefert die Begrenzung der Zelle eines Maidenhead-Locators.
+    :param locator: Maidenhead-Locator (z. B. 'JN58sd')
+    :return: (lat_min, lon_min, lat_max, lon_max) in Dezimalgrad
+    """
+    lat, lon, lat_size, lon_size = _decode_corner(locator.strip().upper())
+    return lat, lon, lat + lat_size, lon + lon_size
+
+def radius_bounds(lat, lon, radius):
+    """
+    Liefert ein Rechteck, das alle Punkte innerhalb eines Radius um einen Punkt enthält.
+    Damit lassen sich Kandidaten verwerfen, bevor Entfernungen berechnet werden.
+    :param lat: Breitengrad des Mittelpunkts (in Dezimalgrad)
+    :param lon: Längengrad des Mittelpunkts (in Dezimalgrad)
+    :param radius: Radius in Kilometern
+    :return: (lat_min, lon_min, lat_max, lon_max) in Dezimalgrad, lon_min > lon_max über die Datumsgrenze
+    """
+    dlat = radius / KM_PER_DEGREE
+    lat_min, lat_max = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    # In Polnähe oder bei sehr großen Radien deckt das Rechteck alle Längengrade ab
+    cos_lat = min(math.cos(math.radians(lat_min)), math.cos(math.radians(lat_max)))
+    if cos_lat <= 0 or radius / (KM_PER_DEGREE * cos_lat) >= 180:
+        return lat_min, -180.0, lat_max, 180.0
+    dlon = radius / (KM_PER_DEGREE * cos_lat)
+    lon_min = (lon - dlon + 180.0) % 360.0 - 180.0
+    lon_max = (lon + dlon + 180.0) % 360.0 - 180.0
+    return lat_min, lon_min, lat_max, lon_max
+
+def in_bounds(lats, lons, box):
+    """
+    Prüft für viele Punkte auf einmal, ob sie in einem Rechteck liegen (siehe radius_bounds).
+    :return: Bool-Maske (numpy-Array)
+    """
+    lat_min, lon_min, lat_max, lon_max = box
+    lats = np.asarray(lats)
+    lons = np.asarray(lons)
+    mask = (lats >= lat_min) & (lats <= lat_max)
+    if lon_min <= lon_max:
+        return mask & (lons >= lon_min) & (lons <= lon_max)
+    return mask & ((lons >= lon_min) | (lons <= lon_max))
+
+def encode_array(lats, lons, precision=6):
+    """
+    Wandelt viele Koordinaten auf einmal in Maidenhead-Locatoren um.
+    :param lats: Breitengrade (numpy-Array oder Sequenz)
+    :param lons: Längengrade (numpy-Array oder Sequenz)
+    :param precision: Länge der Locatoren (2, 4, 6, 8 oder 10)
+    :return: numpy-Array mit den Locatoren als str
+    """
+    _check_precision(precision)
+    lon = np.asarray(lons, dtype=np.float64) + 180.0
+    lat = np.asarray(lats, dtype=np.float64) + 90.0
+    if np.any((lat < 0) | (lat > 180)) or np.any((lon < 0) | (lon > 360)):
+        raise ValueError("Koordinaten außerhalb des gültigen Bereichs.")
+
+    chars = np.empty((len(lat), precision), dtype=np.uint8)
+    for i in range(precision // 2):
+        x = np.minimum((lon // _LON_SIZES[i]).astype(np.int64), _BASES[i] - 1)
+        y = np.minimum((lat // _LAT_SIZES[i]).astype(np.int64), _BASES[i] - 1)
+        lon -= x * _LON_SIZES[i]
+        lat -= y * _LAT_SIZES[i]
+        base = ord('0') if not _is_letter_pair(i) else ord('A') if i == 0 else ord('a')
+        chars[:, 2 * i] = base + x
+        chars[:, 2 * i + 1] = base + y
+    return chars.view(f"S{precision}").ravel().astype(str)
+
+def decode_array(locators):
+    """
+    Wandelt viele Maidenhead-Locatoren auf einmal in die Koordinaten der Zentrumspunkte um.
+    Locatoren unterschiedlicher Länge dürfen gemischt werden.
+    :param locators: Sequenz von Locatoren
+    :return: (lats, lons) als numpy-Arrays
+    """
+    locators = np.char.upper(np.char.strip(np.asarray(locators, dtype=str)))
+    lats = np.empty(len(locators), dtype=np.float64)
+    lons = np.empty(len(locators), dtype=np.float64)
+    lengths = np.char.str_len(locators)
+
+    for n in np.unique(lengths):
+        _check_precision(int(n))
+        rows = np.flatnonzero(lengths == n)
+        chars = locators[rows].astype(f"S{n}").view(np.uint8).reshape(len(rows), n).astype(np.int64)
+        lon = np.zeros(len(rows))
+        lat = np.zeros(len(rows))
+        for i in range(n // 2):
+            zero = ord('A') if _is_letter_pair(i) else ord('0')
+            x = chars[:, 2 * i] - zero
+            y = chars[:, 2 * i + 1] - zero
+            if np.any((x < 0) | (x >= _BASES[i]) | (y < 0) | (y >= _BASES[i])):
+                raise ValueError("Ungültiger Maidenhead-Locator.")
+            lon += x * _LON_SIZES[i]
+            lat += y * _LAT_SIZES[i]
+        i = n // 2 - 1
+        lats[rows] = lat - 90.0 + _LAT_SIZES[i] / 2.0
+        lons[rows] = lon - 180.0 + _LON_SIZES[i] / 2.0
+    return lats, lons
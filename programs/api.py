@@ -0,0 +1,157 @@
+#
+# api.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+import httpx
+from programs import metrics
+from programs.bulkhead import Bulkhead
+from programs.cache import ResponseCache
+from programs.singleflight import SingleFlight
+from programs.upstream import CircuitBreaker, UpstreamError, UpstreamPool
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_DURATION = metrics.histogram("bot_upstream_duration_seconds", "Duration of upstream lookups per endpoint", ("endpoint",))
+UPSTREAM_FAILURES = metrics.counter("bot_upstream_failures_total", "Upstream lookups per endpoint that failed or returned nothing", ("endpoint",))
+UPSTREAM_STALE = metrics.counter("bot_upstream_stale_total", "Failed upstream lookups answered with an outdated cached value", ("endpoint",))
+
+# Stand der veralteten Werte, mit denen der laufende Befehl beantwortet wurde, siehe Program
+STALE_RESULTS: ContextVar[list[float]] = ContextVar("stale_results", default=None)
+
+class DeadlineExceeded(UpstreamError):
+    """
+    An upstream lookup took longer than the deadline of its endpoint.
+    """
+
+async def gather_limited(fn: Callable[[str], Awaitable[Any]], keys: list[str], limit: int) -> list[tuple[str, Any]]:
+    """
+    Calls fn for every key with at most limit calls running at a time and returns the
+    (key, result) pairs in input order. A failed call yields its exception as result, so
+    one failure doesn't cancel the other lookups.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(key: str):
+        async with semaphore:
+            try:
+                return await fn(key)
+            except Exception as e:
+                logger.warning("Abfrage von %s fehlgeschlagen: %s", key, e)
+                return e
+
+    return list(zip(keys, await asyncio.gather(*(run(key) for key in keys))))
+
+class UpstreamAPI:
+    """
+    Base class of the API clients of the programs.
+    Routes lookups through the shared upstream pool and the optional response cache.
+    Identical concurrent lookups are coalesced into a single upstream call, across
+    replicas if the cache has a shared state backend.
+    Every lookup is bounded by the deadline of its endpoint. If it fails, the last cached
+    value is returned instead, even if it is outdated, and noted in STALE_RESULTS.
+    With a bulkhead, the upstream calls count against the budget of the program.
+    """
+    def __init__(self, upstream: UpstreamPool, base_url: str, cache: ResponseCache = None, bulkhead: Bulkhead = None):
+        self.upstream = upstream
+        self.base_url = base_url
+        self.cache = cache
+        self.bulkhead = bulkhead
+        self.singleflight = SingleFlight(cache.shared if cache is not None else None)
+
+    async def _lookup(self, endpoint: str, key: str, loader: Callable[[], Awaitable[Any]]):
+        """
+        Returns the result of the loader for the given endpoint and normalized key,
+        answered from the cache if one is configured.
+        """
+        async def timed():
+            start = time.perf_counter()
+            deadline = self.upstream.deadline(endpoint)
+            try:
+                # Die Frist schließt das Warten auf einen freien Platz im Budget ein
+                result = await asyncio.wait_for(self._call(loader), deadline)
+            except asyncio.TimeoutError:
+                UPSTREAM_FAILURES.labels(endpoint).inc()
+                # Eine abgelaufene Frist zählt als Fehlschlag des Hosts, ein sonstiger Abbruch nicht
+                self.upstream.record_timeout(self.base_url)
+                raise DeadlineExceeded(f"{endpoint}/{key} dauerte länger als {deadline:g} s") from None
+            except Exception:
+                UPSTREAM_FAILURES.labels(endpoint).inc()
+                raise
+            finally:
+                UPSTREAM_DURATION.labels(endpoint).observe(time.perf_counter() - start)
+            if result is None:
+                UPSTREAM_FAILURES.labels(endpoint).inc()
+            return result
+
+        async def recheck():
+            return await self.cache.get_shared(endpoint, key)
+
+        async def load():
+            flight = self.singleflight.do((endpoint, key), timed, recheck if self.cache is not None else None)
+            if self.singleflight.backend is None:
+                # Ohne gemeinsame Sperre begrenzt timed die Abfrage bereits
+                return await flight
+            deadline = self.upstream.deadline(endpoint)
+            try:
+                # Die Frist schließt das Warten auf die Abfrage einer anderen Instanz ein
+                return await asyncio.wait_for(flight, deadline)
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"{endpoint}/{key} dauerte länger als {deadline:g} s") from None
+
+        if self.cache is None:
+            return await load()
+        try:
+            value = await self.cache.get_or_load(endpoint, key, load)
+        except (UpstreamError, httpx.HTTPError) as e:
+            fallback = self.cache.get_fallback(endpoint, key)
+            if fallback is None:
+                raise
+            value, as_of = fallback
+            logger.warning("Abfrage von %s/%s fehlgeschlagen, verwende Stand vom %s: %s",
+                           endpoint, key, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(as_of)), e)
+            self._mark_stale(endpoint, as_of)
+            return value
+
+        if self.upstream.breaker(self.base_url).state != CircuitBreaker.CLOSED:
+            # Abgelaufene Einträge werden sonst ohne Hinweis ausgeliefert, solange der Host ausfällt
+            fallback = self.cache.get_fallback(endpoint, key)
+            if fallback is not None and time.time() - fallback[1] > self.cache.ttl(endpoint):
+                self._mark_stale(endpoint, fallback[1])
+        return value
+
+    async def _call(self, loader: Callable[[], Awaitable[Any]]):
+        if self.bulkhead is None:
+            return await loader()
+        async with self.bulkhead.call():
+            return await loader()
+
+    @staticmethod
+    def _mark_stale(endpoint: str, as_of: float):
+        UPSTREAM_STALE.labels(endpoint).inc()
+        stale = STALE_RESULTS.get()
+        if stale is not None:
+            stale.append(as_of)
@@ -0,0 +1,114 @@
+#
+# bulkhead.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from config import Config
+from programs import metrics
+
+logger = logging.getLogger(__name__)
+
+PROGRAM_COMMANDS = metrics.gauge("bot_program_commands", "Commands of a program being processed or waiting", ("program",))
+PROGRAM_UPSTREAM = metrics.gauge("bot_program_upstream_in_flight", "Upstream calls of a program in flight", ("program",))
+PROGRAM_QUEUE = metrics.gauge("bot_program_upstream_queue", "Upstream calls of a program waiting for a free slot", ("program",))
+PROGRAM_REJECTED = metrics.counter("bot_program_rejected_total", "Commands of a program rejected as busy", ("program",))
+
+class Bulkhead:
+    """
+    Concurrency budget of a program, so a slow upstream of one program can't tie up the
+    tasks and connections the other programs need. At most max_calls upstream calls of
+    the program are in flight, further calls wait for a free slot. At most max_commands
+    commands are processed or waiting at a time, further commands are rejected at once.
+    """
+    def __init__(self, name: str, max_calls: int = 8, max_commands: int = 32):
+        self.name = name
+        self.max_calls = max_calls
+        self.max_commands = max_commands
+        self._calls = asyncio.Semaphore(max_calls)
+        self.commands = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        PROGRAM_COMMANDS.labels(name).set_function(lambda: self.commands)
+        PROGRAM_UPSTREAM.labels(name).set_function(lambda: self.in_flight)
+        PROGRAM_QUEUE.labels(name).set_function(lambda: self.waiting)
+        self._rejected = PROGRAM_REJECTED.labels(name)
+
+    @classmethod
+    def from_config(cls, config: Config, name: str):
+        """
+        Creates the budget of the program with the given name, using its entry in
+        program_budgets and the defaults for missing values.
+        """
+        budget = config.program_budgets.get(name, {})
+        return cls(name, budget.get("max_upstream_calls", config.program_max_upstream_calls),
+                   budget.get("max_commands", config.program_max_commands))
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns the current load and the number of rejected commands.
+        """
+        return {
+            "commands": self.commands,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+    def try_enter(self) -> bool:
+        """
+        Admits a command if the budget allows it. Every admitted command must call leave.
+        """
+        if self.commands >= self.max_commands:
+            self.rejected += 1
+            self._rejected.inc()
+            logger.warning("%s ausgelastet, Befehl abgewiesen (%d Befehle, %d Abfragen wartend)",
+                           self.name, self.commands, self.waiting)
+            return False
+        self.commands += 1
+        return True
+
+    def leave(self):
+        """
+        Releases the slot of a finished command.
+        """
+        self.commands -= 1
+
+    @asynccontextmanager
+    async def call(self):
+        """
+        Holds a slot for an upstream call, waiting until one is free.
+        """
+        self.waiting += 1
+        try:
+            await self._calls.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._calls.release()
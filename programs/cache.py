@@ -0,0 +1,338 @@
+#
+# cache.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Any, Awaitable, Callable
+from config import Config
+from programs.cache_store import SQLiteCacheStore, decode, encode, model_types
+from programs.state import StateBackend
+
+logger = logging.getLogger(__name__)
+
+def estimate_size(obj, _seen: set = None) -> int:
+    """
+    Estimates the memory footprint of an object in bytes, including the objects it references.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item, _seen) for item in obj)
+    if is_dataclass(obj):
+        return size + sum(estimate_size(getattr(obj, f.name), _seen) for f in fields(obj))
+    return size
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+    stale_until: float
+
+class ResponseCache:
+    """
+    Bounded in-memory cache for upstream responses.
+    Entries expire per endpoint, are evicted least recently used once the entry count
+    or the byte budget is exceeded, and are served stale while a background refresh runs.
+    With a persistent store, entries are also written behind to disk and looked up there
+    on a miss, so a restarted process starts warm.
+    With a shared state backend, loaded entries are also stored there and looked up
+    there on a miss, so replicas share each other's upstream results.
+    """
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 8 * 1024 * 1024,
+                 ttls: dict[str, float] = None, default_ttl: float = 300.0, stale_ttl: float = 86400.0,
+                 clock: Callable[[], float] = time.monotonic, persistent: SQLiteCacheStore = None,
+                 shared: StateBackend = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, str], CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._refreshing: dict[tuple[str, str], asyncio.Task] = {}
+        self.persistent = persistent
+        self._flush_task: asyncio.Task = None
+        self.shared = shared
+        self._types: dict[str, type] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.persistent_hits = 0
+        self.shared_hits = 0
+
+    @classmethod
+    def from_config(cls, config: Config, shared: StateBackend = None):
+        """
+        Creates the cache with limits and TTLs taken from the configuration.
+        If a cache database is configured, the hottest stored entries are preloaded.
+        """
+        persistent = None
+        if config.cache_db:
+            persistent = SQLiteCacheStore(os.path.join(config.data_dir, config.cache_db))
+        cache = cls(config.cache_max_entries, config.cache_max_bytes, config.cache_ttl,
+                    stale_ttl=config.cache_stale_ttl, persistent=persistent, shared=shared)
+        if persistent is not None:
+            cache.preload(config.cache_preload)
+        return cache
+
+    def preload(self, limit: int) -> int:
+        """
+        Loads the most used entries of the persistent store into memory.
+        """
+        entries = self.persistent.hottest(limit)
+        for endpoint, key, value, expires_in in entries:
+            self.set(endpoint, key, value, ttl=expires_in, persist=False)
+        logger.info("%d Einträge aus %s vorgeladen", len(entries), self.persistent.path)
+        return len(entries)
+
+    def start(self, flush_interval: float = 5.0):
+        """
+        Starts the periodic write-behind of the persistent store.
+        """
+        if self.persistent is not None and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self.persistent.run(flush_interval))
+
+    async def aclose(self):
+        """
+        Stops the write-behind and writes the remaining entries.
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if self.persistent is not None:
+            self.persistent.close()
+
+    def ttl(self, endpoint: str) -> float:
+        """
+        Returns the time to live of entries of the given endpoint in seconds.
+        """
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss/eviction counters and the current fill level.
+        """
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "persistent_hits": self.persistent_hits,
+            "shared_hits": self.shared_hits,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, endpoint: str, key: str, allow_stale: bool = False):
+        """
+        Returns the cached value or None. Expired entries are only returned with allow_stale.
+        """
+        entry = self._entries.get((endpoint, key))
+        if entry is None:
+            return None
+        now = self._clock()
+        if now >= entry.stale_until or (now >= entry.expires_at and not allow_stale):
+            return None
+        self._entries.move_to_end((endpoint, key))
+        return entry.value
+
+    def set(self, endpoint: str, key: str, value, size: int = None, ttl: float = None, persist: bool = True):
+        """
+        Stores a value and evicts least recently used entries if the cache is over budget.
+        The time to live defaults to the one of the endpoint.
+        """
+        if ttl is None:
+            ttl = self.ttl(endpoint)
+        if persist and self.persistent is not None:
+            self.persistent.put(endpoint, key, value, ttl, self.stale_ttl)
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.debug("Eintrag %s/%s ist zu groß für den Cache (%d Bytes)", endpoint, key, size)
+            return
+        self.invalidate(endpoint, key)
+        now = self._clock()
+        expires_at = now + ttl
+        self._entries[(endpoint, key)] = CacheEntry(value, size, expires_at, expires_at + self.stale_ttl)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def invalidate(self, endpoint: str, key: str):
+        """
+        Removes a single entry from the cache.
+        """
+        entry = self._entries.pop((endpoint, key), None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+        self._entries.clear()
+        self._bytes = 0
+
+    async def get_or_load(self, endpoint: str, key: str, loader: Callable[[], Awaitable[Any]]):
+        """
+        Returns the cached value for the key or loads it with the given coroutine function.
+        Expired entries within the stale window are returned at once and refreshed in the background.
+        Values of None are never cached, so failed lookups are retried on the next call.
+        """
+        entry = self._entries.get((endpoint, key))
+        if entry is None and self.persistent is not None:
+            entry = self._load_persistent(endpoint, key)
+        now = self._clock()
+        if entry is not None and now < entry.stale_until:
+            self._entries.move_to_end((endpoint, key))
+            if self.persistent is not None:
+                self.persistent.touch(endpoint, key)
+            if now < entry.expires_at:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._refresh(endpoint, key, loader)
+            return entry.value
+
+        self.misses += 1
+        value = await self.get_shared(endpoint, key)
+        if value is not None:
+            return value
+        return await self._load(endpoint, key, loader)
+
+    async def _load(self, endpoint: str, key: str, loader: Callable[[], Awaitable[Any]]):
+        value = await loader()
+        if value is not None:
+            self.set(endpoint, key, value)
+            await self._put_shared(endpoint, key, value)
+        return value
+
+    async def get_shared(self, endpoint: str, key: str):
+        """
+        Returns the value stored by any replica in the shared state backend or None.
+        A hit is also stored in memory. Errors of the backend count as a miss.
+        """
+        if self.shared is None:
+            return None
+        try:
+            data = await self.shared.get(f"cache:{endpoint}:{key}")
+        except Exception as e:
+            logger.warning("Gemeinsamer Cache nicht verfügbar: %s", e)
+            return None
+        if data is None:
+            return None
+        try:
+            type_name, expires_at, payload = data.split(b"\n", 2)
+            if self._types is None:
+                self._types = model_types()
+            value = decode(type_name.decode('utf-8'), payload, self._types)
+        except Exception as e:
+            logger.warning("Ungültiger Eintrag %s/%s im gemeinsamen Cache: %s", endpoint, key, e)
+            return None
+        self.shared_hits += 1
+        self.set(endpoint, key, value, ttl=max(0.0, float(expires_at) - time.time()), persist=False)
+        return value
+
+    async def _put_shared(self, endpoint: str, key: str, value):
+        if self.shared is None:
+            return
+        encoded = encode(value)
+        if encoded is None:
+            return
+        type_name, payload = encoded
+        ttl = self.ttl(endpoint)
+        # Ablaufzeitpunkt in Wanduhrzeit, damit andere Instanzen die Restlaufzeit übernehmen
+        header = f"{type_name}\n{time.time() + ttl:.3f}\n".encode('utf-8')
+        try:
+            await self.shared.set(f"cache:{endpoint}:{key}", header + payload, ttl)
+        except Exception as e:
+            logger.warning("Gemeinsamer Cache nicht verfügbar: %s", e)
+
+    def get_fallback(self, endpoint: str, key: str) -> tuple[Any, float]:
+        """
+        Returns the last known value and the wall clock time it was loaded at, regardless of
+        its age, or None. Used when the upstream lookup of the entry failed.
+        """
+        entry = self._entries.get((endpoint, key))
+        if entry is None and self.persistent is not None:
+            entry = self._load_persistent(endpoint, key)
+        if entry is None:
+            return None
+        age = self._clock() - (entry.expires_at - self.ttl(endpoint))
+        return entry.value, time.time() - age
+
+    def _load_persistent(self, endpoint: str, key: str) -> CacheEntry:
+        stored = self.persistent.get(endpoint, key)
+        if stored is None:
+            return None
+        value, expires_in = stored
+        self.persistent_hits += 1
+        self.set(endpoint, key, value, ttl=expires_in, persist=False)
+        return self._entries.get((endpoint, key))
+
+    def _refresh(self, endpoint: str, key: str, loader: Callable[[], Awaitable[Any]]):
+        if (endpoint, key) in self._refreshing:
+            return
+        self.refreshes += 1
+        task = asyncio.create_task(self._run_refresh(endpoint, key, loader))
+        self._refreshing[(endpoint, key)] = task
+
+    async def _run_refresh(self, endpoint: str, key: str, loader: Callable[[], Awaitable[Any]]):
+        try:
+            # Eine andere Instanz hat den Eintrag vielleicht schon aktualisiert
+            if await self.get_shared(endpoint, key) is None:
+                await self._load(endpoint, key, loader)
+        except Exception as e:
+            logger.warning("Aktualisierung von %s/%s fehlgeschlagen: %s", endpoint, key, e)
+        finally:
+            self._refreshing.pop((endpoint, key), None)
@@ -0,0 +1,202 @@
+#
+# cache_store.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Callable
+from programs.profile import Profile
+from programs.reference import Reference
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    endpoint TEXT NOT NULL,
+    key TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    stale_until REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (endpoint, key)
+) WITHOUT ROWID
+"""
+
+def model_types() -> dict[str, type]:
+    """
+    Returns all loaded model classes by name.
+    """
+    types = {}
+    pending = [Reference, Profile]
+    while pending:
+        cls = pending.pop()
+        types[cls.__name__] = cls
+        pending.extend(cls.__subclasses__())
+    return types
+
+def encode(value) -> tuple[str, bytes]:
+    """
+    Encodes a model or a list of models for storage. Returns None for other values.
+    """
+    if isinstance(value, (Reference, Profile)):
+        return type(value).__name__, json.dumps(value.to_row(), ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+    if isinstance(value, list) and all(isinstance(item, (Reference, Profile)) for item in value):
+        name = type(value[0]).__name__ if value else ""
+        if any(type(item).__name__ != name for item in value):
+            return None
+        rows = [item.to_row() for item in value]
+        return "list:" + name, json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+    return None
+
+def decode(type_name: str, data: bytes, types: dict[str, type]):
+    """
+    Decodes a value stored by encode.
+    """
+    rows = json.loads(data)
+    if type_name.startswith("list:"):
+        cls = types.get(type_name[5:])
+        return [cls.from_row(row) for row in rows] if rows else []
+    return types[type_name].from_row(rows)
+
+class SQLiteCacheStore:
+    """
+    Persistent tier of the response cache in a local SQLite file (WAL mode).
+    Writes are buffered and flushed in batches (write-behind), reads go straight to the
+    file, which is cheap for single-key lookups. Expiry times are stored as wall-clock
+    times, so entries survive restarts with their remaining lifetime, and entries past
+    their stale window are purged on flush.
+    """
+    def __init__(self, path: str, batch_size: int = 256, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.batch_size = batch_size
+        self._clock = clock
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._pending: dict[tuple[str, str], tuple] = {}
+        self._hits: dict[tuple[str, str], int] = {}
+        self._types: dict[str, type] = None
+        self.writes = 0
+        self.reads = 0
+
+    @property
+    def types(self) -> dict[str, type]:
+        if self._types is None:
+            self._types = model_types()
+        return self._types
+
+    def put(self, endpoint: str, key: str, value, expires_in: float, stale_ttl: float):
+        """
+        Queues a value for writing. Values that are not models are ignored.
+        """
+        encoded = encode(value)
+        if encoded is None:
+            return
+        expires_at = self._clock() + expires_in
+        self._pending[(endpoint, key)] = (endpoint, key, encoded[0], encoded[1], expires_at, expires_at + stale_ttl)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def touch(self, endpoint: str, key: str):
+        """
+        Counts a hit of an entry, used to find the hottest entries on startup.
+        """
+        self._hits[(endpoint, key)] = self._hits.get((endpoint, key), 0) + 1
+
+    def get(self, endpoint: str, key: str) -> tuple[object, float]:
+        """
+        Returns the stored value and the seconds until it expires (negative if expired),
+        or None if there is no entry within its stale window.
+        """
+        now = self._clock()
+        row = self._pending.get((endpoint, key))
+        if row is None:
+            self.reads += 1
+            row = self._db.execute("SELECT endpoint, key, type, value, expires_at, stale_until FROM entries "
+                                   "WHERE endpoint = ? AND key = ?", (endpoint, key)).fetchone()
+        if row is None or row[5] <= now:
+            return None
+        try:
+            return decode(row[2], row[3], self.types), row[4] - now
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Eintrag %s/%s im Cache nicht lesbar: %s", endpoint, key, e)
+            return None
+
+    def hottest(self, limit: int) -> list[tuple[str, str, object, float]]:
+        """
+        Returns the most used entries within their stale window as (endpoint, key, value, expires_in).
+        """
+        now = self._clock()
+        result = []
+        rows = self._db.execute("SELECT endpoint, key, type, value, expires_at FROM entries WHERE stale_until > ? "
+                                "ORDER BY hits DESC LIMIT ?", (now, limit)).fetchall()
+        for endpoint, key, type_name, data, expires_at in rows:
+            try:
+                result.append((endpoint, key, decode(type_name, data, self.types), expires_at - now))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning("Eintrag %s/%s im Cache nicht lesbar: %s", endpoint, key, e)
+        return result
+
+    def flush(self):
+        """
+        Writes all queued entries and hit counts in one transaction and purges dead entries.
+        """
+        if not self._pending and not self._hits:
+            return
+        pending, self._pending = self._pending, {}
+        hits, self._hits = self._hits, {}
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT INTO entries (endpoint, key, type, value, expires_at, stale_until) "
+                                 "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (endpoint, key) DO UPDATE SET "
+                                 "type = excluded.type, value = excluded.value, expires_at = excluded.expires_at, "
+                                 "stale_until = excluded.stale_until", pending.values())
+            self._db.executemany("UPDATE entries SET hits = hits + ? WHERE endpoint = ? AND key = ?",
+                                 [(count, endpoint, key) for (endpoint, key), count in hits.items()])
+            self._db.execute("DELETE FROM entries WHERE stale_until <= ?", (self._clock(),))
+        self.writes += len(pending)
+        logger.debug("%d Cache-Einträge geschrieben", len(pending))
+
+    async def run(self, interval: float):
+        """
+        Flushes the queued writes periodically until cancelled.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error("Fehler beim Schreiben des Caches: %s", e)
+
+    def close(self):
+        """
+        Flushes the queued writes and closes the database.
+        """
+        self.flush()
+        self._db.close()
@@ -0,0 +1,298 @@
+#
+# catalog.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import abc
+import asyncio
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+import httpx
+import numpy as np
+from programs.reference import Reference
+from programs.store import ReferenceStore
+from programs.upstream import UpstreamError, UpstreamPool
+import maidenhead
+import util
+
+logger = logging.getLogger(__name__)
+
+# Kantenlänge der Zellen des räumlichen Index in Grad
+BUCKET_SIZE = 1.0
+
+@dataclass
+class CatalogDiff:
+    """
+    Describes the changes between two snapshots of a catalog by reference name.
+    """
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self):
+        return f"+{len(self.added)} -{len(self.removed)} ~{len(self.changed)}"
+
+class ReferenceSnapshot:
+    """
+    Immutable, in-memory copy of a reference catalog with a spatial bucket index.
+    """
+    def __init__(self, references: list[Reference], loaded_at: float = 0.0):
+        self._references = references
+        self._index([ref.name for ref in references],
+                    np.fromiter((ref.coordinates[0] for ref in references), dtype=np.float64, count=len(references)),
+                    np.fromiter((ref.coordinates[1] for ref in references), dtype=np.float64, count=len(references)),
+                    loaded_at)
+
+    def _index(self, names: list[str], lats: np.ndarray, lons: np.ndarray, loaded_at: float):
+        self.names = names
+        self.lats = lats
+        self.lons = lons
+        self.loaded_at = loaded_at
+        self._by_name = {name: i for i, name in enumerate(names)}
+
+        # Indizes nach Zelle gruppieren, Schlüssel (lat + 90) * 1000 + (lon + 180)
+        keys = (np.floor(lats / BUCKET_SIZE).astype(np.int64) + 90) * 1000 + \
+               (np.floor(lons / BUCKET_SIZE).astype(np.int64) + 180)
+        order = np.argsort(keys, kind="stable")
+        unique, starts = np.unique(keys[order], return_index=True)
+        self._buckets = {(int(key) // 1000 - 90, int(key) % 1000 - 180): bucket
+                         for key, bucket in zip(unique, np.split(order, starts[1:]))}
+
+    @property
+    def references(self) -> list[Reference]:
+        """
+        Returns all references of the snapshot.
+        """
+        return self._references
+
+    def reference(self, i: int) -> Reference:
+        """
+        Returns the reference at the given index.
+        """
+        return self._references[i]
+
+    def column(self, name: str) -> list:
+        """
+        Returns the values of a field for all references, in index order.
+        """
+        return [getattr(ref, name) for ref in self._references]
+
+    @staticmethod
+    def _bucket(lat: float, lon: float) -> tuple[int, int]:
+        return int(math.floor(lat / BUCKET_SIZE)), int(math.floor(lon / BUCKET_SIZE))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name: str):
+        return name in self._by_name
+
+    def get(self, name: str) -> Reference:
+        """
+        Returns the reference with the given name or None.
+        """
+        i = self._by_name.get(name)
+        return None if i is None else self.reference(i)
+
+    def candidates(self, lat: float, lon: float, radius: float) -> np.ndarray:
+        """
+        Returns the indexes of all references inside the bounding box of the radius (in km) around a point.
+        """
+        box = maidenhead.radius_bounds(lat, lon, radius)
+        lat_min, lon_min = self._bucket(box[0], box[1])
+        lat_max, lon_max = self._bucket(box[2], box[3])
+        if lon_max < lon_min:
+            lon_max += int(360 / BUCKET_SIZE)
+        lon_max = min(lon_max, lon_min + int(360 / BUCKET_SIZE) - 1)
+
+        result = []
+        for i in range(lat_min, lat_max + 1):
+            for j in range(lon_min, lon_max + 1):
+                # Längengrade über die Datumsgrenze hinweg umbrechen
+                j = (j + int(180 / BUCKET_SIZE)) % int(360 / BUCKET_SIZE) - int(180 / BUCKET_SIZE)
+                bucket = self._buckets.get((i, j))
+                if bucket is not None:
+                    result.append(bucket)
+        if not result:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.concatenate(result)
+        return candidates[maidenhead.in_bounds(self.lats[candidates], self.lons[candidates], box)]
+
+    def within(self, lat: float, lon: float, radius: float, limit: int = None) -> list[tuple[Reference, float]]:
+        """
+        Returns the nearest references (at most limit) within the radius (in km) around a point, sorted by distance.
+        """
+        candidates = self.candidates(lat, lon, radius)
+        distances = util.haversine_distances(lat, lon, self.lats[candidates], self.lons[candidates])
+        order = util.nearest_k(distances, len(candidates) if limit is None else limit, radius)
+        return [(self.reference(candidates[i]), float(distances[i])) for i in order]
+
+    def diff(self, other: "ReferenceSnapshot") -> CatalogDiff:
+        """
+        Returns the changes needed to get from this snapshot to the other one.
+        """
+        result = CatalogDiff()
+        for name, i in other._by_name.items():
+            j = self._by_name.get(name)
+            if j is None:
+                result.added.append(name)
+            elif self.reference(j) != other.reference(i):
+                result.changed.append(name)
+        result.removed = [name for name in self._by_name if name not in other._by_name]
+        return result
+
+class ColumnarSnapshot(ReferenceSnapshot):
+    """
+    Snapshot backed by a memory-mapped ReferenceStore. Reference objects are only
+    built for the rows that are accessed.
+    """
+    def __init__(self, store: ReferenceStore, loaded_at: float = 0.0):
+        self.store = store
+        self._index(store.names, store.lats, store.lons, loaded_at)
+
+    @property
+    def references(self) -> list[Reference]:
+        """
+        Returns all references of the snapshot. Builds every object, so avoid it on hot paths.
+        """
+        return [self.store.row(i) for i in range(len(self.store))]
+
+    def reference(self, i: int) -> Reference:
+        return self.store.row(int(i))
+
+    def column(self, name: str) -> list:
+        return self.store.column(name)
+
+class ReferenceCatalog(abc.ABC):
+    """
+    Local copy of the full reference list of a program.
+    A periodic job downloads the list, diffs it against the current snapshot and swaps
+    the new snapshot in atomically, so queries never see a half-built catalog.
+    The local copy is kept as a memory-mapped ReferenceStore file.
+    """
+    reference_type: type = Reference
+
+    def __init__(self, upstream: UpstreamPool, url: str, path: str, max_age: float):
+        self.upstream = upstream
+        self.url = url
+        self.path = path
+        self.max_age = max_age
+        self._snapshot = ReferenceSnapshot([])
+        self._listeners: list[Callable[[CatalogDiff, ReferenceSnapshot], None]] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def snapshot(self) -> ReferenceSnapshot:
+        """
+        Returns the current snapshot of the catalog.
+        """
+        return self._snapshot
+
+    @property
+    def is_fresh(self) -> bool:
+        """
+        Returns whether the catalog is loaded and younger than its maximum age.
+        """
+        return len(self._snapshot) > 0 and time.time() - self._snapshot.loaded_at < self.max_age
+
+    def add_listener(self, listener: Callable[[CatalogDiff, ReferenceSnapshot], None]):
+        """
+        Registers a function that is called with the diff and the new snapshot after every swap.
+        """
+        self._listeners.append(listener)
+
+    @abc.abstractmethod
+    def parse(self, text: str) -> list[Reference]:
+        """
+        Parses the downloaded catalog into references. Implemented by the programs.
+        """
+
+    async def _swap(self, snapshot: ReferenceSnapshot) -> CatalogDiff:
+        diff = await asyncio.to_thread(self._snapshot.diff, snapshot)
+        self._snapshot = snapshot
+        for listener in self._listeners:
+            try:
+                listener(diff, snapshot)
+            except Exception as e:
+                logger.error("Fehler in Katalog-Listener: %s", e)
+        return diff
+
+    def _build(self, text: str) -> ReferenceSnapshot | None:
+        references = self.parse(text)
+        if not references:
+            return None
+        ReferenceStore.write(self.path, references, self.reference_type)
+        return self._read()
+
+    def _read(self) -> ReferenceSnapshot:
+        return ColumnarSnapshot(ReferenceStore.open(self.path, self.reference_type), os.path.getmtime(self.path))
+
+    async def load(self) -> bool:
+        """
+        Loads the catalog from the local copy, if there is one.
+        """
+        if not os.path.exists(self.path):
+            return False
+        snapshot = await asyncio.to_thread(self._read)
+        diff = await self._swap(snapshot)
+        logger.info("Katalog %s geladen: %d Einträge (%s)", self.path, len(snapshot), diff)
+        return True
+
+    async def sync(self) -> CatalogDiff | None:
+        """
+        Downloads the catalog, stores the local copy and swaps it in. Returns None and keeps
+        the current snapshot if the download fails or the catalog contains no references.
+        """
+        async with self._lock:
+            logger.debug("Lade Katalog von %s", self.url)
+            try:
+                response = await self.upstream.get(self.url)
+            except (UpstreamError, httpx.HTTPError) as e:
+                logger.error("Fehler beim Abrufen des Katalogs %s: %s", self.url, e)
+                return None
+            if response.status_code != 200:
+                logger.error("Fehler beim Abrufen des Katalogs %s: %s", self.url, response.status_code)
+                return None
+
+            snapshot = await asyncio.to_thread(self._build, response.text)
+            if snapshot is None:
+                logger.error("Katalog %s ist leer, behalte bisherigen Stand", self.url)
+                return None
+
+            diff = await self._swap(snapshot)
+            logger.info("Katalog %s aktualisiert: %d Einträge (%s)", self.url, len(snapshot), diff)
+            return diff
+
+    async def refresh(self, interval: float):
+        """
+        Called periodically: uses the local copy on first run if it is younger than the interval,
+        otherwise downloads the catalog.
+        """
+        if len(self._snapshot) == 0 and await self.load() and time.time() - self._snapshot.loaded_at < interval:
+            return
+        await self.sync()
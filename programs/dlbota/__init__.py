@@ -0,0 +1,21 @@
+import importlib
+
+# Die Submodule werden erst beim ersten Zugriff importiert, damit das Paket (z. B. für das
+# Manifest) ohne die schweren Abhängigkeiten des Programms geladen werden kann
+_EXPORTS = {
+    "Bunker": ".bunker",
+    "DLBOTAProfile": ".profile",
+    "DLBOTAAPI": ".api",
+    "BunkerCatalog": ".catalog",
+    "DLBOTA": ".dlbota",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
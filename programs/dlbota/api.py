@@ -0,0 +1,71 @@
+#
+# api.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import logging
+from programs.api import UpstreamAPI
+from programs.bulkhead import Bulkhead
+from programs.cache import ResponseCache
+from programs.dlbota.profile import DLBOTAProfile
+from programs.upstream import UpstreamPool, UpstreamStatusError
+
+logger = logging.getLogger(__name__)
+
+class DLBOTAAPI(UpstreamAPI):
+    def __init__(self, upstream: UpstreamPool, base_url: str = "https://logs.dlbota.de/api", cache: ResponseCache = None,
+                 bulkhead: Bulkhead = None):
+        """Initialize the API client with the shared upstream pool, a base URL, an optional cache and the budget of the program."""
+        super().__init__(upstream, base_url, cache, bulkhead)
+
+    async def get_profile(self, callsign: str) -> DLBOTAProfile:
+        """Fetch the profile of a specific callsign. Returns None if the callsign is unknown."""
+        return await self._lookup("dlbota.profile", callsign.upper(), lambda: self._fetch_profile(callsign.upper()))
+
+    async def _fetch_profile(self, callsign: str) -> DLBOTAProfile:
+        url = f"{self.base_url}/stats.php"
+        logger.debug(f"Fetching profile data from {url} for callsign {callsign}")
+        response = await self.upstream.get(url, params={"callsign": callsign})
+
+        if response.status_code != 200:
+            logger.error(f"Error fetching profile data: {response.status_code} - {response.text}")
+            raise UpstreamStatusError(url, response.status_code)
+        data = response.json()
+
+        if data.get("callsign") != callsign:
+            return None
+
+        return DLBOTAProfile.from_api(data)
+
+if __name__ == "__main__":
+    # Example usage
+    async def main():
+        upstream = UpstreamPool()
+        api = DLBOTAAPI(upstream, cache=ResponseCache())
+        try:
+            print(await api.get_profile("DK8YS"))
+        except Exception as e:
+            print(f"Failed to fetch profile: {e}")
+        finally:
+            await upstream.aclose()
+
+    asyncio.run(main())
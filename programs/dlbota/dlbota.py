@@ -0,0 +1,142 @@
+#
+# dlbota.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import html
+import logging
+import os
+from telegram import Update
+from telegram.ext import Application, CallbackContext
+from telegram.constants import ParseMode
+from config import Config
+from programs.bulkhead import Bulkhead
+from programs.cache import ResponseCache
+from programs.dlbota.api import DLBOTAAPI
+from programs.dlbota.catalog import BunkerCatalog
+from programs.dlbota.profile import DLBOTAProfile
+from programs.dlbota.manifest import MANIFEST
+from programs.maps import MapRenderer, split_map_option
+from programs.outbound import OutboundScheduler
+from programs.program import Program
+from programs.state import StateBackend
+from programs.upstream import UpstreamPool
+import util
+
+logger = logging.getLogger(__name__)
+
+class DLBOTA(Program):
+    def __init__(self, app: Application, config: Config, upstream: UpstreamPool, cache: ResponseCache = None,
+                 outbound: OutboundScheduler = None, maps: MapRenderer = None, state: StateBackend = None):
+        super().__init__(app, outbound, maps, Bulkhead.from_config(config, MANIFEST.name.lower()))
+        self.config = config
+        self.api = DLBOTAAPI(upstream, cache=cache, bulkhead=self.bulkhead)
+        # Ohne Quelle der Bunkerliste gibt es keinen Katalog und keine Umkreissuche
+        self.catalog = None
+        if config.dlbota_catalog_url:
+            self.catalog = BunkerCatalog(upstream,
+                                         config.dlbota_catalog_url,
+                                         os.path.join(config.data_dir, "dlbota_bunkers.refs"),
+                                         config.dlbota_catalog_max_age)
+
+        logger.debug("Initialisiere DLBOTA Modul")
+        self.register_handler("dlbota_profile", self.dlbota_profile_cmd, MANIFEST.commands["dlbota_profile"])
+        self.register_handler("dlbota_bunkers_range", self.dlbota_bunkers_range_cmd, MANIFEST.commands["dlbota_bunkers_range"])
+        if self.catalog is not None:
+            self.run_repeating(self._sync_catalog_job, config.dlbota_catalog_interval, name="dlbota_catalog")
+
+    async def _sync_catalog_job(self, context: CallbackContext):
+        await self.catalog.refresh(self.config.dlbota_catalog_interval)
+
+# /dlbota_profile
+    async def dlbota_profile_cmd(self, update: Update, context: CallbackContext):
+        if not context.args:
+            await self.reply(update, "Bitte gib dein Rufzeichen an, z.B. /dlbota_profile DL1XYZ")
+            return
+
+        # Mehrere Rufzeichen werden gleichzeitig abgefragt und in einer Antwort zusammengefasst
+        await self.reply_many(update, context.args, self.api.get_profile, self._render_profile_result,
+                              self.config.lookup_concurrency, self.config.lookup_max_keys, parse_mode=ParseMode.HTML)
+
+    def _render_profile_result(self, callsign: str, profile) -> str:
+        if isinstance(profile, Exception):
+            logger.error("Fehler beim Abrufen des DLBOTA-Profils: %s", profile)
+            return f"Fehler beim Abrufen des DLBOTA-Profils ({html.escape(callsign)})"
+        if profile is None:
+            return f"Rufzeichen <i>{html.escape(callsign)}</i> nicht gefunden."
+        return self.render_profile(callsign, profile)
+
+    @staticmethod
+    def render_profile(callsign: str, profile: DLBOTAProfile) -> str:
+        """
+        Renders the HTML answer of /dlbota_profile.
+        """
+        return (
+            f"DLBOTA Profil für: <i>{html.escape(callsign.upper())}</i>\n"
+            f"\n"
+            f"<b>Aktivierer:</b>\n"
+            f"🗺️ Bunker: {profile.activator_bunkers}\n"
+            f"📻 Aktivierungen: {profile.activator_activations}\n"
+            f"📡 QSOs: {profile.activator_qsos}\n"
+            f"\n"
+            f"<b>Jäger:</b>\n"
+            f"🗺️ Bunker: {profile.hunter_bunkers}\n"
+            f"📡 QSOs: {profile.hunter_qsos}")
+
+# /dlbota_bunkers_range
+    async def dlbota_bunkers_range_cmd(self, update: Update, context: CallbackContext):
+        args, with_map = split_map_option(context.args or [])
+        if not args:
+            await self.reply(update, "Bitte gib dein Grid (4 bis 10 Zeichen) an, z.B. /dlbota_bunkers_range JO62qm")
+            return
+        if self.catalog is None:
+            await self.reply(update, "Die Bunkersuche ist nicht eingerichtet, es ist keine Quelle der Bunkerliste konfiguriert.")
+            return
+
+        grid = args[0].upper()
+        try:
+            lat, lon = util.maidenhead_locator_to_latlon(grid)
+        except ValueError:
+            await self.reply(update, f"Ungültiges Grid: {grid}")
+            return
+
+        try:
+            range = util.parse_range(args[1], self.config.dlbota_max_range) if len(args) > 1 else int(self.config.dlbota_default_range)
+        except ValueError:
+            await self.reply(update, f"Ungültiger Bereich: {args[1]}. Bitte gib den Bereich in km (1 bis {self.config.dlbota_max_range}) an, "
+                                     f"z.B. /dlbota_bunkers_range JO62qm 50")
+            return
+
+        snapshot = self.catalog.snapshot
+        if len(snapshot) == 0:
+            await self.reply(update, "Die Bunkerliste ist noch nicht geladen, bitte versuche es später erneut.")
+            return
+
+        nearest = snapshot.within(lat, lon, range, self.config.dlbota_max_bunkers)
+        bunkers_info = [f"{html.escape(bunker.name)} - {html.escape(bunker.description)} - {dist:.1f} km\n" for bunker, dist in nearest]
+
+        if len(bunkers_info) == 0:
+            await self.reply(update, "Keine Bunker im angegebenen Bereich gefunden.")
+            return
+
+        await self.reply(update, f"Bunker im Bereich von {grid} ({range}km):\n{''.join(bunkers_info)}", parse_mode=ParseMode.HTML)
+        if with_map:
+            await self.reply_map(update, f"Bunker im Bereich von {grid} ({range} km)", lat, lon, range, nearest)
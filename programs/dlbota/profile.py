@@ -0,0 +1,75 @@
+#
+# profile.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from programs.profile import Profile
+from programs.dlbota.bunker import Bunker
+from dataclasses import dataclass
+
+@dataclass(slots=True)
+class DLBOTAProfile(Profile):
+    """
+    Represents a DLBOTA user profile with a callsign and the activator and hunter statistics.
+    Inherits from the Profile class.
+    Footprint: 88 bytes plus the callsign and the reference list (128 bytes with a __dict__).
+    """
+    reference_type = Bunker
+
+    activator_activations: int = 0
+    activator_bunkers: int = 0
+    activator_qsos: int = 0
+    hunter_bunkers: int = 0
+    hunter_qsos: int = 0
+
+    def __str__(self):
+        # Slotted dataclasses don't support super() without arguments
+        return Profile.__str__(self) + (f", "
+                f"activator_activations={self.activator_activations}, "
+                f"activator_bunkers={self.activator_bunkers}, "
+                f"activator_qsos={self.activator_qsos}, "
+                f"hunter_bunkers={self.hunter_bunkers}, "
+                f"hunter_qsos={self.hunter_qsos})")
+
+    def to_dict(self):
+        """
+        Converts the DLBOTA profile to a dictionary format.
+        """
+        return Profile.to_dict(self) | {
+            "activator_activations": self.activator_activations,
+            "activator_bunkers": self.activator_bunkers,
+            "activator_qsos": self.activator_qsos,
+            "hunter_bunkers": self.hunter_bunkers,
+            "hunter_qsos": self.hunter_qsos,
+        }
+
+    @classmethod
+    def from_api(cls, data: dict) -> "DLBOTAProfile":
+        """
+        Builds a profile from the answer of the DLBOTA statistics API (stats.php).
+        """
+        return cls(data['callsign'],
+                   [],
+                   data['activator']['activations'],
+                   data['activator']['bunkers'],
+                   data['activator']['qsos'],
+                   data['hunter']['bunkers'],
+                   data['hunter']['qsos'])
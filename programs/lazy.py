@@ -0,0 +1,113 @@
+#
+# lazy.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import importlib
+import logging
+import time
+from dataclasses import dataclass
+from telegram.ext import Application, CommandHandler, InlineQueryHandler
+from programs.program import INLINE_QUERY, Program
+from programs.startup import StartupReport
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class ProgramManifest:
+    """
+    Static description of a program: the module and class implementing it, its commands
+    with their help texts and whether it answers inline queries. Importing a manifest must
+    not import the program itself.
+    """
+    name: str
+    module: str
+    class_name: str
+    commands: dict[str, str]
+    inline: bool = False
+
+class LazyProgram:
+    """
+    Stands in for a program until it is needed. The commands of the manifest are
+    registered right away, but the program module (with its heavy dependencies) is only
+    imported and the program constructed on the first command or by load(), e.g. from a
+    background job once the bot is serving.
+    """
+    def __init__(self, app: Application, manifest: ProgramManifest, args: tuple = (), report: StartupReport = None):
+        self.app = app
+        self.manifest = manifest
+        self.report = report
+        self.program: Program = None
+        self._args = args
+        self._lock = asyncio.Lock()
+        self.help_texts = [f"/{command} - {help_text}" for command, help_text in manifest.commands.items()]
+        self.handlers: dict[str, CommandHandler] = {}
+        self.callbacks: dict = {}
+        for command in manifest.commands:
+            self.callbacks[command] = self._forwarder(command)
+            self.handlers[command] = CommandHandler(command, self.callbacks[command])
+            app.add_handler(self.handlers[command])
+        if manifest.inline:
+            self.callbacks[INLINE_QUERY] = self._forwarder(INLINE_QUERY)
+            self.handlers[INLINE_QUERY] = InlineQueryHandler(self.callbacks[INLINE_QUERY])
+            app.add_handler(self.handlers[INLINE_QUERY])
+
+    @property
+    def loaded(self) -> bool:
+        return self.program is not None
+
+    def _forwarder(self, command: str):
+        async def forward(update, context):
+            program = self.program or await self.load()
+            return await program.callbacks[command](update, context)
+        return forward
+
+    async def load(self) -> Program:
+        """
+        Imports and constructs the program, once.
+        """
+        async with self._lock:
+            if self.program is not None:
+                return self.program
+
+            start = time.perf_counter()
+            # Import im Thread, damit die Event-Loop weiter Updates verarbeitet
+            module = await asyncio.to_thread(importlib.import_module, self.manifest.module)
+            imported = time.perf_counter()
+            program = getattr(module, self.manifest.class_name)(self.app, *self._args)
+            initialized = time.perf_counter()
+
+            # Die Befehle laufen weiter über die Handler des Platzhalters
+            for handler in program.handlers.values():
+                self.app.remove_handler(handler)
+            unknown = set(program.handlers) - set(self.handlers)
+            if unknown:
+                logger.warning("Befehle %s von %s fehlen im Manifest und sind nicht erreichbar",
+                               ", ".join(sorted(unknown)), self.manifest.name)
+            self.program = program
+
+            if self.report is not None:
+                self.report.add(f"Import {self.manifest.module}", imported - start, start)
+                self.report.add(f"Initialisierung {self.manifest.class_name}", initialized - imported, imported)
+            logger.info("Programm %s geladen (Import %.0f ms, Initialisierung %.0f ms)", self.manifest.name,
+                        (imported - start) * 1000, (initialized - imported) * 1000)
+            return program
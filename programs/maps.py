@@ -0,0 +1,206 @@
+#
+# maps.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import hashlib
+import io
+import logging
+import math
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from telegram import Update
+from config import Config
+from programs import metrics
+from programs.outbound import OutboundScheduler, reply_photo
+from programs.reference import Reference
+from programs.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+MAP_RENDER_DURATION = metrics.histogram("bot_map_render_duration_seconds", "Duration of map renderings in the process pool")
+MAP_REQUESTS = metrics.counter("bot_map_requests_total", "Map requests by whether a cached file_id was sent", ("result",))
+
+# Zusätzliches Argument der Umkreisbefehle, mit dem eine Karte angefordert wird
+MAP_OPTION = "karte"
+
+# Mittlerer Abstand zweier Breitengrade in km
+KM_PER_DEGREE = 111.2
+
+def split_map_option(args: list[str]) -> tuple[list[str], bool]:
+    """
+    Removes the map option from the command arguments and returns the remaining arguments
+    and whether a map was requested.
+    """
+    rest = [arg for arg in args if arg.lower() != MAP_OPTION]
+    return rest, len(rest) != len(args)
+
+def _init_worker():
+    # matplotlib nur in den Worker-Prozessen und dort einmal beim Start importieren
+    import matplotlib.backends.backend_agg  # noqa: F401
+    import matplotlib.figure  # noqa: F401
+
+def render_map(title: str, lat: float, lon: float, radius: float, points: list[tuple[str, float, float]]) -> bytes:
+    """
+    Renders a PNG map of the references (name, lat, lon) around a point, with the search
+    radius in km as a circle. Runs in a worker process of the MapRenderer.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(7, 7), dpi=100)
+    ax = fig.subplots()
+    # Abstandstreue Darstellung in der Umgebung des Mittelpunkts
+    cos_lat = max(math.cos(math.radians(lat)), 0.01)
+    ax.set_aspect(1 / cos_lat)
+
+    dlat = radius / KM_PER_DEGREE
+    dlon = dlat / cos_lat
+    angles = [2 * math.pi * i / 128 for i in range(129)]
+    ax.plot([lon + dlon * math.cos(a) for a in angles], [lat + dlat * math.sin(a) for a in angles],
+            color="tab:blue", linewidth=1, linestyle="--")
+    ax.set_xlim(lon - dlon * 1.1, lon + dlon * 1.1)
+    ax.set_ylim(lat - dlat * 1.1, lat + dlat * 1.1)
+
+    if points:
+        ax.scatter([p[2] for p in points], [p[1] for p in points], s=18, color="tab:green", zorder=3)
+        for name, point_lat, point_lon in points:
+            ax.annotate(name, (point_lon, point_lat), xytext=(3, 3), textcoords="offset points", fontsize=7)
+    ax.scatter([lon], [lat], s=80, marker="*", color="tab:red", zorder=4)
+
+    ax.set_title(title)
+    ax.set_xlabel("Länge")
+    ax.set_ylabel("Breite")
+    ax.grid(True, linewidth=0.3)
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+class MapRenderer:
+    """
+    Renders maps of nearby references in a process pool, so neither the event loop nor the
+    GIL of the bot process is held while matplotlib draws. Sent maps are remembered by a
+    content hash of the query and its result set: a repeated query resends the Telegram
+    file_id of the uploaded image instead of rendering and uploading it again.
+    """
+    def __init__(self, workers: int = 2, cache_size: int = 512):
+        self.workers = workers
+        self.cache_size = cache_size
+        self._executor: ProcessPoolExecutor = None
+        self._file_ids: OrderedDict[str, str] = OrderedDict()
+        self.singleflight = SingleFlight()
+        self.renders = 0
+        self.hits = 0
+
+    @classmethod
+    def from_config(cls, config: Config):
+        """
+        Creates the renderer from the configuration, or returns None if maps are disabled.
+        """
+        if config.map_workers <= 0:
+            return None
+        return cls(config.map_workers, config.map_cache_size)
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns the number of renderings, file_id hits and cached file_ids.
+        """
+        return {"renders": self.renders, "hits": self.hits, "file_ids": len(self._file_ids)}
+
+    @staticmethod
+    def key(title: str, lat: float, lon: float, radius: float, results: list[tuple[Reference, float]]) -> str:
+        """
+        Returns the content hash of a map.
+        """
+        digest = hashlib.sha256(f"{title}|{lat:.5f},{lon:.5f}|{radius}".encode('utf-8'))
+        for reference, _ in results:
+            digest.update(f"|{reference.name}@{reference.coordinates[0]:.5f},{reference.coordinates[1]:.5f}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def file_id(self, key: str) -> str:
+        """
+        Returns the file_id of an already sent map or None.
+        """
+        file_id = self._file_ids.get(key)
+        if file_id is not None:
+            self._file_ids.move_to_end(key)
+        return file_id
+
+    def remember(self, key: str, file_id: str):
+        """
+        Stores the file_id of a sent map, dropping the least recently used ones over the limit.
+        """
+        self._file_ids[key] = file_id
+        self._file_ids.move_to_end(key)
+        while len(self._file_ids) > self.cache_size:
+            self._file_ids.popitem(last=False)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn statt fork, der Bot-Prozess hat bereits Threads und eine laufende Event-Loop
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_init_worker)
+        return self._executor
+
+    async def render(self, title: str, lat: float, lon: float, radius: float,
+                     results: list[tuple[Reference, float]]) -> bytes:
+        """
+        Renders a map in the process pool and returns the PNG image.
+        """
+        points = [(reference.name, reference.coordinates[0], reference.coordinates[1]) for reference, _ in results]
+        start = time.perf_counter()
+        image = await asyncio.get_running_loop().run_in_executor(self._pool(), render_map, title, lat, lon, radius, points)
+        MAP_RENDER_DURATION.labels().observe(time.perf_counter() - start)
+        self.renders += 1
+        return image
+
+    async def reply(self, outbound: OutboundScheduler, update: Update, title: str, lat: float, lon: float,
+                    radius: float, results: list[tuple[Reference, float]]):
+        """
+        Answers a command with the map of the results, from the file_id cache if possible.
+        Identical concurrent requests share one rendering.
+        """
+        key = self.key(title, lat, lon, radius, results)
+        file_id = self.file_id(key)
+        if file_id is not None:
+            self.hits += 1
+            MAP_REQUESTS.labels("hit").inc()
+            return await reply_photo(outbound, update, file_id, title)
+
+        MAP_REQUESTS.labels("miss").inc()
+        image = await self.singleflight.do(key, lambda: self.render(title, lat, lon, radius, results))
+        message = await reply_photo(outbound, update, image, title)
+        if message is not None and message.photo:
+            self.remember(key, message.photo[-1].file_id)
+        return message
+
+    def close(self):
+        """
+        Shuts the process pool down.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
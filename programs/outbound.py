@@ -0,0 +1,349 @@
+#
+# outbound.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import datetime
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+from telegram import Bot, Update
+from telegram.error import RetryAfter
+from config import Config
+from programs import metrics
+
+logger = logging.getLogger(__name__)
+
+MESSAGES_SENT = metrics.counter("bot_messages_sent_total", "Messages sent to Telegram", ("priority",))
+MESSAGES_FAILED = metrics.counter("bot_messages_failed_total", "Messages that could not be sent", ("priority",))
+MESSAGES_RETRIED = metrics.counter("bot_messages_rate_limited_total", "Messages rejected with 429 and queued again")
+MESSAGES_QUEUED = metrics.gauge("bot_messages_queued", "Messages waiting in the outbound queues")
+PRIORITY_NAMES = {0: "interactive", 1: "bulk"}
+
+# Prioritätsklassen, kleinere Werte werden zuerst gesendet
+INTERACTIVE = 0
+BULK = 1
+
+# Maximale Länge einer Telegram-Nachricht
+MAX_MESSAGE_LENGTH = 4096
+
+# Parameter, unter dem der Text je Bot-Methode übergeben wird
+TEXT_ARGUMENTS = {"send_message": "text", "send_photo": "caption"}
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` operations per second with bursts of up to `capacity`.
+    """
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _fill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """
+        Returns the seconds until a token is available, 0 if one is available now.
+        """
+        self._fill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    @property
+    def full(self) -> bool:
+        """
+        Returns whether the bucket is filled up to its capacity.
+        """
+        self._fill()
+        return self._tokens >= self.capacity
+
+    def take(self) -> bool:
+        """
+        Takes a token if one is available.
+        """
+        self._fill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+@dataclass
+class OutboundMessage:
+    chat_id: int
+    text: str
+    priority: int
+    kwargs: dict
+    seq: int
+    method: str = "send_message"
+    futures: list[asyncio.Future] = field(default_factory=list)
+
+@dataclass
+class ChatQueue:
+    bucket: TokenBucket
+    messages: deque = field(default_factory=deque)
+    blocked_until: float = 0.0
+    sending: bool = False
+
+class OutboundScheduler:
+    """
+    Central queue for all outgoing messages of the bot.
+    Messages are queued per chat and sent by a single dispatcher that respects Telegram's
+    flood limits with a global token bucket and one bucket per chat (groups are limited
+    more strictly). Interactive replies are sent before bulk messages such as alerts, and
+    bulk messages piling up for the same chat are merged into one message. A 429 answer
+    only pauses the affected chat for the requested time, other chats keep going.
+    """
+    def __init__(self, bot: Bot, global_rate: float = 30.0, chat_rate: float = 1.0, group_rate: float = 20 / 60,
+                 chat_burst: float = 3.0, clock: Callable[[], float] = time.monotonic):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self._clock = clock
+        self._global = TokenBucket(global_rate, global_rate, clock)
+        self._chats: dict[int, ChatQueue] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task = None
+        self._sends: set[asyncio.Task] = set()
+        self.sent = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.failed = 0
+
+    @classmethod
+    def from_config(cls, bot: Bot, config: Config):
+        """
+        Creates the scheduler with the rate limits taken from the configuration.
+        """
+        return cls(bot, config.outbound_global_rate, config.outbound_chat_rate, config.outbound_group_rate)
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns the send counters and the number of queued messages.
+        """
+        return {
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "failed": self.failed,
+            "queued": sum(len(chat.messages) for chat in self._chats.values()),
+        }
+
+    def enqueue(self, chat_id: int, text: str, priority: int = INTERACTIVE, method: str = "send_message",
+                **kwargs) -> asyncio.Future:
+        """
+        Queues a message and returns a future resolving to the sent telegram.Message.
+        The message is sent with the given Bot method (send_message or send_photo, where the
+        text becomes the caption); further keyword arguments are passed to it.
+        """
+        future = asyncio.get_running_loop().create_future()
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            # Gruppen haben negative Chat-IDs und strengere Limits
+            rate = self.group_rate if chat_id < 0 else self.chat_rate
+            chat = self._chats[chat_id] = ChatQueue(TokenBucket(rate, self.chat_burst, self._clock))
+
+        last = chat.messages[-1] if chat.messages else None
+        if (priority == BULK and method == "send_message" and last is not None and last.priority == BULK
+                and last.method == method and last.kwargs == kwargs and len(last.text) + len(text) + 1 <= MAX_MESSAGE_LENGTH):
+            last.text += "\n" + text
+            last.futures.append(future)
+            self.coalesced += 1
+        else:
+            message = OutboundMessage(chat_id, text, priority, kwargs, next(self._seq), method, [future])
+            if priority == INTERACTIVE:
+                # Vor wartende Massennachrichten desselben Chats einreihen
+                index = next((i for i, m in enumerate(chat.messages) if m.priority > priority), len(chat.messages))
+                chat.messages.insert(index, message)
+            else:
+                chat.messages.append(message)
+        self._wakeup.set()
+        return future
+
+    async def send(self, chat_id: int, text: str, priority: int = INTERACTIVE, **kwargs):
+        """
+        Queues a message and waits until it is sent.
+        """
+        return await self.enqueue(chat_id, text, priority, **kwargs)
+
+    async def send_photo(self, chat_id: int, photo, caption: str = None, priority: int = INTERACTIVE, **kwargs):
+        """
+        Queues a photo (bytes or the file_id of an uploaded photo) and waits until it is sent.
+        """
+        return await self.enqueue(chat_id, caption, priority, "send_photo", photo=photo, **kwargs)
+
+    def _next(self) -> tuple[int, float]:
+        """
+        Returns the chat whose head message should be sent next, or None and the seconds to wait.
+        """
+        now = self._clock()
+        best, best_key, wait = None, None, None
+        idle = []
+        for chat_id, chat in self._chats.items():
+            if not chat.messages or chat.sending:
+                if not chat.messages and not chat.sending and chat.bucket.full and chat.blocked_until <= now:
+                    idle.append(chat_id)
+                continue
+            delay = max(chat.blocked_until - now, chat.bucket.delay())
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            head = chat.messages[0]
+            key = (head.priority, head.seq)
+            if best_key is None or key < best_key:
+                best, best_key = chat_id, key
+        # Leere Queues mit vollem Bucket tragen keinen Zustand mehr
+        for chat_id in idle:
+            del self._chats[chat_id]
+        return best, wait
+
+    async def _run(self):
+        while True:
+            chat_id, wait = self._next()
+            if chat_id is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            delay = self._global.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            chat = self._chats[chat_id]
+            self._global.take()
+            chat.bucket.take()
+            chat.sending = True
+            task = asyncio.create_task(self._send(chat, chat.messages.popleft()))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _send(self, chat: ChatQueue, message: OutboundMessage):
+        try:
+            send = getattr(self.bot, message.method)
+            result = await send(chat_id=message.chat_id, **{TEXT_ARGUMENTS[message.method]: message.text}, **message.kwargs)
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            seconds = retry_after.total_seconds() if isinstance(retry_after, datetime.timedelta) else float(retry_after)
+            logger.warning("Flood-Limit für Chat %s erreicht, warte %s Sekunden", message.chat_id, seconds)
+            chat.blocked_until = self._clock() + seconds
+            chat.messages.appendleft(message)
+            self.retries += 1
+            MESSAGES_RETRIED.inc()
+        except Exception as e:
+            logger.error("Fehler beim Senden an Chat %s: %s", message.chat_id, e)
+            self.failed += 1
+            MESSAGES_FAILED.labels(PRIORITY_NAMES[message.priority]).inc()
+            for future in message.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self.sent += 1
+            MESSAGES_SENT.labels(PRIORITY_NAMES[message.priority]).inc()
+            for future in message.futures:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            chat.sending = False
+            self._wakeup.set()
+
+    def start(self):
+        """
+        Starts the dispatcher task.
+        """
+        if self._task is None:
+            MESSAGES_QUEUED.labels().set_function(lambda: self.stats["queued"])
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stops the dispatcher task. Queued messages are dropped.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._sends):
+            await task
+        for chat in self._chats.values():
+            for message in chat.messages:
+                for future in message.futures:
+                    future.cancel()
+        self._chats.clear()
+
+def split_message(parts: list[str], separator: str = "\n", limit: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """
+    Joins the parts into as few messages as possible within the Telegram size limit.
+    Parts are only cut if a single part is longer than the limit.
+    """
+    messages = []
+    current = ""
+    for part in parts:
+        while len(part) > limit:
+            if current:
+                messages.append(current)
+                current = ""
+            messages.append(part[:limit])
+            part = part[limit:]
+        if current and len(current) + len(separator) + len(part) > limit:
+            messages.append(current)
+            current = part
+        else:
+            current = current + separator + part if current else part
+    if current:
+        messages.append(current)
+    return messages
+
+async def reply(outbound: OutboundScheduler, update: Update, text: str, **kwargs):
+    """
+    Answers a command as an interactive message through the scheduler, or directly without one.
+    """
+    if outbound is None:
+        result = await update.message.reply_text(text, **kwargs)
+        MESSAGES_SENT.labels(PRIORITY_NAMES[INTERACTIVE]).inc()
+        return result
+    return await outbound.send(update.effective_chat.id, text, INTERACTIVE, **kwargs)
+
+async def reply_photo(outbound: OutboundScheduler, update: Update, photo, caption: str = None, **kwargs):
+    """
+    Answers a command with a photo through the scheduler, or directly without one.
+    """
+    if outbound is None:
+        result = await update.message.reply_photo(photo, caption=caption, **kwargs)
+        MESSAGES_SENT.labels(PRIORITY_NAMES[INTERACTIVE]).inc()
+        return result
+    return await outbound.send_photo(update.effective_chat.id, photo, caption, INTERACTIVE, **kwargs)
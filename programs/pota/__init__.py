@@ -1,6 +1,24 @@
-from .profile import POTAProfile
-from .park import Park
-from .api import POTAAPI
-from .pota import POTA
+import importlib
 
-__all__ = ["POTAProfile", "Park", "POTAAPI", "POTA"]
\ No newline at end of file
+# Die Submodule werden erst beim ersten Zugriff importiert, damit das Paket (z. B. für das
+# Manifest) ohne die schweren Abhängigkeiten des Programms geladen werden kann
+_EXPORTS = {
+    "POTAProfile": ".profile",
+    "Park": ".park",
+    "Spot": ".spot",
+    "POTAAPI": ".api",
+    "SpotPoller": ".spots",
+    "SpotChanges": ".spots",
+    "SpotAlerts": ".alerts",
+    "POTA": ".pota",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,232 @@
+#
+# alerts.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import html
+import logging
+import time
+from telegram import Update
+from telegram.ext import Application, CallbackContext
+from telegram.constants import ParseMode
+from programs.outbound import OutboundScheduler, BULK, reply
+from programs.pota.spot import Spot
+from programs.pota.spots import SpotChanges
+from programs.state import Lease
+from programs.subscriptions import Subscription, SubscriptionEngine, SubscriptionStore, KINDS
+
+logger = logging.getLogger(__name__)
+
+class SpotAlerts:
+    """
+    Alerts chats about new spots matching their subscriptions.
+    With a subscription store, the subscriptions are shared between replicas, and with
+    a lease only the replica holding it sends the alerts.
+    """
+    def __init__(self, app: Application, max_subscriptions: int, cooldown: float, outbound: OutboundScheduler = None,
+                 store: SubscriptionStore = None, lease: Lease = None):
+        self.app = app
+        self.outbound = outbound
+        self.engine = SubscriptionEngine()
+        self.store = store
+        self.lease = lease
+        self.max_subscriptions = max_subscriptions
+        self.cooldown = cooldown
+        self._last_alert: dict[tuple[int, str, str], float] = {}
+        # Version der Abos im Speicher, None bis sie einmal geladen wurden
+        self._version: int = None
+        self.alerts_sent = 0
+
+    def match(self, spots: list[Spot]) -> dict[int, list[Spot]]:
+        """
+        Returns the matching spots per chat, without spots alerted within the cooldown.
+        """
+        now = time.monotonic()
+        result: dict[int, list[Spot]] = {}
+        for spot in spots:
+            coordinates = spot.coordinates if spot.coordinates != (0.0, 0.0) else None
+            chats = {subscription.chat_id for subscription in
+                     self.engine.match(spot.activator, spot.reference, tuple(spot.location.split(",")), coordinates)}
+            for chat_id in chats:
+                key = (chat_id, spot.activator, spot.reference)
+                if now - self._last_alert.get(key, -self.cooldown) < self.cooldown:
+                    continue
+                self._last_alert[key] = now
+                result.setdefault(chat_id, []).append(spot)
+
+        # Abgelaufene Sperren entfernen
+        if len(self._last_alert) > 10000:
+            self._last_alert = {k: t for k, t in self._last_alert.items() if now - t < self.cooldown}
+        return result
+
+    async def sync(self):
+        """
+        Applies the subscriptions added or removed through other replicas to the engine.
+        Only reads the version of the store unless it changed since the last sync.
+        """
+        if self.store is None:
+            return
+        try:
+            version = await self.store.version()
+            if version == self._version:
+                return
+            stored = await self.store.load()
+        except Exception as e:
+            logger.warning("Abos konnten nicht geladen werden: %s", e)
+            return
+        current = self.engine.all()
+        for subscription in current - stored:
+            self.engine.remove(subscription)
+        for subscription in stored - current:
+            self.engine.add(subscription)
+        self._version = version
+
+    async def _persist(self, subscription: Subscription, removed: bool = False):
+        if self.store is None:
+            return
+        try:
+            if removed:
+                version = await self.store.delete(subscription)
+            else:
+                version = await self.store.save(subscription)
+        except Exception as e:
+            logger.warning("Abo %s konnte nicht gespeichert werden: %s", subscription, e)
+            # Beim nächsten Abgleich neu laden, damit die Engine dem Speicher entspricht
+            self._version = None
+            return
+        # Nur die eigene Änderung seit dem letzten Abgleich: die Engine ist schon aktuell
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+
+    async def _is_leader(self) -> bool:
+        if self.lease is None:
+            return True
+        try:
+            return await self.lease.acquire()
+        except Exception as e:
+            # Ohne gemeinsamen Zustand lieber doppelt als gar nicht alarmieren
+            logger.warning("Lease %s nicht verfügbar: %s", self.lease.key, e)
+            return True
+
+    @staticmethod
+    def _delivered(chat_id: int, future: asyncio.Future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error("Alarm an %s nicht zugestellt: %s", chat_id, error)
+
+    async def on_spots(self, changes: SpotChanges):
+        """
+        Consumer for the spot poller: sends one alert message per chat with all new matching spots.
+        """
+        # Die Lease bei jedem Abruf erneuern, auch ohne neue Spots
+        if not await self._is_leader():
+            return
+        if not changes.new:
+            return
+        await self.sync()
+        if len(self.engine) == 0:
+            return
+        for chat_id, spots in self.match(changes.new).items():
+            text = "<b>🔔 Neue POTA-Spots:</b>\n" + "".join(
+                f"<b>{html.escape(spot.activator)}</b> @ {html.escape(spot.reference)} ({html.escape(spot.park_name)})"
+                f" - {html.escape(spot.frequency)} kHz {html.escape(spot.mode)}\n"
+                for spot in spots)
+            if self.outbound is not None:
+                # Nicht warten, der Scheduler fasst Alarme zusammen und hält die Limits ein
+                future = self.outbound.enqueue(chat_id, text, BULK, parse_mode=ParseMode.HTML)
+                future.add_done_callback(lambda f, chat_id=chat_id: self._delivered(chat_id, f))
+                self.alerts_sent += 1
+                continue
+            try:
+                await self.app.bot.send_message(chat_id=chat_id, text=text, parse_mode=ParseMode.HTML)
+                self.alerts_sent += 1
+            except Exception as e:
+                logger.error("Fehler beim Senden des Alarms an %s: %s", chat_id, e)
+
+    async def subscribe_cmd(self, update: Update, context: CallbackContext):
+        if len(context.args) < 2:
+            await reply(self.outbound, update,
+                "Bitte gib Art und Wert an, z.B.\n"
+                "/pota_subscribe call DK8YS\n"
+                "/pota_subscribe ref DE-0693\n"
+                "/pota_subscribe prefix DE-BY\n"
+                "/pota_subscribe grid JN39 50")
+            return
+
+        chat_id = update.effective_chat.id
+        try:
+            radius = float(context.args[2]) if len(context.args) > 2 else 50.0
+            subscription = self.engine.create(chat_id, context.args[0], context.args[1], radius)
+        except ValueError as e:
+            await reply(self.outbound, update, f"Ungültiges Abo: {e}")
+            return
+
+        await self.sync()
+        if len(self.engine.subscriptions(chat_id)) >= self.max_subscriptions:
+            await reply(self.outbound, update, f"Maximal {self.max_subscriptions} Abos pro Chat möglich.")
+            return
+
+        if self.engine.add(subscription):
+            await self._persist(subscription)
+            await reply(self.outbound, update, f"Abo hinzugefügt: {subscription}")
+        else:
+            await reply(self.outbound, update, f"Abo existiert bereits: {subscription}")
+
+    async def unsubscribe_cmd(self, update: Update, context: CallbackContext):
+        chat_id = update.effective_chat.id
+        await self.sync()
+        if context.args and context.args[0].lower() == "all":
+            subscriptions = self.engine.subscriptions(chat_id)
+            for subscription in subscriptions:
+                self.engine.remove(subscription)
+                await self._persist(subscription, removed=True)
+            await reply(self.outbound, update, f"{len(subscriptions)} Abos entfernt.")
+            return
+
+        if len(context.args) < 2:
+            await reply(self.outbound, update, "Bitte gib Art und Wert an, z.B. /pota_unsubscribe call DK8YS oder /pota_unsubscribe all")
+            return
+
+        try:
+            # Der Radius ist optional, ohne Angabe werden alle Abos des Grids entfernt
+            radius = float(context.args[2]) if len(context.args) > 2 else None
+            target = self.engine.create(chat_id, context.args[0], context.args[1], radius or 1.0)
+        except ValueError as e:
+            await reply(self.outbound, update, f"Ungültiges Abo: {e}")
+            return
+
+        matches = [s for s in self.engine.subscriptions(chat_id)
+                   if s.kind == target.kind and s.value == target.value and (radius is None or s.radius == target.radius)]
+        for subscription in matches:
+            self.engine.remove(subscription)
+            await self._persist(subscription, removed=True)
+        await reply(self.outbound, update, f"{len(matches)} Abos entfernt." if matches else "Kein passendes Abo gefunden.")
+
+    async def subscriptions_cmd(self, update: Update, context: CallbackContext):
+        await self.sync()
+        subscriptions = self.engine.subscriptions(update.effective_chat.id)
+        if not subscriptions:
+            await reply(self.outbound, update, f"Keine Abos vorhanden. Arten: {', '.join(KINDS)}")
+            return
+        await reply(self.outbound, update, "Deine Abos:\n" + "\n".join(str(s) for s in subscriptions))
@@ -21,77 +21,108 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import asyncio
 import logging
-import requests
+from programs.api import UpstreamAPI
+from programs.bulkhead import Bulkhead
+from programs.cache import ResponseCache
 from programs.pota.park import Park
 from programs.pota.profile import POTAProfile
+from programs.upstream import UpstreamPool, UpstreamStatusError
 
 logger = logging.getLogger(__name__)
 
-class POTAAPI:
-    def __init__(self, base_url: str = "https://api.pota.app"):
-        """Initialize the API client with a base URL."""
-        self.base_url = base_url
+class POTAAPI(UpstreamAPI):
+    def __init__(self, upstream: UpstreamPool, base_url: str = "https://api.pota.app", cache: ResponseCache = None,
+                 bulkhead: Bulkhead = None):
+        """Initialize the API client with the shared upstream pool, a base URL, an optional cache and the budget of the program."""
+        super().__init__(upstream, base_url, cache, bulkhead)
 
-    def get_park(self, park_reference: str) -> Park:
-        """Fetch details of a specific park by its reference."""
+    async def get_park(self, park_reference: str) -> Park:
+        """Fetch details of a specific park by its reference. Returns None if the park is unknown."""
+        return await self._lookup("pota.park", park_reference.upper(), lambda: self._fetch_park(park_reference))
+
+    async def _fetch_park(self, park_reference: str) -> Park:
         url = f"{self.base_url}/park/{park_reference}"
         logger.debug(f"Fetching park data from {url} for reference {park_reference}")
-        response = requests.get(url)
+        response = await self.upstream.get(url)
 
+        if response.status_code == 404:
+            logger.debug("Not found: %s", url)
+            return None
         if response.status_code != 200:
-            err = f"Error fetching park data: {response.status_code} - {response.text}"
-            logger.error(err)
+            logger.error(f"Error fetching park data: {response.status_code} - {response.text}")
+            raise UpstreamStatusError(url, response.status_code)
+        return self.parse_park(response.json())
+
+    async def get_parks_by_grid(self, grid: str) -> list[Park]:
+        """Fetch the parks surrounding a Maidenhead grid. Returns None if the grid is unknown."""
+        return await self._lookup("pota.grid", grid.upper(), lambda: self._fetch_parks_by_grid(grid))
+
+    async def _fetch_parks_by_grid(self, grid: str) -> list[Park]:
+        url = f"{self.base_url}/park/grid/{grid}"
+        logger.debug(f"Fetching parks from {url} for grid {grid}")
+        response = await self.upstream.get(url)
+
+        if response.status_code == 404:
+            logger.debug("Not found: %s", url)
             return None
-        data = response.json()
-
-        return Park(data['reference'],
-                    data['name'],
-                    (data['latitude'],
-                    data['longitude']),
-                    data['grid4'],
-                    data['grid6'],
-                    data['firstActivator'],
-                    data['firstActivationDate'],
-                    bool(data['active']),
-                    data['parktypeDesc'],)
-
-    def get_profile(self, callsign: str) -> POTAProfile:
-        """Fetch the profile of a specific callsign."""
+        if response.status_code != 200:
+            logger.error(f"Error fetching parks for grid: {response.status_code} - {response.text}")
+            raise UpstreamStatusError(url, response.status_code)
+        return self.parse_parks(response.json())
+
+    async def get_profile(self, callsign: str) -> POTAProfile:
+        """Fetch the profile of a specific callsign. Returns None if the callsign is unknown."""
+        return await self._lookup("pota.profile", callsign.upper(), lambda: self._fetch_profile(callsign))
+
+    async def _fetch_profile(self, callsign: str) -> POTAProfile:
         url = f"{self.base_url}/profile/{callsign}"
         logger.debug(f"Fetching profile data from {url} for callsign {callsign}")
-        response = requests.get(url)
+        response = await self.upstream.get(url)
 
+        if response.status_code == 404:
+            logger.debug("Not found: %s", url)
+            return None
         if response.status_code != 200:
-            err = f"Error fetching profile data: {response.status_code} - {response.text}"
-            logger.error(err)
-            raise Exception(err)
-        data = response.json()
-
-    # fetching references first
-        references: list[Park] = []
-        for activation in data['recent_activity']['activations']:
-            references.append(Park(activation['reference'], activation['park'], (0.0, 0.0), "", "", "", "", True, ""))
-
-        return POTAProfile(
-            data['callsign'],
-            references,
-            data['stats']['activator']['parks'],
-            data['stats']['activator']['activations'],
-            data['stats']['activator']['qsos'],
-            data['stats']['attempts']['parks'],
-            data['stats']['attempts']['activations'],
-            data['stats']['attempts']['qsos'],
-            data['stats']['hunter']['parks'],
-            data['stats']['hunter']['qsos'])
+            logger.error(f"Error fetching profile data: {response.status_code} - {response.text}")
+            raise UpstreamStatusError(url, response.status_code)
+        return self.parse_profile(response.json())
+
+    @staticmethod
+    def parse_park(data: dict) -> Park:
+        """Build a park from the answer of the /park endpoint."""
+        return Park.from_api(data)
+
+    @staticmethod
+    def parse_parks(data) -> list[Park]:
+        """Build the parks from the answer of the /park/grid endpoint."""
+        # The endpoint answers either with GeoJSON or with a plain list
+        if isinstance(data, dict) and "features" in data:
+            parks: list[Park] = []
+            for feature in data["features"]:
+                lon, lat = feature["geometry"]["coordinates"][:2]
+                parks.append(Park.from_api(feature["properties"], (lat, lon)))
+            return parks
+        return [Park.from_api(park) for park in data or ()]
+
+    @staticmethod
+    def parse_profile(data: dict) -> POTAProfile:
+        """Build a profile from the answer of the /profile endpoint."""
+        return POTAProfile.from_api(data)
 
 if __name__ == "__main__":
     # Example usage
-    api = POTAAPI()
-    try:
-        park = api.get_park("DE-0693")
-        profile = api.get_profile("DK8YS")
-        print(park)
-        print(profile)
-    except Exception as e:
-        print(f"Failed to fetch park: {e}")
+    async def main():
+        upstream = UpstreamPool()
+        api = POTAAPI(upstream, cache=ResponseCache())
+        try:
+            park, profile = await asyncio.gather(api.get_park("DE-0693"), api.get_profile("DK8YS"))
+            print(park)
+            print(profile)
+        except Exception as e:
+            print(f"Failed to fetch park: {e}")
+        finally:
+            await upstream.aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+#
+# catalog.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import csv
+import io
+import logging
+from programs.catalog import ReferenceCatalog
+from programs.pota.park import Park
+
+logger = logging.getLogger(__name__)
+
+class ParkCatalog(ReferenceCatalog):
+    """
+    Local copy of all POTA parks, built from the park list published by pota.app.
+    """
+    reference_type = Park
+
+    def parse(self, text: str) -> list[Park]:
+        """
+        Parses the CSV park list (reference, name, active, entityId, locationDesc, latitude, longitude, grid).
+        """
+        parks: list[Park] = []
+        for row in csv.DictReader(io.StringIO(text)):
+            try:
+                coordinates = (float(row["latitude"]), float(row["longitude"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+            grid = row.get("grid") or ""
+            parks.append(Park(row["reference"],
+                              row["name"],
+                              coordinates,
+                              grid[:4],
+                              grid,
+                              "",
+                              "",
+                              row.get("active") == "1",
+                              "",
+                              row.get("locationDesc") or ""))
+        logger.debug("%d Parks aus dem Katalog gelesen", len(parks))
+        return parks
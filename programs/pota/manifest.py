@@ -0,0 +1,35 @@
+#
+# manifest.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from programs.lazy import ProgramManifest
+
+MANIFEST = ProgramManifest("POTA", "programs.pota.pota", "POTA", {
+    "pota_profile": "Zeigt das POTA-Profil eines oder mehrerer Rufzeichen an.",
+    "pota_park": "Zeigt Informationen zu einem oder mehreren POTA-Parks an.",
+    "pota_parks_range": "Zeigt Parks in der Nähe eines Grids an, mit 'karte' zusätzlich als Karte.",
+    "pota_search": "Sucht Parks nach Name oder Region, auch mit Tippfehlern.",
+    "pota_spots": "Zeigt aktuelle POTA-Spots an, optional gefiltert nach Rufzeichen oder Referenz.",
+    "pota_subscribe": "Abonniert Spot-Alarme für Rufzeichen, Referenz, Präfix oder Grid.",
+    "pota_unsubscribe": "Entfernt Spot-Abos.",
+    "pota_subscriptions": "Zeigt deine Spot-Abos an.",
+}, inline=True)
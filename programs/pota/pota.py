@@ -21,43 +21,128 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import requests
+import asyncio
+import html
 import logging
-from telegram import Update
+import os
+import httpx
+from telegram import InlineQueryResultArticle, InputTextMessageContent, Update
 from telegram.ext import Application, CallbackContext
 from telegram.constants import ParseMode
 from config import Config
-from programs.pota import POTAAPI, Park, POTAProfile
+from programs.pota import POTAAPI, Park, POTAProfile, SpotPoller
+from programs.pota.alerts import SpotAlerts
+from programs.bulkhead import Bulkhead
+from programs.cache import ResponseCache
+from programs.catalog import CatalogDiff, ReferenceSnapshot
+from programs.pota.catalog import ParkCatalog
+from programs.pota.manifest import MANIFEST
+from programs.maps import MapRenderer, split_map_option
+from programs.outbound import OutboundScheduler
+from programs.prefix_index import PrefixIndex
 from programs.program import Program
+from programs.state import Lease, StateBackend
+from programs.subscriptions import SubscriptionStore
+from programs.trigram_index import TrigramIndex
+from programs.upstream import UpstreamError, UpstreamPool
 import util
 
 logger = logging.getLogger(__name__)
 
+# Anzahl der Parks, die zwischen zwei Durchläufen der Event-Loop in den Trigrammindex übernommen werden
+FUZZY_BATCH = 500
+
 class POTA(Program):
-    def __init__(self, app: Application, config: Config):
-        super().__init__(app)
+    def __init__(self, app: Application, config: Config, upstream: UpstreamPool, cache: ResponseCache = None,
+                 outbound: OutboundScheduler = None, maps: MapRenderer = None, state: StateBackend = None):
+        super().__init__(app, outbound, maps, Bulkhead.from_config(config, MANIFEST.name.lower()))
         self.config = config
-        self.api = POTAAPI()
+        self.api = POTAAPI(upstream, cache=cache, bulkhead=self.bulkhead)
+        self.catalog = ParkCatalog(upstream,
+                                   config.pota_catalog_url,
+                                   os.path.join(config.data_dir, "pota_parks.refs"),
+                                   config.pota_catalog_max_age)
+        # Präfixindex für Inline-Anfragen, wird nach jedem Katalog-Update im Hintergrund neu gebaut
+        self.search: tuple[ReferenceSnapshot, PrefixIndex] = (None, None)
+        self._index_task: asyncio.Task = None
+        # Trigrammindex für /pota_search, wird mit den Änderungen jedes Katalog-Updates fortgeschrieben
+        self.fuzzy = TrigramIndex()
+        self._fuzzy_lock = asyncio.Lock()
+        self._fuzzy_task: asyncio.Task = None
+        self.catalog.add_listener(self._on_catalog)
+        self.spots = SpotPoller(upstream)
+        # Mit gemeinsamem Zustand sehen alle Instanzen dieselben Abos, alarmiert wird nur von einer
+        store = SubscriptionStore(state, "pota:subscriptions") if state is not None else None
+        lease = Lease(state, "pota_alerts", 3 * config.pota_spot_interval) if state is not None else None
+        self.alerts = SpotAlerts(app, config.pota_max_subscriptions, config.pota_alert_cooldown, outbound, store, lease)
+        self.spots.add_consumer(self.alerts.on_spots)
 
         logger.debug("Initialisiere POTA Modul")
-        self.register_handler("pota_profile", self._pota_profile_cmd, "Zeigt das POTA-Profil eines Benutzers an.")
-        self.register_handler("pota_park", self._pota_park_cmd, "Zeigt Informationen zu einem POTA-Park an.")
-        self.register_handler("pota_parks_range", self._pota_parks_range_cmd, "Zeigt Parks in der Nähe eines Grids an.")
+        self.register_handler("pota_profile", self._pota_profile_cmd, MANIFEST.commands["pota_profile"])
+        self.register_handler("pota_park", self._pota_park_cmd, MANIFEST.commands["pota_park"])
+        self.register_handler("pota_parks_range", self._pota_parks_range_cmd, MANIFEST.commands["pota_parks_range"])
+        self.register_handler("pota_search", self._pota_search_cmd, MANIFEST.commands["pota_search"])
+        self.register_handler("pota_spots", self._pota_spots_cmd, MANIFEST.commands["pota_spots"])
+        self.register_handler("pota_subscribe", self.alerts.subscribe_cmd, MANIFEST.commands["pota_subscribe"])
+        self.register_handler("pota_unsubscribe", self.alerts.unsubscribe_cmd, MANIFEST.commands["pota_unsubscribe"])
+        self.register_handler("pota_subscriptions", self.alerts.subscriptions_cmd, MANIFEST.commands["pota_subscriptions"])
+        self.register_inline_handler(self._inline_query)
+        self.run_repeating(self._sync_catalog_job, config.pota_catalog_interval, name="pota_catalog")
+        self.run_repeating(self._poll_spots_job, config.pota_spot_interval, name="pota_spots")
 
     def get_config(self):
         return self.config
 
-    async def _pota_profile_cmd(self, update: Update, context: CallbackContext):
-        if not context.args:
-            await update.message.reply_text("Bitte gib dein Rufzeichen an, z.B. /pota_profile DL1XYZ")
-            return
-        logger.debug("POTA Profil Befehl aufgerufen mit Rufzeichen: %s, von Benutzer: %s", context.args[0], update.message.from_user.username)
-        callsign = context.args[0]
+    async def _sync_catalog_job(self, context: CallbackContext):
+        await self.catalog.refresh(self.config.pota_catalog_interval)
+
+    async def _poll_spots_job(self, context: CallbackContext):
+        await self.spots.poll()
 
-        profile = self.api.get_profile(callsign)
+    def _on_catalog(self, diff: CatalogDiff, snapshot: ReferenceSnapshot):
+        loop = asyncio.get_running_loop()
+        self._index_task = loop.create_task(self._build_index(snapshot))
+        self._fuzzy_task = loop.create_task(self._update_fuzzy(diff, snapshot))
 
-        await update.message.reply_text(
-            f"POTA Profil für: <i>{callsign.upper()}</i>\n"
+    async def _build_index(self, snapshot: ReferenceSnapshot):
+        index = await asyncio.to_thread(lambda: PrefixIndex(snapshot.names, snapshot.column("description")))
+        # Nur übernehmen, wenn inzwischen kein neuerer Katalog geladen wurde
+        if snapshot is self.catalog.snapshot:
+            self.search = (snapshot, index)
+            logger.info("Suchindex für %d Parks gebaut", len(index))
+
+    async def _update_fuzzy(self, diff: CatalogDiff, snapshot: ReferenceSnapshot):
+        async with self._fuzzy_lock:
+            if len(self.fuzzy) == 0:
+                # Erster Aufbau im Thread auf einem neuen Index, der erst danach sichtbar wird
+                def build():
+                    index = TrigramIndex()
+                    for name, description, location in zip(snapshot.names, snapshot.column("description"),
+                                                           snapshot.column("location")):
+                        index.add(name, f"{description} {location}")
+                    index.compact()
+                    return index
+                self.fuzzy = await asyncio.to_thread(build)
+            else:
+                for name in diff.removed:
+                    self.fuzzy.remove(name)
+                changed = diff.added + diff.changed
+                for start in range(0, len(changed), FUZZY_BATCH):
+                    for name in changed[start:start + FUZZY_BATCH]:
+                        park = snapshot.get(name)
+                        self.fuzzy.add(name, f"{park.description} {park.location}")
+                    # Zwischen den Blöcken andere Updates bearbeiten
+                    await asyncio.sleep(0)
+                self.fuzzy.compact()
+            logger.info("Trigrammindex aktualisiert: %d Parks (%s)", len(self.fuzzy), diff)
+
+    @staticmethod
+    def render_profile(callsign: str, profile: POTAProfile) -> str:
+        """
+        Renders the HTML answer of /pota_profile.
+        """
+        return (
+            f"POTA Profil für: <i>{html.escape(callsign.upper())}</i>\n"
             f"\n"
             f"<b>Aktivierer:</b>\n"
             f"🗺️ Parks: {profile.activator_sucessful_parks} / {profile.activator_attempted_parks}\n"
@@ -69,80 +154,185 @@ class POTA(Program):
             f"📡 QSOs: {profile.hunter_qsos}\n"
             f"\n"
             f"<b>Letzte 10 Aktivitäten:</b>\n"
-            f"{''.join([f"{ref.name} - {ref.description}\n" for ref in profile.references])}", parse_mode=ParseMode.HTML)
+            f"{''.join([f"{html.escape(ref.name)} - {html.escape(ref.description)}\n" for ref in profile.references])}")
+
+    async def _pota_profile_cmd(self, update: Update, context: CallbackContext):
+        if not context.args:
+            await self.reply(update, "Bitte gib dein Rufzeichen an, z.B. /pota_profile DL1XYZ")
+            return
+        logger.debug("POTA Profil Befehl aufgerufen mit Rufzeichen: %s, von Benutzer: %s", " ".join(context.args), update.message.from_user.username)
+
+        # Mehrere Rufzeichen werden gleichzeitig abgefragt und in einer Antwort zusammengefasst
+        await self.reply_many(update, context.args, self.api.get_profile, self._render_profile_result,
+                              self.config.lookup_concurrency, self.config.lookup_max_keys, parse_mode=ParseMode.HTML)
+
+    def _render_profile_result(self, callsign: str, profile) -> str:
+        if isinstance(profile, Exception):
+            return f"Fehler beim Abrufen des POTA-Profils ({html.escape(callsign)})"
+        if profile is None:
+            return f"Rufzeichen <i>{html.escape(callsign)}</i> nicht gefunden."
+        return self.render_profile(callsign, profile)
 
     async def _pota_park_cmd(self, update: Update, context: CallbackContext):
         if not context.args:
-            await update.message.reply_text("Bitte gib die Parkreferenz an, z.B. /pota_park DE-0693")
+            await self.reply(update, "Bitte gib die Parkreferenz an, z.B. /pota_park DE-0693")
             return
 
-        logger.debug("POTA Park Befehl aufgerufen mit Parkreferenz: %s, von Benutzer: %s", context.args[0], update.message.from_user.username)
-        park_reference = context.args[0].upper()
-        park = self.api.get_park(park_reference)
+        logger.debug("POTA Park Befehl aufgerufen mit Parkreferenzen: %s, von Benutzer: %s", " ".join(context.args), update.message.from_user.username)
+        await self.reply_many(update, context.args, self.api.get_park, self._render_park_result,
+                              self.config.lookup_concurrency, self.config.lookup_max_keys, parse_mode=ParseMode.HTML)
 
-        if not park:
-            await update.message.reply_text(f"Fehler beim Abrufen des POTA-Parks ({park_reference})")
+    def _render_park_result(self, park_reference: str, park) -> str:
+        if isinstance(park, Exception):
+            return f"Fehler beim Abrufen des POTA-Parks ({html.escape(park_reference)})"
+        if park is None:
+            return f"Park <i>{html.escape(park_reference)}</i> nicht gefunden."
+        return self.render_park(park)
+
+    @staticmethod
+    def render_park(park: Park) -> str:
+        """
+        Renders the HTML answer of /pota_park. Fields missing in the catalog are left out.
+        """
+        text = (f"Park: <b>{html.escape(park.name)} - {html.escape(park.description)}</b>\n"
+                f"Aktiv: {'Ja' if park.active else 'Nein'}\n"
+                f"Grid: {html.escape(park.grid6)}\n"
+                f"Koordinaten: {park.coordinates[0]}, {park.coordinates[1]}"
+                # f"\nRegion: {park.locationDesc} - {park.locationName}"
+                )
+        if park.park_type:
+            text += f"\nPark-Typ: {html.escape(park.park_type)}"
+        if park.first_activator:
+            text += f"\nErstaktivierung: {html.escape(park.first_activator)} am {html.escape(park.first_activation_date)}"
+        return text
+
+    async def _inline_query(self, update: Update, context: CallbackContext):
+        query = update.inline_query.query
+        snapshot, index = self.search
+        if index is None or not query.strip():
+            await update.inline_query.answer([], cache_time=self.config.pota_inline_cache_time)
             return
 
-        await update.message.reply_text(
-            f"Park: <b>{park.name} - {park.description}</b>\n"
-            f"Aktiv: {'Ja' if park.active else 'Nein'}\n"
-            f"Grid: {park.grid6}\n"
-            f"Koordinaten: {park.coordinates[0]}, {park.coordinates[1]}\n"
-            # f"Region: {park.locationDesc} - {park.locationName}\n"
-            f"Park-Typ: {park.park_type}\n"
-            f"Erstaktivierung: {park.first_activator} am {park.first_activation_date}", parse_mode=ParseMode.HTML)
+        # Telegram erlaubt höchstens 50 Ergebnisse je Antwort
+        parks = [snapshot.reference(i) for i in index.search(query, min(self.config.pota_inline_results, 50))]
+        await update.inline_query.answer(
+            [InlineQueryResultArticle(park.name,
+                                      f"{park.name} - {park.description}",
+                                      InputTextMessageContent(self.render_park(park), parse_mode=ParseMode.HTML),
+                                      description=f"{park.grid6} {'aktiv' if park.active else 'inaktiv'}")
+             for park in parks],
+            cache_time=self.config.pota_inline_cache_time)
 
 # /pota_parks_range
     async def _pota_parks_range_cmd(self, update: Update, context: CallbackContext):
-        if not context.args:
-            await update.message.reply_text("Bitte gib dein 6-stelliges Grid an, z.B. /pota_parks_range JN39mf")
+        args, with_map = split_map_option(context.args or [])
+        if not args:
+            await self.reply(update, "Bitte gib dein Grid (4 bis 10 Zeichen) an, z.B. /pota_parks_range JN39mf")
             return
 
-        logger.debug("POTA Parks Range Befehl aufgerufen mit Grid: %s, von Benutzer: %s", context.args[0], update.message.from_user.username)
+        logger.debug("POTA Parks Range Befehl aufgerufen mit Grid: %s, von Benutzer: %s", args[0], update.message.from_user.username)
 
-        grid = context.args[0].upper()
-        lat1, lon1 = util.maidenhead_locator_to_latlon(grid)
+        grid = args[0].upper()
+        try:
+            lat1, lon1 = util.maidenhead_locator_to_latlon(grid)
+        except ValueError:
+            await self.reply(update, f"Ungültiges Grid: {grid}")
+            return
 
         # Default auf 50 km setzen, wenn kein Bereich angegeben ist
-        range = int(context.args[1]) if len(context.args) > 1 else int(self.config.pota_default_range)
+        try:
+            range = util.parse_range(args[1], self.config.pota_max_range) if len(args) > 1 else int(self.config.pota_default_range)
+        except ValueError:
+            await self.reply(update, f"Ungültiger Bereich: {args[1]}. Bitte gib den Bereich in km (1 bis {self.config.pota_max_range}) an, "
+                                     f"z.B. /pota_parks_range JN39mf 50")
+            return
 
-        url = f"https://api.pota.app/park/grid/{grid}"
-        response = requests.get(url)
+        if self.catalog.is_fresh:
+            # Lokaler Katalog vorhanden, Abfrage ohne Upstream-Aufruf beantworten
+            nearest = self.catalog.snapshot.within(lat1, lon1, range, self.config.pota_max_parks)
+        else:
+            nearest = await self._parks_range_from_api(grid, lat1, lon1, range)
+            if nearest is None:
+                await self.reply(update, f"Fehler beim Abrufen der umgebenden Parks ({grid})")
+                return
 
-        if response.status_code != 200:
-            await update.message.reply_text(f"Fehler beim Abrufen der umgebenden Parks ({response.status_code})")
+        if len(nearest) == 0:
+            await self.reply(update, "Keine Parks im angegebenen Bereich gefunden.")
             return
+        
+        await self.reply(update, self.render_parks_range(grid, range, nearest), parse_mode=ParseMode.HTML)
+        if with_map:
+            await self.reply_map(update, f"Parks im Bereich von {grid} ({range} km)", lat1, lon1, range, nearest)
+
+    @staticmethod
+    def render_parks_range(grid: str, range: int, nearest: list[tuple[Park, float]]) -> str:
+        """
+        Renders the HTML answer of /pota_parks_range.
+        """
+        parks_info = [f"{html.escape(park.name)} - {html.escape(park.description)} - {dist:.1f} km\n" for park, dist in nearest]
+        return f"Parks im Bereich von {grid} ({range}km):\n{''.join(parks_info)}"
+
+    async def _parks_range_from_api(self, grid: str, lat1: float, lon1: float, range: int) -> list[tuple[Park, float]]:
+        try:
+            parks = await self.api.get_parks_by_grid(grid)
+        except (UpstreamError, httpx.HTTPError) as e:
+            logger.error("Fehler beim Abrufen der Parks um %s: %s", grid, e)
+            return None
 
-        data = response.json()
+        if parks is None:
+            return None
 
-        if not data:
-            await update.message.reply_text("Keine Parks im angegebenen Bereich gefunden.")
+        # Die nächsten Parks innerhalb des Bereichs, begrenzt auf pota_max_parks
+        distances = util.haversine_distances(lat1, lon1,
+                                             [park.coordinates[0] for park in parks],
+                                             [park.coordinates[1] for park in parks])
+        nearest = util.nearest_k(distances, self.config.pota_max_parks, range)
+        return [(parks[i], float(distances[i])) for i in nearest]
+
+    async def _pota_search_cmd(self, update: Update, context: CallbackContext):
+        if not context.args:
+            await self.reply(update, "Bitte gib einen Parknamen oder eine Region an, z.B. /pota_search Bliesgau")
             return
 
-        parks_info = []
+        query = " ".join(context.args)
+        logger.debug("POTA Suche aufgerufen mit: %s, von Benutzer: %s", query, update.message.from_user.username)
+        if len(self.fuzzy) == 0:
+            await self.reply(update, "Die Parkliste ist noch nicht geladen, bitte versuche es später erneut.")
+            return
 
-        # Unterschiedliche Ausgabeformate behandeln
-        if "features" in data:
-            for park in data["features"]:
-                dist = util.haversine_distance(lat1, lon1, park["geometry"]["coordinates"][1], park["geometry"]["coordinates"][0])
-                if dist <= range:
-                    parks_info.append(f"{park['properties']['reference']} - {park['properties']['name']} - {dist:.1f} km\n")
-                if len(parks_info) >= self.config.pota_max_parks:  # Begrenze die Anzahl der Parks auf 25
-                    break
-        else:
-            for park in data:
-                dist = util.haversine_distance(lat1, lon1, park["latitude"], park["longitude"])
-                if dist <= range:
-                    parks_info.append(f"{park['reference']} - {park['name']} - {dist:.1f} km\n")
-                if len(parks_info) >= self.config.pota_max_parks:  # Begrenze die Anzahl der Parks auf 25
-                    break
-
-        sorted_distances = sorted(parks_info, key=lambda x: float(x.split('-')[-1].split()[0]))
-        parks_info = sorted_distances
-
-        if len(parks_info) == 0:
-            await update.message.reply_text("Keine Parks im angegebenen Bereich gefunden.")
+        snapshot = self.catalog.snapshot
+        parks = [park for park in (snapshot.get(name) for name, _ in self.fuzzy.search(query, self.config.pota_search_results))
+                 if park is not None]
+        if not parks:
+            await self.reply(update, "Keine passenden Parks gefunden.")
             return
-        
-        await update.message.reply_text(f"Parks im Bereich von {grid} ({range}km):\n{''.join(parks_info)}", parse_mode=ParseMode.HTML)
\ No newline at end of file
+
+        await self.reply(update, self.render_search(query, parks), parse_mode=ParseMode.HTML)
+
+    @staticmethod
+    def render_search(query: str, parks: list[Park]) -> str:
+        """
+        Renders the HTML answer of /pota_search.
+        """
+        lines = [f"{html.escape(park.name)} - {html.escape(park.description)}"
+                 f"{f' ({html.escape(park.location)})' if park.location else ''}\n" for park in parks]
+        return f"Parks zu <i>{html.escape(query)}</i>:\n{''.join(lines)}"
+
+    async def _pota_spots_cmd(self, update: Update, context: CallbackContext):
+        logger.debug("POTA Spots Befehl aufgerufen von Benutzer: %s", update.message.from_user.username)
+        prefix = context.args[0].upper() if context.args else ""
+
+        # Neueste Spots zuerst, Antwort ausschließlich aus der lokalen Spot-Tabelle
+        spots = sorted((spot for spot in self.spots.spots.values()
+                        if spot.activator.upper().startswith(prefix) or spot.reference.upper().startswith(prefix)),
+                       key=lambda spot: spot.spot_time, reverse=True)[:self.config.pota_max_spots]
+
+        if not spots:
+            await self.reply(update, "Keine aktuellen Spots gefunden.")
+            return
+
+        await self.reply(update,
+            "<b>Aktuelle POTA-Spots:</b>\n" +
+            "".join(f"{spot.spot_time[11:16]} <b>{html.escape(spot.activator)}</b> @ {html.escape(spot.reference)}"
+                    f" - {html.escape(spot.frequency)} kHz {html.escape(spot.mode)}\n"
+                    for spot in spots), parse_mode=ParseMode.HTML)
@@ -0,0 +1,64 @@
+#
+# spot.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from dataclasses import dataclass
+
+@dataclass
+class Spot:
+    """
+    Represents a POTA activator spot.
+    """
+    spot_id: int
+    activator: str
+    frequency: str
+    mode: str
+    reference: str
+    park_name: str
+    spot_time: str
+    spotter: str
+    comments: str
+    location: str
+    grid: str
+    coordinates: tuple[float, float]
+
+    def __str__(self):
+        return f"{self.activator} @ {self.reference} ({self.park_name}) {self.frequency} kHz {self.mode} " \
+               f"by {self.spotter} at {self.spot_time}: {self.comments}"
+
+    def to_dict(self):
+        """
+        Converts the spot to a dictionary format.
+        """
+        return {
+            "spot_id": self.spot_id,
+            "activator": self.activator,
+            "frequency": self.frequency,
+            "mode": self.mode,
+            "reference": self.reference,
+            "park_name": self.park_name,
+            "spot_time": self.spot_time,
+            "spotter": self.spotter,
+            "comments": self.comments,
+            "location": self.location,
+            "grid": self.grid,
+            "coordinates": self.coordinates
+        }
@@ -0,0 +1,152 @@
+#
+# spots.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import inspect
+import logging
+from dataclasses import dataclass, field
+from typing import Callable
+import httpx
+from programs.pota.spot import Spot
+from programs.upstream import UpstreamError, UpstreamPool
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SpotChanges:
+    """
+    Changes of the spot table in one poll cycle.
+    """
+    new: list[Spot] = field(default_factory=list)
+    changed: list[Spot] = field(default_factory=list)
+    expired: list[Spot] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.new or self.changed or self.expired)
+
+    def __str__(self):
+        return f"+{len(self.new)} ~{len(self.changed)} -{len(self.expired)}"
+
+def _parse_spot(data: dict) -> Spot:
+    try:
+        coordinates = (float(data['latitude']), float(data['longitude']))
+    except (KeyError, TypeError, ValueError):
+        coordinates = (0.0, 0.0)
+    return Spot(int(data['spotId']),
+                data.get('activator') or "",
+                str(data.get('frequency') or ""),
+                data.get('mode') or "",
+                data.get('reference') or "",
+                data.get('parkName') or data.get('name') or "",
+                data.get('spotTime') or "",
+                data.get('spotter') or "",
+                data.get('comments') or "",
+                data.get('locationDesc') or "",
+                data.get('grid6') or data.get('grid4') or "",
+                coordinates)
+
+class SpotPoller:
+    """
+    Polls the POTA activator spot list and keeps a table of the current spots by spot id.
+    Uses conditional requests, so unchanged lists cost neither a download nor parsing, and
+    only builds Spot objects for new or changed entries. Consumers receive only the changes.
+    """
+    def __init__(self, upstream: UpstreamPool, url: str = "https://api.pota.app/spot/activator"):
+        self.upstream = upstream
+        self.url = url
+        self.spots: dict[int, Spot] = {}
+        self._raw: dict[int, dict] = {}
+        self._etag: str = None
+        self._last_modified: str = None
+        self._consumers: list[Callable[[SpotChanges], None]] = []
+        self.polls = 0
+        self.not_modified = 0
+
+    def add_consumer(self, consumer: Callable[[SpotChanges], None]):
+        """
+        Registers a function or coroutine function that receives the changes of every poll cycle.
+        """
+        self._consumers.append(consumer)
+
+    async def poll(self) -> SpotChanges:
+        """
+        Fetches the spot list once, updates the table and notifies the consumers.
+        """
+        self.polls += 1
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+
+        try:
+            response = await self.upstream.get(self.url, headers=headers)
+        except (UpstreamError, httpx.HTTPError) as e:
+            logger.error("Fehler beim Abrufen der Spots: %s", e)
+            return SpotChanges()
+        if response.status_code == 304:
+            self.not_modified += 1
+            return SpotChanges()
+        if response.status_code != 200:
+            logger.error("Fehler beim Abrufen der Spots: %s", response.status_code)
+            return SpotChanges()
+
+        self._etag = response.headers.get("ETag")
+        self._last_modified = response.headers.get("Last-Modified")
+        changes = self.apply(response.json())
+        if changes:
+            logger.debug("Spots aktualisiert: %s", changes)
+            await self._notify(changes)
+        return changes
+
+    def apply(self, data: list[dict]) -> SpotChanges:
+        """
+        Applies a full spot list to the table and returns the differences.
+        """
+        changes = SpotChanges()
+        raw: dict[int, dict] = {}
+        for entry in data:
+            try:
+                spot_id = int(entry['spotId'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            raw[spot_id] = entry
+            previous = self._raw.get(spot_id)
+            if previous == entry:
+                continue
+            spot = _parse_spot(entry)
+            self.spots[spot_id] = spot
+            (changes.new if previous is None else changes.changed).append(spot)
+
+        for spot_id in self._raw.keys() - raw.keys():
+            changes.expired.append(self.spots.pop(spot_id))
+        self._raw = raw
+        return changes
+
+    async def _notify(self, changes: SpotChanges):
+        for consumer in self._consumers:
+            try:
+                result = consumer(changes)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error("Fehler beim Verarbeiten der Spots: %s", e)
@@ -0,0 +1,93 @@
+#
+# prefix_index.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+import sys
+import unicodedata
+from bisect import bisect_left
+
+_WORD = re.compile(r"[^\W_]+")
+
+def normalize(text: str) -> str:
+    """
+    Folds case and strips accents and umlauts, so 'Biosphäre' matches 'biosphare'.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+def words(text: str) -> list[str]:
+    """
+    Returns the normalized words of a text.
+    """
+    return _WORD.findall(normalize(text))
+
+class PrefixIndex:
+    """
+    Immutable prefix index over the codes and names of references, for autocompletion.
+    The normalized keys (the full code plus every word of code and name) are kept in a
+    sorted list; a prefix lookup is two bisections, so queries take microseconds even for
+    the full catalog. Results are positions in the lists the index was built from.
+    """
+    def __init__(self, codes: list[str], names: list[str]):
+        entries = []
+        self._keys_of: list[tuple[str, ...]] = []
+        for i, (code, name) in enumerate(zip(codes, names)):
+            keys = tuple(sys.intern(key) for key in dict.fromkeys([normalize(code), *words(code), *words(name)]))
+            self._keys_of.append(keys)
+            entries.extend((key, i) for key in keys)
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._positions = [i for _, i in entries]
+
+    def __len__(self):
+        return len(self._keys_of)
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        return bisect_left(self._keys, prefix), bisect_left(self._keys, prefix + "\U0010ffff")
+
+    def search(self, query: str, limit: int = 20) -> list[int]:
+        """
+        Returns the positions of the references with a key starting with every word of the
+        query, in key order of the most selective word.
+        """
+        tokens = list(dict.fromkeys(normalize(query).split()))
+        if not tokens:
+            return []
+        ranges = {token: self._range(token) for token in tokens}
+        first = min(tokens, key=lambda token: ranges[token][1] - ranges[token][0])
+        others = [token for token in tokens if token != first]
+
+        result = []
+        seen = set()
+        start, end = ranges[first]
+        for i in range(start, end):
+            position = self._positions[i]
+            if position in seen:
+                continue
+            seen.add(position)
+            keys = self._keys_of[position]
+            if all(any(key.startswith(token) for key in keys) for token in others):
+                result.append(position)
+                if len(result) >= limit:
+                    break
+        return result
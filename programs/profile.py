@@ -21,14 +21,19 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from programs.reference import Reference
+import json
 from dataclasses import dataclass
+from typing import ClassVar
+from programs.reference import Reference, field_names
 
-@dataclass
+@dataclass(slots=True)
 class Profile:
     """
     Represents a user profile with a callsign and a list of references.
+    Slotted like the references. Footprint: 48 bytes plus the callsign and the reference list.
     """
+    reference_type: ClassVar[type] = Reference
+
     callsign: str
     references: list[Reference]
 
@@ -42,4 +47,31 @@ class Profile:
         return {
             "callsign": self.callsign,
             "references": [ref.to_dict() for ref in self.references]
-        }
\ No newline at end of file
+        }
+
+    def to_row(self) -> list:
+        """
+        Returns the field values in declaration order, with the references as rows.
+        """
+        return [self.callsign, [ref.to_row() for ref in self.references],
+                *(getattr(self, name) for name in field_names(type(self))[2:])]
+
+    @classmethod
+    def from_row(cls, row: list):
+        """
+        Builds the profile from a row created by to_row.
+        """
+        return cls(row[0], [cls.reference_type.from_row(ref) for ref in row[1]], *row[2:])
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the profile as a compact JSON array.
+        """
+        return json.dumps(self.to_row(), ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """
+        Builds the profile from the output of to_bytes.
+        """
+        return cls.from_row(json.loads(data))
@@ -0,0 +1,231 @@
+#
+# profiling.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from types import FrameType
+from telegram import Update
+from telegram.ext import CallbackContext
+from programs.program import Program
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Invocation:
+    command: str
+    coroutine: object
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}".replace(";", ":")
+
+class CommandProfiler:
+    """
+    Wall-clock sampling profiler for command handlers.
+    While enabled, a fraction of the handler invocations registered through
+    Program.register_handler is profiled: a background thread samples the stack of every
+    profiled invocation at a fixed interval. A running handler contributes its real stack,
+    a suspended one the chain of awaits it is waiting on (e.g. an upstream request), so
+    the profile shows where the wall-clock time of a command goes. Samples are aggregated
+    per command and written as collapsed stacks for flame graph tools.
+    When disabled, the handlers are not wrapped and no thread runs.
+    """
+    def __init__(self, programs: list[Program], sample_rate: float = 0.1, interval: float = 0.005,
+                 output_dir: str = "profiles"):
+        self.programs = programs
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.output_dir = output_dir
+        self.enabled = False
+        self._active: dict[int, Invocation] = {}
+        self._profiles: dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread = None
+        self._stop = threading.Event()
+        self._loop_thread = threading.get_ident()
+
+    def enable(self, sample_rate: float = None):
+        """
+        Starts profiling by wrapping the handlers of all programs.
+        """
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if self.enabled:
+            return
+        self._loop_thread = threading.get_ident()
+        for program in self.programs:
+            for name, handler in program.handlers.items():
+                handler.callback = self.wrap(name, program.callbacks[name])
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._thread.start()
+        self.enabled = True
+        logger.info("Profiling aktiviert, Anteil %.2f, Intervall %.1f ms", self.sample_rate, self.interval * 1000)
+
+    def disable(self):
+        """
+        Stops profiling and restores the original handlers. Collected samples are kept.
+        """
+        if not self.enabled:
+            return
+        for program in self.programs:
+            for name, handler in program.handlers.items():
+                handler.callback = program.callbacks[name]
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.enabled = False
+        logger.info("Profiling deaktiviert")
+
+    def wrap(self, command: str, handler):
+        """
+        Returns a handler that profiles a sampled fraction of its invocations.
+        """
+        async def profiled(update, context):
+            if random.random() >= self.sample_rate:
+                return await handler(update, context)
+            coroutine = handler(update, context)
+            key = id(coroutine)
+            self._active[key] = Invocation(command, coroutine)
+            try:
+                return await coroutine
+            finally:
+                del self._active[key]
+        return profiled
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            if not self._active:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            for invocation in list(self._active.values()):
+                try:
+                    stack = self._stack(invocation, frame)
+                except (AttributeError, ValueError):
+                    continue
+                with self._lock:
+                    self._profiles.setdefault(invocation.command, Counter())[stack] += 1
+
+    @staticmethod
+    def _stack(invocation: Invocation, frame: FrameType) -> str:
+        coroutine = invocation.coroutine
+        frames = []
+        if coroutine.cr_running:
+            # Läuft gerade: echten Stack bis zum Handler hinauf verfolgen
+            root = coroutine.cr_frame
+            while frame is not None and frame is not root:
+                frames.append(_label(frame))
+                frame = frame.f_back
+            if frame is None:
+                raise ValueError("Handler nicht im Stack")
+            frames.append(_label(root))
+            frames.reverse()
+        else:
+            # Wartet: Kette der awaits vom Handler bis zum Future verfolgen
+            current = coroutine
+            while current is not None:
+                inner_frame = getattr(current, "cr_frame", None) or getattr(current, "gi_frame", None)
+                if inner_frame is None:
+                    # asyncio.Future liefert beim await einen FutureIter
+                    frames.append(f"[await {type(current).__name__.removesuffix('Iter')}]")
+                    break
+                frames.append(_label(inner_frame))
+                current = getattr(current, "cr_await", None) or getattr(current, "gi_yieldfrom", None)
+        return ";".join([invocation.command, *frames])
+
+    @property
+    def samples(self) -> dict[str, int]:
+        """
+        Returns the number of samples per command.
+        """
+        with self._lock:
+            return {command: sum(stacks.values()) for command, stacks in self._profiles.items()}
+
+    def collapsed(self, command: str = None) -> str:
+        """
+        Returns the collected stacks in the collapsed format ("frame;frame;frame count").
+        """
+        with self._lock:
+            profiles = {c: Counter(s) for c, s in self._profiles.items() if command is None or c == command}
+        return "".join(f"{stack} {count}\n" for stacks in profiles.values() for stack, count in stacks.most_common())
+
+    def dump(self) -> list[str]:
+        """
+        Writes one collapsed stack file per command to the output directory and returns the paths.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        paths = []
+        for command in self.samples:
+            path = os.path.join(self.output_dir, f"{command}-{stamp}.collapsed")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.collapsed(command))
+            paths.append(path)
+        return paths
+
+    def reset(self):
+        """
+        Discards all collected samples.
+        """
+        with self._lock:
+            self._profiles.clear()
+
+    def admin_cmd(self, admin_id: int):
+        """
+        Returns the handler of the /profile command, which only answers the administrator.
+        """
+        async def profile_cmd(update: Update, context: CallbackContext):
+            if update.effective_user is None or update.effective_user.id != admin_id:
+                logger.warning("Unberechtigter Aufruf von /profile durch %s", update.effective_user)
+                return
+            action = context.args[0].lower() if context.args else "status"
+            if action == "on":
+                try:
+                    rate = float(context.args[1]) if len(context.args) > 1 else None
+                except ValueError:
+                    await update.message.reply_text("Ungültiger Anteil, z.B. /profile on 0.25")
+                    return
+                self.enable(rate)
+                await update.message.reply_text(f"Profiling aktiviert (Anteil {self.sample_rate:g}).")
+            elif action == "off":
+                self.disable()
+                await update.message.reply_text("Profiling deaktiviert.")
+            elif action == "dump":
+                paths = self.dump()
+                await update.message.reply_text("Profile geschrieben:\n" + "\n".join(paths) if paths else "Keine Samples vorhanden.")
+            elif action == "reset":
+                self.reset()
+                await update.message.reply_text("Samples verworfen.")
+            else:
+                samples = self.samples
+                await update.message.reply_text(
+                    f"Profiling {'aktiv' if self.enabled else 'inaktiv'} (Anteil {self.sample_rate:g})\n" +
+                    "".join(f"/{command}: {count} Samples\n" for command, count in sorted(samples.items())) +
+                    "Befehle: /profile on [Anteil] | off | dump | reset")
+        return profile_cmd
@@ -20,21 +20,44 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-from telegram.ext import Application, CommandHandler
+from telegram.ext import Application, CommandHandler, InlineQueryHandler
 from typing import Coroutine, Any
 import logging
+import time
+from programs import metrics
+from programs.api import STALE_RESULTS, gather_limited
+from programs.bulkhead import Bulkhead
+from programs.maps import MapRenderer
+from programs.outbound import OutboundScheduler, reply, split_message
 
 logger = logging.getLogger(__name__)
 
+COMMAND_DURATION = metrics.histogram("bot_command_duration_seconds", "Processing time of bot commands", ("command",))
+COMMAND_ERRORS = metrics.counter("bot_command_errors_total", "Bot commands that raised an exception", ("command",))
+COMMANDS_IN_FLIGHT = metrics.gauge("bot_commands_in_flight", "Bot commands currently being processed")
+
+# Name, unter dem der Inline-Query-Handler eines Programms geführt wird
+INLINE_QUERY = "inline_query"
+
+BUSY_TEXT = "⏳ Gerade laufen zu viele Abfragen, bitte versuche es in einigen Sekunden erneut."
+
 class Program:
     """
     Represents an amateur radio outdoor program.
+    With a bulkhead, commands beyond the concurrency budget of the program are answered
+    as busy at once instead of waiting for the upstream.
     """
-    def __init__(self, app: Application):
+    def __init__(self, app: Application, outbound: OutboundScheduler = None, maps: MapRenderer = None,
+                 bulkhead: Bulkhead = None):
         self._name = None
         self._description = None
         self._app = app
         self._help_texts = []
+        self.outbound = outbound
+        self.maps = maps
+        self.bulkhead = bulkhead
+        self.handlers: dict[str, CommandHandler] = {}
+        self.callbacks: dict = {}
 
     @property
     def name(self):
@@ -99,11 +122,116 @@ class Program:
         self._help_texts.append(f"/{command} - {description}")
         logger.debug("Hilfetext für %s hinzugefügt: %s", command, description)
 
+    def _instrument(self, name: str, handler, guarded: bool = True):
+        """
+        Wraps a command handler to record its latency and errors. Guarded handlers
+        are only run if the bulkhead of the program admits them.
+        """
+        duration = COMMAND_DURATION.labels(name)
+        errors = COMMAND_ERRORS.labels(name)
+        in_flight = COMMANDS_IN_FLIGHT.labels()
+        bulkhead = self.bulkhead if guarded else None
+
+        async def instrumented(update, context):
+            if bulkhead is not None and not bulkhead.try_enter():
+                await self.reply(update, BUSY_TEXT)
+                return
+            in_flight.inc()
+            start = time.perf_counter()
+            # Sammelt die veralteten Cache-Werte, mit denen der Befehl beantwortet wird
+            stale = STALE_RESULTS.set([])
+            try:
+                return await handler(update, context)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                STALE_RESULTS.reset(stale)
+                duration.observe(time.perf_counter() - start)
+                in_flight.dec()
+                if bulkhead is not None:
+                    bulkhead.leave()
+        return instrumented
+
     def register_handler(self, name: str, handler, help_text: str):
-        self.app.add_handler(CommandHandler(name, handler))
+        # Die Callbacks werden gemerkt, damit der Profiler sie austauschen und wiederherstellen kann
+        self.callbacks[name] = self._instrument(name, handler)
+        self.handlers[name] = CommandHandler(name, self.callbacks[name])
+        self.app.add_handler(self.handlers[name])
         logger.debug("Registriere %s Befehl", name)
         self._add_help_text(name, help_text)
 
+    def register_inline_handler(self, handler):
+        """
+        Registers the handler of inline queries (@bot ...). Only one program can answer them.
+        """
+        # Inline-Anfragen werden aus dem lokalen Index beantwortet und nicht begrenzt
+        self.callbacks[INLINE_QUERY] = self._instrument(INLINE_QUERY, handler, guarded=False)
+        self.handlers[INLINE_QUERY] = InlineQueryHandler(self.callbacks[INLINE_QUERY])
+        self.app.add_handler(self.handlers[INLINE_QUERY])
+        logger.debug("Registriere Inline-Query-Handler")
+
+    async def reply(self, update, text: str, **kwargs):
+        """
+        Answers a command. Goes through the outbound scheduler if one is configured.
+        If the command was answered with outdated cached values, because an upstream host
+        failed, the first reply notes the time of the oldest one.
+        """
+        note = self._stale_note()
+        if note:
+            text += "\n\n" + note
+        return await reply(self.outbound, update, text, **kwargs)
+
+    @staticmethod
+    def _stale_note() -> str:
+        stale = STALE_RESULTS.get()
+        if not stale:
+            return ""
+        as_of = time.strftime("%d.%m.%Y %H:%M", time.localtime(min(stale)))
+        stale.clear()
+        return f"⚠️ Der Dienst ist gerade nicht erreichbar, Stand vom {as_of}."
+
+    async def reply_many(self, update, keys: list[str], fetch, render, concurrency: int, max_keys: int, **kwargs):
+        """
+        Looks up several keys (references or callsigns) concurrently, at most concurrency at a
+        time, and answers with one combined reply that is split into several messages at the
+        size limit. render(key, result) gets the result or the exception of a key and returns its text.
+        """
+        keys = list(dict.fromkeys(key.upper() for key in keys))
+        skipped = keys[max_keys:]
+        results = await gather_limited(fetch, keys[:max_keys], concurrency)
+        parts = [render(key, result) for key, result in results]
+        if skipped:
+            parts.append(f"Es werden höchstens {max_keys} Einträge je Befehl abgefragt, ausgelassen: {' '.join(skipped)}")
+        note = self._stale_note()
+        if note:
+            parts.append(note)
+        for text in split_message(parts, "\n\n"):
+            await self.reply(update, text, **kwargs)
+
+    async def reply_map(self, update, title: str, lat: float, lon: float, radius: float, results: list):
+        """
+        Answers a command with a map of the (reference, distance) results around a point.
+        """
+        if self.maps is None:
+            await self.reply(update, "Karten sind nicht aktiviert.")
+            return
+        try:
+            await self.maps.reply(self.outbound, update, title, lat, lon, radius, results)
+        except Exception as e:
+            logger.error("Fehler beim Erstellen der Karte %s: %s", title, e)
+            await self.reply(update, "Fehler beim Erstellen der Karte.")
+
+    def run_repeating(self, callback, interval: float, first: float = 0, name: str = None):
+        """
+        Schedules a job that is run periodically by the job queue of the application.
+        """
+        if self.app.job_queue is None:
+            logger.warning("Keine JobQueue verfügbar, Job %s wird nicht ausgeführt", name)
+            return None
+        logger.debug("Plane Job %s alle %s Sekunden", name, interval)
+        return self.app.job_queue.run_repeating(callback, interval=interval, first=first, name=name)
+
     def __str__(self):
         return f"{self.name} - {self.description}"
 
@@ -0,0 +1,118 @@
+#
+# singleflight.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Hashable
+from programs.state import StateBackend
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while a call for a key is in flight,
+    further callers for the same key wait for it and share its result or error.
+    With a state backend, the call also takes a lock shared by all replicas; a replica
+    that finds the lock taken waits until it is released and then checks again,
+    usually finding the result in the shared cache.
+    """
+    def __init__(self, backend: StateBackend = None, lock_ttl: float = 30.0, poll_interval: float = 0.05):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.backend = backend
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.calls = 0
+        self.shared = 0
+        self.remote_waits = 0
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns the number of executed calls and the number of calls saved by sharing.
+        """
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "remote_waits": self.remote_waits,
+            "in_flight": len(self._inflight),
+        }
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                 recheck: Callable[[], Awaitable[Any]] = None):
+        """
+        Runs the coroutine function for the key, unless a call for the key is already running.
+        A caller being cancelled does not cancel the call for the other callers.
+        After waiting for the lock of another replica, recheck is called first and its
+        result is used instead of calling fn, unless it is None.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn() if self.backend is None else self._locked(key, fn, recheck))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.shared += 1
+            logger.debug("Teile laufenden Aufruf für %s", key)
+        return await asyncio.shield(task)
+
+    async def _locked(self, key: Hashable, fn: Callable[[], Awaitable[Any]], recheck: Callable[[], Awaitable[Any]]):
+        name = "flight:" + (":".join(map(str, key)) if isinstance(key, tuple) else str(key))
+        token = uuid.uuid4().hex.encode('ascii')
+        try:
+            acquired = await self.backend.add(name, token, self.lock_ttl)
+        except Exception as e:
+            logger.warning("Gemeinsame Sperre %s nicht verfügbar: %s", name, e)
+            return await fn()
+
+        if acquired:
+            try:
+                return await fn()
+            finally:
+                try:
+                    await self.backend.delete(name, token)
+                except Exception as e:
+                    logger.warning("Gemeinsame Sperre %s nicht freigegeben: %s", name, e)
+
+        self.remote_waits += 1
+        logger.debug("Warte auf Aufruf einer anderen Instanz für %s", key)
+        deadline = time.monotonic() + self.lock_ttl
+        try:
+            while time.monotonic() < deadline and await self.backend.get(name) is not None:
+                await asyncio.sleep(self.poll_interval)
+            if recheck is not None:
+                result = await recheck()
+                if result is not None:
+                    return result
+        except Exception as e:
+            logger.warning("Gemeinsamer Zustand für %s nicht verfügbar: %s", key, e)
+        return await fn()
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Fehler als abgerufen markieren, auch wenn alle Aufrufer abgebrochen wurden
+        if not task.cancelled():
+            task.exception()
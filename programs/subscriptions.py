@@ -0,0 +1,284 @@
+#
+# subscriptions.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import logging
+import math
+from dataclasses import dataclass
+from programs.state import StateBackend
+import maidenhead
+import util
+
+logger = logging.getLogger(__name__)
+
+CALLSIGN = "call"
+REFERENCE = "ref"
+PREFIX = "prefix"
+GRID = "grid"
+KINDS = (CALLSIGN, REFERENCE, PREFIX, GRID)
+
+# Kantenlänge der Zellen des räumlichen Index in Grad
+BUCKET_SIZE = 1.0
+
+def normalize_callsign(callsign: str) -> str:
+    """
+    Reduces a callsign like 'DL/DK8YS/P' to its base callsign 'DK8YS'.
+    """
+    parts = [part for part in callsign.strip().upper().split("/") if part]
+    return max(parts, key=len) if parts else ""
+
+@dataclass(frozen=True)
+class Subscription:
+    """
+    Represents the subscription of a chat to a callsign, a reference, a reference or
+    region prefix, or an area given by a Maidenhead grid and a radius in km.
+    """
+    chat_id: int
+    kind: str
+    value: str
+    radius: float = 0.0
+
+    def __str__(self):
+        if self.kind == GRID:
+            return f"{self.kind} {self.value} {self.radius:g} km"
+        return f"{self.kind} {self.value}"
+
+    def to_dict(self):
+        """
+        Converts the subscription to a dictionary format.
+        """
+        return {
+            "chat_id": self.chat_id,
+            "kind": self.kind,
+            "value": self.value,
+            "radius": self.radius
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Subscription":
+        """
+        Creates a subscription from the dictionary format.
+        """
+        return cls(int(data["chat_id"]), data["kind"], data["value"], float(data.get("radius", 0.0)))
+
+class SubscriptionStore:
+    """
+    Keeps the subscriptions in a hash of the shared state backend, so every replica
+    sees the subscriptions made through the others and they survive restarts.
+    Every change increments a version counter, so replicas only reload the hash
+    after it actually changed.
+    """
+    def __init__(self, backend: StateBackend, key: str):
+        self.backend = backend
+        self.key = key
+        self.version_key = f"{key}:version"
+
+    @staticmethod
+    def _field(subscription: Subscription) -> str:
+        return f"{subscription.chat_id}:{subscription.kind}:{subscription.value}:{subscription.radius:g}"
+
+    async def version(self) -> int:
+        """
+        Returns the version of the stored subscriptions, 0 before the first change.
+        """
+        return int(await self.backend.get(self.version_key) or 0)
+
+    async def save(self, subscription: Subscription) -> int:
+        """
+        Stores a subscription. Returns the new version.
+        """
+        await self.backend.hset(self.key, self._field(subscription),
+                                json.dumps(subscription.to_dict(), separators=(",", ":")).encode('utf-8'))
+        return await self.backend.incr(self.version_key)
+
+    async def delete(self, subscription: Subscription) -> int:
+        """
+        Removes a subscription. Returns the new version.
+        """
+        await self.backend.hdel(self.key, self._field(subscription))
+        return await self.backend.incr(self.version_key)
+
+    async def load(self) -> set[Subscription]:
+        """
+        Returns all stored subscriptions. Invalid entries are skipped.
+        """
+        result = set()
+        for field, data in (await self.backend.hgetall(self.key)).items():
+            try:
+                result.add(Subscription.from_dict(json.loads(data)))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning("Ungültiges gespeichertes Abo %s: %s", field, e)
+        return result
+
+class SubscriptionEngine:
+    """
+    Matches items (e.g. spots) against many subscriptions using indexes instead of
+    checking every subscription: hash indexes for callsigns and references, a prefix
+    index that is probed only for prefix lengths in use, and a spatial bucket index for
+    grid/radius subscriptions. Matching costs roughly O(items + matches).
+    """
+    def __init__(self):
+        self._by_callsign: dict[str, set[Subscription]] = {}
+        self._by_reference: dict[str, set[Subscription]] = {}
+        self._by_prefix: dict[str, set[Subscription]] = {}
+        self._prefix_lengths: dict[int, int] = {}
+        self._buckets: dict[tuple[int, int], set[Subscription]] = {}
+        self._centers: dict[Subscription, tuple[float, float]] = {}
+        self._by_chat: dict[int, set[Subscription]] = {}
+
+    def __len__(self):
+        return sum(len(subscriptions) for subscriptions in self._by_chat.values())
+
+    @staticmethod
+    def create(chat_id: int, kind: str, value: str, radius: float = 0.0) -> Subscription:
+        """
+        Creates a normalized subscription. Raises ValueError for invalid input.
+        """
+        kind = kind.lower()
+        if kind not in KINDS:
+            raise ValueError(f"Unbekannte Art '{kind}', erlaubt sind: {', '.join(KINDS)}")
+        value = normalize_callsign(value) if kind == CALLSIGN else value.strip().upper()
+        if not value:
+            raise ValueError("Leerer Wert")
+        if kind == GRID:
+            maidenhead.decode(value)
+            if not 0 < radius <= 1000:
+                raise ValueError("Radius muss zwischen 0 und 1000 km liegen")
+        else:
+            radius = 0.0
+        return Subscription(chat_id, kind, value, float(radius))
+
+    def all(self) -> set[Subscription]:
+        """
+        Returns the subscriptions of all chats.
+        """
+        return {subscription for chat in self._by_chat.values() for subscription in chat}
+
+    def subscriptions(self, chat_id: int) -> list[Subscription]:
+        """
+        Returns the subscriptions of a chat.
+        """
+        return sorted(self._by_chat.get(chat_id, ()), key=str)
+
+    def add(self, subscription: Subscription) -> bool:
+        """
+        Adds a subscription. Returns False if it already exists.
+        """
+        chat = self._by_chat.setdefault(subscription.chat_id, set())
+        if subscription in chat:
+            return False
+        chat.add(subscription)
+
+        if subscription.kind == CALLSIGN:
+            self._by_callsign.setdefault(subscription.value, set()).add(subscription)
+        elif subscription.kind == REFERENCE:
+            self._by_reference.setdefault(subscription.value, set()).add(subscription)
+        elif subscription.kind == PREFIX:
+            self._by_prefix.setdefault(subscription.value, set()).add(subscription)
+            n = len(subscription.value)
+            self._prefix_lengths[n] = self._prefix_lengths.get(n, 0) + 1
+        elif subscription.kind == GRID:
+            center = maidenhead.decode(subscription.value)
+            self._centers[subscription] = center
+            for bucket in self._buckets_for(center, subscription.radius):
+                self._buckets.setdefault(bucket, set()).add(subscription)
+        return True
+
+    def remove(self, subscription: Subscription) -> bool:
+        """
+        Removes a subscription. Returns False if it did not exist.
+        """
+        chat = self._by_chat.get(subscription.chat_id)
+        if not chat or subscription not in chat:
+            return False
+        chat.discard(subscription)
+        if not chat:
+            del self._by_chat[subscription.chat_id]
+
+        if subscription.kind == CALLSIGN:
+            _discard(self._by_callsign, subscription.value, subscription)
+        elif subscription.kind == REFERENCE:
+            _discard(self._by_reference, subscription.value, subscription)
+        elif subscription.kind == PREFIX:
+            _discard(self._by_prefix, subscription.value, subscription)
+            n = len(subscription.value)
+            self._prefix_lengths[n] -= 1
+            if self._prefix_lengths[n] == 0:
+                del self._prefix_lengths[n]
+        elif subscription.kind == GRID:
+            center = self._centers.pop(subscription)
+            for bucket in self._buckets_for(center, subscription.radius):
+                _discard(self._buckets, bucket, subscription)
+        return True
+
+    def remove_chat(self, chat_id: int) -> int:
+        """
+        Removes all subscriptions of a chat and returns their number.
+        """
+        subscriptions = list(self._by_chat.get(chat_id, ()))
+        for subscription in subscriptions:
+            self.remove(subscription)
+        return len(subscriptions)
+
+    @staticmethod
+    def _buckets_for(center: tuple[float, float], radius: float) -> list[tuple[int, int]]:
+        lat_min, lon_min, lat_max, lon_max = maidenhead.radius_bounds(center[0], center[1], radius)
+        lats = range(math.floor(lat_min / BUCKET_SIZE), math.floor(lat_max / BUCKET_SIZE) + 1)
+        first, last = math.floor(lon_min / BUCKET_SIZE), math.floor(lon_max / BUCKET_SIZE)
+        if last < first:
+            last += int(360 / BUCKET_SIZE)
+        last = min(last, first + int(360 / BUCKET_SIZE) - 1)
+        lons = [(j + int(180 / BUCKET_SIZE)) % int(360 / BUCKET_SIZE) - int(180 / BUCKET_SIZE) for j in range(first, last + 1)]
+        return [(i, j) for i in lats for j in lons]
+
+    def match(self, callsign: str = "", reference: str = "", locations: tuple[str, ...] = (),
+              coordinates: tuple[float, float] = None) -> set[Subscription]:
+        """
+        Returns all subscriptions matching a single item.
+        """
+        result: set[Subscription] = set()
+        if callsign:
+            result.update(self._by_callsign.get(normalize_callsign(callsign), ()))
+        reference = reference.upper()
+        if reference:
+            result.update(self._by_reference.get(reference, ()))
+        if self._prefix_lengths:
+            for key in (reference, *(location.strip().upper() for location in locations)):
+                for n in self._prefix_lengths:
+                    if n <= len(key):
+                        result.update(self._by_prefix.get(key[:n], ()))
+        if coordinates and self._buckets:
+            lat, lon = coordinates
+            bucket = (math.floor(lat / BUCKET_SIZE), math.floor(lon / BUCKET_SIZE))
+            for subscription in self._buckets.get(bucket, ()):
+                center = self._centers[subscription]
+                if util.haversine_distance(center[0], center[1], lat, lon) <= subscription.radius:
+                    result.add(subscription)
+        return result
+
+def _discard(index: dict, key, subscription: Subscription):
+    subscriptions = index.get(key)
+    if subscriptions is not None:
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del index[key]
@@ -0,0 +1,169 @@
+#
+# trigram_index.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import math
+from functools import lru_cache
+import numpy as np
+from programs.prefix_index import words
+
+@lru_cache(maxsize=65536)
+def _word_trigrams(word: str) -> frozenset[str]:
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def trigrams(text: str) -> set[str]:
+    """
+    Returns the trigrams of the normalized words of a text. Words are padded with two
+    blanks in front and one behind, so short words and word starts weigh more.
+    """
+    result = set()
+    for word in words(text):
+        result |= _word_trigrams(word)
+    return result
+
+class TrigramIndex:
+    """
+    Inverted index from trigrams to documents for fuzzy search with typo tolerance.
+
+    The postings are int32 arrays of document numbers. Documents are added and removed
+    one at a time: additions are collected per trigram until compact() merges them into
+    the arrays, removed documents are masked out until their trigram is compacted. So a
+    changed dataset only touches the postings of the changed documents. A search counts
+    the shared trigrams of all documents at once with numpy and ranks by the share of the
+    query found in a document, then by the similarity of both.
+    """
+    def __init__(self, threshold: float = 0.4):
+        self.threshold = threshold
+        self._postings: dict[str, np.ndarray] = {}
+        self._pending: dict[str, list[int]] = {}
+        self._ids: dict[str, int] = {}
+        self._keys: list[str] = []
+        # Anzahl der Trigramme je Dokument, 0 für entfernte Dokumente
+        self._sizes = np.zeros(1024, dtype=np.int32)
+        self._removed = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, key: str):
+        return key in self._ids
+
+    def add(self, key: str, text: str):
+        """
+        Adds a document or replaces the text of an existing one.
+        """
+        self.remove(key)
+        grams = trigrams(text)
+        doc = len(self._keys)
+        self._keys.append(key)
+        if doc >= len(self._sizes):
+            self._sizes = np.concatenate([self._sizes, np.zeros(len(self._sizes), dtype=np.int32)])
+        self._sizes[doc] = len(grams)
+        self._ids[key] = doc
+        for gram in grams:
+            pending = self._pending.get(gram)
+            if pending is None:
+                self._pending[gram] = [doc]
+            else:
+                pending.append(doc)
+
+    def remove(self, key: str):
+        """
+        Removes a document, if it is indexed.
+        """
+        doc = self._ids.pop(key, None)
+        if doc is not None:
+            self._keys[doc] = None
+            self._sizes[doc] = 0
+            self._removed += 1
+
+    def compact(self):
+        """
+        Merges the pending additions into the posting arrays. Removed documents are dropped
+        from the merged arrays. Once they make up a quarter of the index, all arrays are swept
+        and the remaining documents are renumbered, so replaced documents don't grow the index.
+        """
+        n = len(self._keys)
+        sweep = self._removed * 4 > n
+        if sweep:
+            alive = np.fromiter((key is not None for key in self._keys), dtype=bool, count=n)
+            # Neue Nummern der verbleibenden Dokumente in der bisherigen Reihenfolge
+            numbers = np.cumsum(alive, dtype=np.int32) - 1
+        else:
+            alive = self._sizes[:n] > 0
+        for gram in set(self._pending).union(self._postings) if sweep else list(self._pending):
+            parts = []
+            array = self._postings.get(gram)
+            if array is not None:
+                parts.append(array[alive[array]])
+            pending = self._pending.pop(gram, None)
+            if pending:
+                pending = np.array(pending, dtype=np.int32)
+                parts.append(pending[alive[pending]])
+            array = np.concatenate(parts) if len(parts) > 1 else parts[0]
+            if sweep:
+                array = numbers[array]
+            if len(array):
+                self._postings[gram] = array
+            else:
+                self._postings.pop(gram, None)
+        if sweep:
+            sizes = self._sizes[:n][alive]
+            self._keys = [key for key in self._keys if key is not None]
+            self._ids = {key: doc for doc, key in enumerate(self._keys)}
+            self._sizes = np.zeros(max(1024, 2 * len(self._keys)), dtype=np.int32)
+            self._sizes[:len(sizes)] = sizes
+            self._removed = 0
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[str, float]]:
+        """
+        Returns the keys of the best matching documents with their score (0-1).
+        """
+        grams = trigrams(query)
+        arrays = []
+        for gram in grams:
+            array = self._postings.get(gram)
+            if array is not None:
+                arrays.append(array)
+            pending = self._pending.get(gram)
+            if pending:
+                arrays.append(np.array(pending, dtype=np.int32))
+        if not arrays:
+            return []
+
+        n = len(self._keys)
+        counts = np.bincount(np.concatenate(arrays), minlength=n)
+        sizes = self._sizes[:n]
+        candidates = np.flatnonzero((counts >= max(1, math.ceil(self.threshold * len(grams)))) & (sizes > 0))
+        if len(candidates) == 0:
+            return []
+
+        shared = counts[candidates]
+        similarity = shared / (len(grams) + sizes[candidates] - shared)
+        # Erst nach Anzahl gemeinsamer Trigramme, dann nach Ähnlichkeit (< 1) ordnen
+        rank = shared + similarity * 0.99
+        if len(candidates) > limit:
+            top = np.argpartition(-rank, limit - 1)[:limit]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-rank[top], kind="stable")]
+        return [(self._keys[candidates[i]], float(shared[i]) / len(grams)) for i in top]
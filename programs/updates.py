@@ -0,0 +1,87 @@
+#
+# updates.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import logging
+from typing import Any, Awaitable
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+from programs import metrics
+
+logger = logging.getLogger(__name__)
+
+UPDATES_IN_FLIGHT = metrics.gauge("bot_updates_in_flight", "Updates currently being processed by a worker")
+UPDATES_WAITING = metrics.gauge("bot_updates_waiting", "Updates accepted but waiting for their chat or a worker")
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processes updates of different chats concurrently with a bounded number of workers,
+    while updates of the same chat are still processed one after another in arrival order.
+    Waiting for the own chat happens before a worker is taken, so a busy chat never blocks
+    workers that other chats could use.
+    """
+    def __init__(self, workers: int, max_pending: int = None):
+        # Die Semaphore der Basisklasse begrenzt nur die angenommenen Updates, die Worker begrenzt _workers
+        super().__init__(max_pending or workers * 16)
+        self.workers = workers
+        self._workers = asyncio.Semaphore(workers)
+        self._chats: dict[int, list] = {}
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            async with self._workers:
+                await self._run(coroutine)
+            return
+
+        entry = self._chats.get(chat.id)
+        if entry is None:
+            entry = self._chats[chat.id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        waiting = True
+        UPDATES_WAITING.inc()
+        try:
+            async with entry[0], self._workers:
+                UPDATES_WAITING.dec()
+                waiting = False
+                await self._run(coroutine)
+        finally:
+            if waiting:
+                UPDATES_WAITING.dec()
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chats[chat.id]
+
+    @staticmethod
+    async def _run(coroutine: Awaitable[Any]):
+        UPDATES_IN_FLIGHT.inc()
+        try:
+            await coroutine
+        finally:
+            UPDATES_IN_FLIGHT.dec()
+
+    async def initialize(self) -> None:
+        logger.debug("Verarbeite Updates mit %d Workern", self.workers)
+
+    async def shutdown(self) -> None:
+        pass
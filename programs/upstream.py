@@ -0,0 +1,288 @@
+#
+# upstream.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import Callable
+import httpx
+from config import Config
+from programs import metrics
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_RESPONSES = metrics.counter("bot_upstream_responses_total", "HTTP responses of upstream hosts", ("host", "status"))
+UPSTREAM_ERRORS = metrics.counter("bot_upstream_errors_total", "Upstream requests failed without a response", ("host",))
+UPSTREAM_RETRIES = metrics.counter("bot_upstream_retries_total", "Upstream requests repeated after an error", ("host",))
+UPSTREAM_REJECTED = metrics.counter("bot_upstream_rejected_total", "Upstream requests failed fast by an open circuit breaker", ("host",))
+UPSTREAM_CIRCUIT = metrics.gauge("bot_upstream_circuit_open", "Whether the circuit breaker of an upstream host is open", ("host",))
+
+# Antworten, nach denen sich eine Wiederholung lohnt. 429 wird nur mit Retry-After wiederholt.
+RETRY_STATUSES = frozenset((502, 503, 504))
+
+class UpstreamError(Exception):
+    """
+    An upstream lookup failed.
+    """
+
+class UpstreamStatusError(UpstreamError):
+    """
+    The upstream host answered with an unexpected HTTP status.
+    """
+    def __init__(self, url: str, status_code: int):
+        super().__init__(f"{url} antwortete mit {status_code}")
+        self.url = url
+        self.status_code = status_code
+
+class CircuitOpenError(UpstreamError):
+    """
+    The request was not sent, because the circuit breaker of the host is open.
+    """
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} ist nicht erreichbar, nächster Versuch in {retry_in:.0f} s")
+        self.host = host
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """
+    Stops requests to an upstream host after consecutive failures.
+    Once the reset timeout has passed, a single trial request is let through:
+    its success closes the breaker, its failure opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        """
+        Returns the seconds until the next trial request is let through.
+        """
+        return max(0.0, self._opened_at + self.reset_timeout - self._clock())
+
+    def allow(self) -> bool:
+        """
+        Returns whether a request may be sent now.
+        """
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.retry_in == 0:
+            self.state = self.HALF_OPEN
+            return True
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = self._clock()
+
+    def abandon(self):
+        """
+        Called when the trial request ended without a result, e.g. because it was cancelled.
+        The next request becomes the trial request instead.
+        """
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+
+class UpstreamPool:
+    """
+    Shared asynchronous HTTP client layer for all programs.
+    Keeps one keep-alive connection pool per upstream host, so concurrent
+    commands reuse open connections instead of blocking the event loop.
+    GET requests are retried with jittered exponential backoff after connection errors
+    and temporary error responses. A circuit breaker per host fails requests fast while
+    the host keeps failing. Lookups are bounded by a deadline per endpoint.
+    """
+    def __init__(self, pool_size: int = 10, timeout: float = 10.0, connect_timeout: float = 5.0,
+                 transport: httpx.AsyncBaseTransport = None, retries: int = 2, backoff: float = 0.2,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 deadlines: dict[str, float] = None, default_deadline: float = 8.0):
+        self._limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._transport = transport
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.deadlines = dict(deadlines or {})
+        self.default_deadline = default_deadline
+
+    @classmethod
+    def from_config(cls, config: Config):
+        """
+        Creates the pool with size, timeouts, retries and circuit breakers taken from the configuration.
+        """
+        return cls(config.http_pool_size, config.http_timeout, config.http_connect_timeout,
+                   retries=config.http_retries, backoff=config.http_backoff,
+                   failure_threshold=config.circuit_failure_threshold, reset_timeout=config.circuit_reset_timeout,
+                   deadlines=config.upstream_deadlines, default_deadline=config.upstream_deadline)
+
+    def deadline(self, endpoint: str) -> float:
+        """
+        Returns the time in seconds a lookup of the endpoint may take, including retries.
+        """
+        return self.deadlines.get(endpoint, self.default_deadline)
+
+    def record_timeout(self, url: str):
+        """
+        Counts a request cut off by the deadline of its lookup as a failure of the host.
+        """
+        self._record(httpx.URL(url).host, self.breaker(url), False)
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """
+        Returns the circuit breaker of the host of the given URL.
+        """
+        key = self.host_key(url)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            self._breakers[key] = breaker
+        return breaker
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """
+        Returns the key of the connection pool responsible for the given URL.
+        """
+        u = httpx.URL(url)
+        return f"{u.scheme}://{u.host}:{u.port or (443 if u.scheme == 'https' else 80)}"
+
+    def client(self, url: str) -> httpx.AsyncClient:
+        """
+        Returns the client (and thus the connection pool) for the host of the given URL.
+        """
+        key = self.host_key(url)
+        client = self._clients.get(key)
+        if client is None:
+            logger.debug("Neuer Verbindungspool für %s", key)
+            client = httpx.AsyncClient(limits=self._limits, timeout=self._timeout, transport=self._transport)
+            self._clients[key] = client
+        return client
+
+    async def get(self, url: str, params: dict = None, headers: dict = None) -> httpx.Response:
+        """
+        Performs a GET request using the pool of the upstream host.
+        Raises CircuitOpenError without sending the request if the breaker of the host is open.
+        Only transport errors and 5xx answers count as failures of the host.
+        """
+        host = httpx.URL(url).host
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            UPSTREAM_REJECTED.labels(host).inc()
+            raise CircuitOpenError(self.host_key(url), breaker.retry_in)
+        trial = breaker.state == CircuitBreaker.HALF_OPEN
+
+        client = self.client(url)
+        delay = None
+        try:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    UPSTREAM_RETRIES.labels(host).inc()
+                    # Volle Streuung, damit wiederholte Anfragen vieler Befehle nicht gleichzeitig eintreffen
+                    await asyncio.sleep(delay if delay is not None else random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+                    delay = None
+                try:
+                    response = await client.get(url, params=params, headers=headers)
+                except httpx.TransportError as e:
+                    UPSTREAM_ERRORS.labels(host).inc()
+                    if attempt == self.retries:
+                        raise
+                    logger.debug("Anfrage an %s fehlgeschlagen, wiederhole: %s", host, e)
+                    continue
+                UPSTREAM_RESPONSES.labels(response.url.host, response.status_code).inc()
+                if attempt < self.retries:
+                    if response.status_code in RETRY_STATUSES:
+                        continue
+                    if response.status_code == 429:
+                        delay = self.retry_after(response)
+                        # Längere Wartezeiten überschreiten ohnehin die Frist der Abfrage
+                        if delay is not None and delay <= self._timeout.read:
+                            continue
+                        delay = None
+                break
+        except httpx.TransportError:
+            self._record(host, breaker, False)
+            raise
+        except BaseException:
+            # Ein Abbruch, z. B. weil der Aufrufer nicht mehr wartet, sagt nichts über den Host
+            if trial:
+                breaker.abandon()
+            raise
+        self._record(host, breaker, response.status_code < 500)
+        return response
+
+    @staticmethod
+    def retry_after(response: httpx.Response) -> float:
+        """
+        Returns the delay in seconds requested by the Retry-After header, or None without a valid header.
+        """
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _record(host: str, breaker: CircuitBreaker, success: bool):
+        before = breaker.state
+        if success:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        if breaker.state == CircuitBreaker.OPEN and before != CircuitBreaker.OPEN:
+            logger.warning("%s ist nicht erreichbar, Anfragen werden %d s lang abgewiesen", host, breaker.reset_timeout)
+        elif breaker.state == CircuitBreaker.CLOSED and before == CircuitBreaker.HALF_OPEN:
+            logger.info("%s ist wieder erreichbar", host)
+        UPSTREAM_CIRCUIT.labels(host).set(1 if breaker.state == CircuitBreaker.OPEN else 0)
+
+    async def aclose(self):
+        """
+        Closes all connection pools.
+        """
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
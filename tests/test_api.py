@@ -21,28 +21,292 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import asyncio
+import time
 import unittest
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import httpx
+from config import Config
+from programs.api import STALE_RESULTS, DeadlineExceeded, gather_limited
+from programs.cache import ResponseCache
+from programs.pota import POTA, Park
 from programs.pota.api import POTAAPI
+from programs.pota.profile import POTAProfile
+from programs.state import MemoryBackend
+from programs.upstream import CircuitBreaker, CircuitOpenError, UpstreamPool, UpstreamStatusError
 
-class TestPOTAAPI(unittest.TestCase):
+FAKE_PARK = {
+    "reference": "DE-0693",
+    "name": "Biosphäre Bliesgau",
+    "latitude": 49.1666,
+    "longitude": 7.2555,
+    "grid4": "JN39",
+    "grid6": "JN39nd",
+    "firstActivator": "DK9JC",
+    "firstActivationDate": "2015-03-08",
+    "active": 1,
+    "parktypeDesc": "Biosphere Reserve",
+}
 
-    @patch('programs.pota.api.requests.get')
-    def test_get_park(self):
-        # Simulierter Rückgabewert für die API
-        fake_park = {"reference": "DL-1234", "name": "Black Forest"}
+class TestPOTAAPI(unittest.IsolatedAsyncioTestCase):
 
-        # Mock-Objekt der API
-        mock_api = MagicMock()
-        mock_api.get_park.return_value = fake_park
+    async def asyncSetUp(self):
+        self.requests = []
 
-        api = POTAAPI()
-        result = api.get_park("DE-0693")
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            if request.url.path == "/park/DE-0693":
+                return httpx.Response(200, json=FAKE_PARK)
+            return httpx.Response(404, text="not found")
+
+        self.upstream = UpstreamPool(transport=httpx.MockTransport(handler))
+        self.api = POTAAPI(self.upstream)
+
+    async def asyncTearDown(self):
+        await self.upstream.aclose()
+
+    async def test_get_park(self):
+        result = await self.api.get_park("DE-0693")
 
         self.assertEqual(result.name, "DE-0693")
-        self.assertEqual(result.description, "Biosphäre Bluesgau")
+        self.assertEqual(result.description, "Biosphäre Bliesgau")
         self.assertEqual(result.active, True)
-        mock_api.get_park.assert_called_once_with("DE-0693")
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(str(self.requests[0].url), "https://api.pota.app/park/DE-0693")
+
+    async def test_get_park_not_found(self):
+        self.assertIsNone(await self.api.get_park("XX-0000"))
+
+    async def test_get_park_cached(self):
+        api = POTAAPI(self.upstream, cache=ResponseCache())
+        await api.get_park("DE-0693")
+        park = await api.get_park("de-0693")
+
+        self.assertEqual(park.name, "DE-0693")
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_concurrent_lookups_coalesced(self):
+        parks = await asyncio.gather(*[self.api.get_park("DE-0693") for _ in range(5)])
+
+        self.assertTrue(all(park.name == "DE-0693" for park in parks))
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.api.singleflight.stats["shared"], 4)
+
+    async def test_one_pool_per_host(self):
+        a = self.upstream.client("https://api.pota.app/park/DE-0693")
+        b = self.upstream.client("https://api.pota.app/profile/DK8YS")
+        c = self.upstream.client("https://logs.dlbota.de/api/stats.php")
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestResilience(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.requests = []
+        self.status = 200
+        self.delay = 0.0
+
+        async def handler(request: httpx.Request):
+            self.requests.append(request)
+            await asyncio.sleep(self.delay)
+            if self.status != 200:
+                return httpx.Response(self.status, text="down")
+            return httpx.Response(200, json=FAKE_PARK)
+
+        self.upstream = UpstreamPool(transport=httpx.MockTransport(handler), retries=2, backoff=0.001,
+                                     failure_threshold=2, reset_timeout=30, default_deadline=1.0)
+
+    async def asyncTearDown(self):
+        await self.upstream.aclose()
+
+    async def test_retry_temporary_errors(self):
+        statuses = iter([503, 502, 200])
+
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            status = next(statuses)
+            return httpx.Response(status, json=FAKE_PARK if status == 200 else None)
+
+        upstream = UpstreamPool(transport=httpx.MockTransport(handler), backoff=0.001)
+        try:
+            park = await POTAAPI(upstream).get_park("DE-0693")
+        finally:
+            await upstream.aclose()
+        self.assertEqual(park.name, "DE-0693")
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_breaker_fails_fast(self):
+        api = POTAAPI(self.upstream)
+        self.status = 500
+        for _ in range(2):
+            with self.assertRaises(UpstreamStatusError):
+                await api.get_park("DE-0693")
+        sent = len(self.requests)
+        with self.assertRaises(CircuitOpenError):
+            await api.get_park("DE-0693")
+        self.assertEqual(len(self.requests), sent)
+
+    async def test_breaker_half_open(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        clock.now = 30
+        self.assertTrue(breaker.allow())
+        # nur eine Probeanfrage, bis ihr Ergebnis vorliegt
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        clock.now = 60
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_deadline(self):
+        self.delay = 5.0
+        self.upstream.deadlines["pota.park"] = 0.05
+        with self.assertRaises(DeadlineExceeded):
+            await POTAAPI(self.upstream).get_park("DE-0693")
+        self.assertEqual(self.upstream.breaker("https://api.pota.app").failures, 1)
+
+    async def test_cancelled_requests_not_counted(self):
+        self.delay = 5.0
+        url = "https://api.pota.app/park/DE-0693"
+        for _ in range(3):
+            task = asyncio.create_task(self.upstream.get(url))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        breaker = self.upstream.breaker(url)
+        self.assertEqual((breaker.state, breaker.failures), (CircuitBreaker.CLOSED, 0))
+
+        # eine abgebrochene Probeanfrage gibt die Probe an die nächste Anfrage weiter
+        breaker.state, breaker.reset_timeout = CircuitBreaker.OPEN, 0
+        task = asyncio.create_task(self.upstream.get(url))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.delay = 0.0
+        self.assertEqual((await self.upstream.get(url)).status_code, 200)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_retry_after(self):
+        answers = iter([httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(200, json=FAKE_PARK),
+                        httpx.Response(429)])
+
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            return next(answers)
+
+        upstream = UpstreamPool(transport=httpx.MockTransport(handler), backoff=0.001)
+        try:
+            self.assertEqual((await upstream.get("https://api.pota.app/park/DE-0693")).status_code, 200)
+            # ohne Retry-After wird 429 nicht wiederholt
+            self.assertEqual((await upstream.get("https://api.pota.app/park/DE-0693")).status_code, 429)
+        finally:
+            await upstream.aclose()
+        self.assertEqual(len(self.requests), 3)
+        self.assertIsNone(UpstreamPool.retry_after(httpx.Response(429, headers={"Retry-After": "bald"})))
+
+    async def test_deadline_includes_wait_for_other_replica(self):
+        backend = MemoryBackend()
+        # Eine andere Instanz hält die Sperre für dieselbe Abfrage
+        await backend.add("flight:pota.park:DE-0693", b"other", ttl=30)
+        self.upstream.deadlines["pota.park"] = 0.05
+        api = POTAAPI(self.upstream, cache=ResponseCache(ttls={"pota.park": 60}, shared=backend))
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            await api.get_park("DE-0693")
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(self.requests, [])
+
+    async def test_serve_stale_while_upstream_down(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttls={"pota.park": 60}, stale_ttl=0, clock=clock)
+        api = POTAAPI(self.upstream, cache=cache)
+        await api.get_park("DE-0693")
+
+        clock.now = 3600
+        self.status = 503
+        stale = STALE_RESULTS.set([])
+        try:
+            for _ in range(2):
+                self.assertEqual((await api.get_park("DE-0693")).name, "DE-0693")
+            self.assertEqual(len(STALE_RESULTS.get()), 2)
+            # mit offenem Breaker wird ohne Anfrage veraltet geantwortet
+            sent = len(self.requests)
+            self.assertEqual((await api.get_park("DE-0693")).name, "DE-0693")
+            self.assertEqual(len(self.requests), sent)
+            self.assertEqual(len(STALE_RESULTS.get()), 3)
+        finally:
+            STALE_RESULTS.reset(stale)
+
+class TestBulkLookups(unittest.IsolatedAsyncioTestCase):
+
+    async def test_gather_limited(self):
+        running = []
+        peak = []
+
+        async def fetch(key):
+            running.append(key)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(key)
+            if key == "B":
+                raise ValueError("kaputt")
+            return key.lower()
+
+        results = await gather_limited(fetch, ["A", "B", "C", "D", "E"], 2)
+        self.assertEqual([key for key, _ in results], ["A", "B", "C", "D", "E"])
+        self.assertEqual(results[0][1], "a")
+        self.assertIsInstance(results[1][1], ValueError)
+        self.assertEqual(max(peak), 2)
+
+    def test_render_park_escapes_catalog_text(self):
+        park = Park("DE-0693", "Bliesgau <Nord> & Süd", (49.1666, 7.2555), "JN39", "JN39nd", "", "", True, "", "DE-SL")
+        self.assertIn("<b>DE-0693 - Bliesgau &lt;Nord&gt; &amp; Süd</b>", POTA.render_park(park))
+
+    def test_render_profile_escapes_park_names(self):
+        park = Park("DE-0693", "Wald & <Heide>", (49.1666, 7.2555), "JN39", "JN39nd", "", "", True, "", "DE-SL")
+        text = POTA.render_profile("dk8ys", POTAProfile("DK8YS", [park]))
+        self.assertIn("DE-0693 - Wald &amp; &lt;Heide&gt;\n", text)
+
+    async def test_pota_park_with_several_references(self):
+        def handler(request: httpx.Request):
+            if request.url.path == "/park/DE-0693":
+                return httpx.Response(200, json=FAKE_PARK)
+            return httpx.Response(404, text="not found")
+
+        upstream = UpstreamPool(transport=httpx.MockTransport(handler))
+        pota = POTA(MagicMock(), Config("config.sample.json"), upstream, ResponseCache())
+        update = SimpleNamespace(message=SimpleNamespace(from_user=SimpleNamespace(username="dk8ys")))
+        replies = []
+
+        async def reply(update, text, **kwargs):
+            replies.append(text)
+        pota.reply = reply
+        try:
+            await pota._pota_park_cmd(update, SimpleNamespace(args=["de-0693", "XX-0001", "DE-0693"]))
+            refs = [f"DE-{i:04d}" for i in range(20)]
+            await pota._pota_park_cmd(update, SimpleNamespace(args=refs))
+        finally:
+            await upstream.aclose()
+
+        self.assertEqual(len(replies), 2)
+        self.assertIn("Park: <b>DE-0693 - Biosphäre Bliesgau</b>", replies[0])
+        self.assertTrue(replies[0].endswith("Park <i>XX-0001</i> nicht gefunden."))
+        self.assertEqual(replies[0].count("DE-0693 - "), 1)
+        self.assertIn("ausgelassen: DE-0010", replies[1])
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
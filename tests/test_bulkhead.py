@@ -0,0 +1,88 @@
+#
+# test/test_bulkhead.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from config import Config
+from programs.bulkhead import Bulkhead
+from programs.program import BUSY_TEXT, Program
+
+class TestBulkhead(unittest.IsolatedAsyncioTestCase):
+
+    async def test_commands_over_budget_rejected(self):
+        bulkhead = Bulkhead("test", max_calls=1, max_commands=2)
+        self.assertTrue(bulkhead.try_enter())
+        self.assertTrue(bulkhead.try_enter())
+        self.assertFalse(bulkhead.try_enter())
+        bulkhead.leave()
+        self.assertTrue(bulkhead.try_enter())
+        self.assertEqual(bulkhead.stats["rejected"], 1)
+        self.assertEqual(bulkhead.stats["commands"], 2)
+
+    async def test_upstream_calls_limited(self):
+        bulkhead = Bulkhead("test", max_calls=2, max_commands=10)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with bulkhead.call():
+                peak = max(peak, bulkhead.in_flight)
+                await asyncio.sleep(0.01)
+
+        calls = asyncio.gather(*(call() for _ in range(5)))
+        await asyncio.sleep(0)
+        self.assertEqual(bulkhead.stats["waiting"], 3)
+        await calls
+        self.assertEqual(peak, 2)
+        self.assertEqual(bulkhead.stats["in_flight"], 0)
+        self.assertEqual(bulkhead.stats["waiting"], 0)
+
+    async def test_from_config(self):
+        config = Config("config.sample.json")
+        self.assertEqual(Bulkhead.from_config(config, "dlbota").max_calls, 4)
+        self.assertEqual(Bulkhead.from_config(config, "pota").max_commands, config.program_max_commands)
+
+    async def test_program_answers_busy(self):
+        program = Program(MagicMock(), bulkhead=Bulkhead("test", max_calls=1, max_commands=1))
+        release = asyncio.Event()
+
+        async def slow(update, context):
+            await release.wait()
+
+        program.register_handler("slow", slow, "Wartet")
+        first = SimpleNamespace(message=SimpleNamespace(reply_text=AsyncMock()))
+        second = SimpleNamespace(message=SimpleNamespace(reply_text=AsyncMock()))
+        running = asyncio.create_task(program.callbacks["slow"](first, None))
+        await asyncio.sleep(0)
+
+        await program.callbacks["slow"](second, None)
+        second.message.reply_text.assert_awaited_once_with(BUSY_TEXT)
+
+        release.set()
+        await running
+        self.assertEqual(program.bulkhead.stats["commands"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+#
+# test/test_cache.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import asyncio
+import unittest
+from programs.cache import ResponseCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.calls = 0
+
+    async def load(self):
+        self.calls += 1
+        return f"value-{self.calls}"
+
+    async def test_hit_and_miss(self):
+        cache = ResponseCache(ttls={"park": 10}, clock=self.clock)
+        self.assertEqual(await cache.get_or_load("park", "DE-0693", self.load), "value-1")
+        self.assertEqual(await cache.get_or_load("park", "DE-0693", self.load), "value-1")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+
+    async def test_stale_while_revalidate(self):
+        cache = ResponseCache(ttls={"park": 10}, stale_ttl=100, clock=self.clock)
+        await cache.get_or_load("park", "DE-0693", self.load)
+        self.clock.now = 20
+        # expired entry is served at once while the refresh runs in the background
+        self.assertEqual(await cache.get_or_load("park", "DE-0693", self.load), "value-1")
+        await asyncio.sleep(0)
+        self.assertEqual(await cache.get_or_load("park", "DE-0693", self.load), "value-2")
+        self.assertEqual(cache.stats["stale_hits"], 1)
+        self.clock.now = 500
+        self.assertEqual(await cache.get_or_load("park", "DE-0693", self.load), "value-3")
+
+    async def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2, clock=self.clock)
+        cache.set("park", "a", "A")
+        cache.set("park", "b", "B")
+        cache.get("park", "a")
+        cache.set("park", "c", "C")
+        self.assertIsNone(cache.get("park", "b"))
+        self.assertEqual(cache.get("park", "a"), "A")
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    async def test_byte_budget(self):
+        cache = ResponseCache(max_bytes=200, clock=self.clock)
+        cache.set("park", "a", "x" * 100)
+        cache.set("park", "b", "y" * 100)
+        self.assertLessEqual(cache.stats["bytes"], 200)
+        self.assertIsNone(cache.get("park", "a"))
+
+    async def test_none_is_not_cached(self):
+        cache = ResponseCache(clock=self.clock)
+
+        async def failing():
+            return None
+
+        self.assertIsNone(await cache.get_or_load("park", "XX-0000", failing))
+        self.assertEqual(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
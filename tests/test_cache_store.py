@@ -0,0 +1,102 @@
+#
+# test/test_cache_store.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import tempfile
+import unittest
+from programs.cache import ResponseCache
+from programs.cache_store import SQLiteCacheStore
+from programs.pota import Park, POTAProfile
+
+def park(name="DE-0693"):
+    return Park(name, "Biosphäre Bliesgau", (49.1666, 7.2555), "JN39", "JN39nd", "DK9JC", "2015-03-08", True, "Biosphere Reserve")
+
+class TestSQLiteCacheStore(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite3")
+        self.now = [1000.0]
+        self.clock = lambda: self.now[0]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_behind_and_expiry(self):
+        store = SQLiteCacheStore(self.path, clock=self.clock)
+        store.put("pota.park", "DE-0693", park(), expires_in=60, stale_ttl=60)
+        store.put("pota.grid", "JN39", [park(), park("DE-0001")], expires_in=60, stale_ttl=60)
+        store.put("pota.profile", "DK8YS", POTAProfile("DK8YS", [park()], 1, 2, 3), expires_in=60, stale_ttl=60)
+        store.put("other", "key", {"not": "a model"}, expires_in=60, stale_ttl=60)
+        self.assertEqual(store.writes, 0)
+        # noch nicht geschriebene Einträge werden aus dem Puffer beantwortet
+        self.assertEqual(store.get("pota.park", "DE-0693")[0], park())
+        store.close()
+
+        store = SQLiteCacheStore(self.path, clock=self.clock)
+        self.assertEqual(store.get("pota.park", "DE-0693"), (park(), 60))
+        self.assertEqual(store.get("pota.grid", "JN39")[0], [park(), park("DE-0001")])
+        self.assertEqual(store.get("pota.profile", "DK8YS")[0].references, [park()])
+        self.assertIsNone(store.get("other", "key"))
+
+        self.now[0] += 90
+        self.assertEqual(store.get("pota.park", "DE-0693")[1], -30)
+        self.now[0] += 60
+        self.assertIsNone(store.get("pota.park", "DE-0693"))
+        store.touch("pota.park", "DE-0693")
+        store.flush()
+        self.assertEqual(store._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0], 0)
+        store.close()
+
+    async def test_restart_starts_warm(self):
+        cache = ResponseCache(ttls={"pota.park": 600}, persistent=SQLiteCacheStore(self.path, clock=self.clock))
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return park()
+
+        await cache.get_or_load("pota.park", "DE-0693", loader)
+        for _ in range(3):
+            await cache.get_or_load("pota.park", "DE-0693", loader)
+        await cache.aclose()
+
+        # Neustart: der meistgenutzte Eintrag wird vorgeladen und mit seiner Restlaufzeit übernommen
+        self.now[0] += 100
+        cache = ResponseCache(ttls={"pota.park": 600}, persistent=SQLiteCacheStore(self.path, clock=self.clock))
+        self.assertEqual(cache.preload(10), 1)
+        self.assertEqual(await cache.get_or_load("pota.park", "DE-0693", loader), park())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.hits, 1)
+        entry = cache._entries[("pota.park", "DE-0693")]
+        self.assertAlmostEqual(entry.expires_at - cache._clock(), 500, delta=1)
+
+        # ohne Vorladen wird der Eintrag beim ersten Fehlzugriff aus der Datei gelesen
+        cache.clear()
+        self.assertEqual(await cache.get_or_load("pota.park", "DE-0693", loader), park())
+        self.assertEqual(cache.persistent_hits, 1)
+        self.assertEqual(len(calls), 1)
+        await cache.aclose()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#
+# test/test_catalog.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import tempfile
+import unittest
+import httpx
+from programs.pota.catalog import ParkCatalog
+from programs.upstream import UpstreamPool
+
+HEADER = '"reference","name","active","entityId","locationDesc","latitude","longitude","grid"\n'
+PARKS_V1 = HEADER + (
+    '"DE-0693","Biosphäre Bliesgau","1","230","DE-SL","49.1666","7.2555","JN39nd"\n'
+    '"DE-0001","Nationalpark Bayerischer Wald","1","230","DE-BY","48.9333","13.4000","JN68sw"\n'
+    '"DE-0100","Pfälzerwald","1","230","DE-RP","49.3500","7.8500","JN39uh"\n'
+)
+PARKS_V2 = HEADER + (
+    '"DE-0693","Biosphärenreservat Bliesgau","1","230","DE-SL","49.1666","7.2555","JN39nd"\n'
+    '"DE-0100","Pfälzerwald","1","230","DE-RP","49.3500","7.8500","JN39uh"\n'
+    '"DE-0200","Saar-Hunsrück","1","230","DE-SL","49.6000","6.9000","JN39lo"\n'
+)
+
+def refuse(request: httpx.Request):
+    raise httpx.ConnectError("connection refused")
+
+class TestParkCatalog(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.payload = PARKS_V1
+        self.tmp = tempfile.TemporaryDirectory()
+        self.upstream = UpstreamPool(transport=httpx.MockTransport(lambda request: httpx.Response(200, text=self.payload)))
+        self.catalog = ParkCatalog(self.upstream, "https://pota.app/all_parks_ext.csv",
+                                   os.path.join(self.tmp.name, "parks.csv"), 3600)
+
+    async def asyncTearDown(self):
+        await self.upstream.aclose()
+        self.tmp.cleanup()
+
+    async def test_sync_and_range(self):
+        self.assertFalse(self.catalog.is_fresh)
+        diff = await self.catalog.sync()
+
+        self.assertEqual(len(diff.added), 3)
+        self.assertTrue(self.catalog.is_fresh)
+        result = self.catalog.snapshot.within(49.17, 7.25, 60)
+        self.assertEqual([park.name for park, _ in result], ["DE-0693", "DE-0100"])
+        self.assertLess(result[0][1], result[1][1])
+
+    async def test_diff_and_swap(self):
+        await self.catalog.sync()
+        old = self.catalog.snapshot
+        self.payload = PARKS_V2
+        diff = await self.catalog.sync()
+
+        self.assertEqual(diff.added, ["DE-0200"])
+        self.assertEqual(diff.removed, ["DE-0001"])
+        self.assertEqual(diff.changed, ["DE-0693"])
+        self.assertIn("DE-0001", old)
+        self.assertNotIn("DE-0001", self.catalog.snapshot)
+
+    async def test_sync_keeps_snapshot_on_errors(self):
+        await self.catalog.sync()
+        upstream = UpstreamPool(transport=httpx.MockTransport(refuse), retries=0)
+        catalog = ParkCatalog(upstream, self.catalog.url, self.catalog.path, 3600)
+        try:
+            self.assertTrue(await catalog.load())
+            with self.assertLogs("programs.catalog", "ERROR"):
+                self.assertIsNone(await catalog.sync())
+        finally:
+            await upstream.aclose()
+        self.assertEqual(len(catalog.snapshot), 3)
+
+    async def test_load_local_copy(self):
+        await self.catalog.sync()
+        catalog = ParkCatalog(self.upstream, self.catalog.url, self.catalog.path, 3600)
+        self.assertTrue(await catalog.load())
+        self.assertEqual(len(catalog.snapshot), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#
+# test/test_dlbota.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+import tempfile
+import unittest
+import httpx
+from programs.dlbota import DLBOTAAPI, BunkerCatalog
+from programs.upstream import UpstreamPool
+
+STATS = {
+    "callsign": "DK8YS",
+    "activator": {"activations": 12, "bunkers": 7, "qsos": 480},
+    "hunter": {"bunkers": 55, "qsos": 90},
+}
+BUNKERS = [
+    {"reference": "B/DL-0005", "name": "Bunker Berlin", "latitude": 52.52, "longitude": 13.40, "active": 1},
+    {"reference": "B/DL-0010", "name": "Bunker Potsdam", "latitude": 52.39, "longitude": 13.06, "active": 0},
+    {"reference": "B/DL-0400", "name": "Bunker Saarbrücken", "latitude": 49.23, "longitude": 7.00},
+]
+
+class TestDLBOTA(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+        def handler(request: httpx.Request):
+            if request.url.path.endswith("/stats.php"):
+                callsign = request.url.params["callsign"]
+                return httpx.Response(200, json=STATS if callsign == "DK8YS" else {"callsign": None})
+            return httpx.Response(200, text=json.dumps(BUNKERS))
+
+        self.upstream = UpstreamPool(transport=httpx.MockTransport(handler))
+
+    async def asyncTearDown(self):
+        await self.upstream.aclose()
+        self.tmp.cleanup()
+
+    async def test_get_profile(self):
+        api = DLBOTAAPI(self.upstream)
+        profile = await api.get_profile("dk8ys")
+
+        self.assertEqual(profile.callsign, "DK8YS")
+        self.assertEqual(profile.activator_bunkers, 7)
+        self.assertEqual(profile.hunter_qsos, 90)
+        self.assertIsNone(await api.get_profile("DL0XXX"))
+
+    async def test_bunkers_range(self):
+        catalog = BunkerCatalog(self.upstream, "https://logs.dlbota.de/api/bunkers.php",
+                                os.path.join(self.tmp.name, "bunkers.json"), 3600)
+        await catalog.sync()
+
+        result = catalog.snapshot.within(52.5, 13.3, 50)
+        self.assertEqual([bunker.name for bunker, _ in result], ["B/DL-0005", "B/DL-0010"])
+        self.assertFalse(result[1][0].active)
+        self.assertEqual(catalog.snapshot.get("B/DL-0400").grid6, "JN39mf")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#
+# test/test_lazy.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import subprocess
+import sys
+import unittest
+from unittest.mock import MagicMock
+from programs.lazy import LazyProgram, ProgramManifest
+from programs.program import INLINE_QUERY, Program
+from programs.startup import StartupReport
+
+class EchoProgram(Program):
+    instances = 0
+
+    def __init__(self, app, prefix):
+        super().__init__(app)
+        EchoProgram.instances += 1
+        self.prefix = prefix
+        self.register_handler("echo", self.echo_cmd, "Echo")
+
+    async def echo_cmd(self, update, context):
+        return f"{self.prefix} {update}"
+
+MANIFEST = ProgramManifest("Echo", EchoProgram.__module__, "EchoProgram", {"echo": "Echo"})
+
+class TestLazyProgram(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        EchoProgram.instances = 0
+        self.app = MagicMock()
+
+    async def test_registers_without_loading(self):
+        lazy = LazyProgram(self.app, MANIFEST, ("echo:",))
+        self.assertFalse(lazy.loaded)
+        self.assertEqual(EchoProgram.instances, 0)
+        self.assertEqual(lazy.help_texts, ["/echo - Echo"])
+        self.app.add_handler.assert_called_once_with(lazy.handlers["echo"])
+
+    async def test_inline_handler(self):
+        manifest = ProgramManifest("Echo", EchoProgram.__module__, "EchoProgram", {"echo": "Echo"}, inline=True)
+        lazy = LazyProgram(self.app, manifest, ("echo:",))
+        self.assertEqual(sorted(lazy.handlers), ["echo", INLINE_QUERY])
+        self.assertEqual(self.app.add_handler.call_count, 2)
+
+    async def test_first_command_loads(self):
+        report = StartupReport()
+        lazy = LazyProgram(self.app, MANIFEST, ("echo:",), report)
+        self.assertEqual(await lazy.handlers["echo"].callback("hallo", None), "echo: hallo")
+        self.assertEqual(await lazy.handlers["echo"].callback("welt", None), "echo: welt")
+        self.assertEqual(EchoProgram.instances, 1)
+        # Nur der Handler des Platzhalters bleibt registriert
+        self.app.remove_handler.assert_called_once_with(lazy.program.handlers["echo"])
+        self.assertEqual([name for name, _, _ in report.phases],
+                         [f"Import {MANIFEST.module}", "Initialisierung EchoProgram"])
+
+    async def test_concurrent_load(self):
+        lazy = LazyProgram(self.app, MANIFEST, ("echo:",))
+        programs = await asyncio.gather(lazy.load(), lazy.load(), lazy.handlers["echo"].callback("x", None))
+        self.assertIs(programs[0], programs[1])
+        self.assertEqual(EchoProgram.instances, 1)
+
+class TestManifests(unittest.TestCase):
+
+    def test_manifest_does_not_import_program(self):
+        code = ("import sys, programs.pota.manifest, programs.dlbota.manifest; "
+                "print(sorted(m for m in ('programs.pota.pota', 'programs.dlbota.dlbota', 'numpy') if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_lazy_package_exports(self):
+        from programs.pota import POTA, Park
+        from programs.pota.pota import POTA as module_pota
+        self.assertIs(POTA, module_pota)
+        self.assertEqual(Park.__name__, "Park")
+        with self.assertRaises(ImportError):
+            from programs.pota import Unknown  # noqa: F401
+
+class TestStartupReport(unittest.TestCase):
+
+    def test_format(self):
+        report = StartupReport(started=0.0)
+        report.add("Importe", 0.25, 0.0)
+        with report.phase("Konfiguration"):
+            pass
+        lines = report.format().splitlines()
+        self.assertTrue(lines[0].startswith("Phase"))
+        self.assertTrue(lines[1].startswith("Importe"))
+        self.assertIn("250.0", lines[1])
+        self.assertTrue(lines[2].startswith("Konfiguration"))
+        self.assertTrue(lines[-1].startswith("Seit Prozessstart"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#
+# test/test_maidenhead.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import unittest
+import numpy as np
+import maidenhead
+import util
+
+class TestMaidenhead(unittest.TestCase):
+
+    def test_encode_precisions(self):
+        self.assertEqual(maidenhead.encode(48.137154, 11.576124, 2), "JN")
+        self.assertEqual(maidenhead.encode(48.137154, 11.576124, 4), "JN58")
+        self.assertEqual(maidenhead.encode(48.137154, 11.576124), "JN58sd")
+        self.assertEqual(maidenhead.encode(48.137154, 11.576124, 8), "JN58sd92")
+        self.assertEqual(len(maidenhead.encode(48.137154, 11.576124, 10)), 10)
+        self.assertEqual(maidenhead.encode(90, 180, 6), "RR99xx")
+        with self.assertRaises(ValueError):
+            maidenhead.encode(48.1, 11.5, 5)
+
+    def test_decode_roundtrip(self):
+        for precision in maidenhead.PRECISIONS:
+            locator = maidenhead.encode(49.1666, 7.2555, precision)
+            lat_min, lon_min, lat_max, lon_max = maidenhead.bounds(locator)
+            self.assertTrue(lat_min <= 49.1666 < lat_max)
+            self.assertTrue(lon_min <= 7.2555 < lon_max)
+            lat, lon = maidenhead.decode(locator.lower())
+            self.assertEqual(maidenhead.encode(lat, lon, precision), locator)
+
+    def test_decode_invalid(self):
+        for locator in ("JN3", "ZZ00", "JNAA", "JN39mz", ""):
+            with self.assertRaises(ValueError):
+                maidenhead.decode(locator)
+
+    def test_util_accepts_all_precisions(self):
+        self.assertEqual(util.maidenhead_locator_to_latlon("JN39"), (49.5, 7.0))
+        lat, lon = util.maidenhead_locator_to_latlon("JN39mf")
+        self.assertAlmostEqual(lat, 49.229166, places=5)
+        self.assertAlmostEqual(lon, 7.041666, places=5)
+
+    def test_arrays(self):
+        rng = np.random.default_rng(2)
+        lats = rng.uniform(-90, 90, 1000)
+        lons = rng.uniform(-180, 180, 1000)
+        locators = maidenhead.encode_array(lats, lons, 8)
+        self.assertEqual([maidenhead.encode(a, b, 8) for a, b in zip(lats, lons)], list(locators))
+        dec_lats, dec_lons = maidenhead.decode_array(list(locators[:500]) + [l[:4] for l in locators[500:]])
+        self.assertEqual(maidenhead.decode(locators[0]), (dec_lats[0], dec_lons[0]))
+        self.assertEqual(maidenhead.decode(locators[999][:4]), (dec_lats[999], dec_lons[999]))
+
+    def test_radius_bounds(self):
+        box = maidenhead.radius_bounds(49.2, 179.9, 50)
+        self.assertGreater(box[1], box[3])
+        mask = maidenhead.in_bounds([49.2, 49.2, 49.2], [179.95, -179.9, 170.0], box)
+        self.assertEqual(list(mask), [True, True, False])
+
+if __name__ == '__main__':
+    unittest.main()
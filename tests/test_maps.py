@@ -0,0 +1,80 @@
+#
+# test/test_maps.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+from types import SimpleNamespace
+from programs.maps import MapRenderer, render_map, split_map_option
+from programs.pota import Park
+
+def park(name, lat, lon):
+    return Park(name, f"Park {name}", (lat, lon), "JN39", "JN39ma", "DK9JC", "2015-03-08", True, "Park")
+
+RESULTS = [(park("DE-0001", 49.25, 7.0), 2.0), (park("DE-0002", 49.4, 6.8), 20.0)]
+
+class FakeMessage:
+    def __init__(self):
+        self.photos = []
+
+    async def reply_photo(self, photo, caption=None, **kwargs):
+        self.photos.append((photo, caption))
+        return SimpleNamespace(photo=[SimpleNamespace(file_id="small"), SimpleNamespace(file_id=f"file-{len(self.photos)}")])
+
+class TestMaps(unittest.IsolatedAsyncioTestCase):
+
+    def test_split_map_option(self):
+        self.assertEqual(split_map_option(["JN39mf", "Karte", "30"]), (["JN39mf", "30"], True))
+        self.assertEqual(split_map_option(["JN39mf"]), (["JN39mf"], False))
+
+    def test_render_map(self):
+        image = render_map("Parks", 49.23, 7.0, 30, [(p.name, *p.coordinates) for p, _ in RESULTS])
+        self.assertTrue(image.startswith(b"\x89PNG"))
+
+    def test_key_depends_on_result_set(self):
+        key = MapRenderer.key("Parks", 49.23, 7.0, 30, RESULTS)
+        self.assertEqual(key, MapRenderer.key("Parks", 49.23, 7.0, 30, list(RESULTS)))
+        self.assertNotEqual(key, MapRenderer.key("Parks", 49.23, 7.0, 30, RESULTS[:1]))
+        self.assertNotEqual(key, MapRenderer.key("Parks", 49.23, 7.0, 50, RESULTS))
+
+    async def test_reply_renders_once_and_reuses_file_id(self):
+        renderer = MapRenderer(workers=1)
+        message = FakeMessage()
+        update = SimpleNamespace(message=message)
+        try:
+            await renderer.reply(None, update, "Parks", 49.23, 7.0, 30, RESULTS)
+            await renderer.reply(None, update, "Parks", 49.23, 7.0, 30, RESULTS)
+        finally:
+            renderer.close()
+
+        self.assertTrue(message.photos[0][0].startswith(b"\x89PNG"))
+        self.assertEqual(message.photos[1], ("file-1", "Parks"))
+        self.assertEqual(renderer.stats, {"renders": 1, "hits": 1, "file_ids": 1})
+
+    def test_file_id_cache_is_bounded(self):
+        renderer = MapRenderer(cache_size=2)
+        for key in ("a", "b", "c"):
+            renderer.remember(key, key.upper())
+        self.assertIsNone(renderer.file_id("a"))
+        self.assertEqual(renderer.file_id("c"), "C")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#
+# test/test_metrics.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import unittest
+from programs.metrics import Registry, Counter, Gauge, Histogram, MetricsServer
+
+class TestMetrics(unittest.TestCase):
+
+    def test_exposition(self):
+        registry = Registry()
+        sent = registry.register(Counter("sent_total", "Sent messages", ("priority",)))
+        queued = registry.register(Gauge("queued", "Queued messages"))
+        latency = registry.register(Histogram("latency_seconds", "Latency", ("command",), buckets=(0.1, 1.0)))
+
+        sent.labels("bulk").inc()
+        sent.labels("bulk").inc(2)
+        queued.labels().set_function(lambda: 7)
+        for value in (0.05, 0.5, 5.0):
+            latency.labels("pota_park").observe(value)
+
+        text = registry.expose()
+        self.assertIn("# TYPE sent_total counter\nsent_total{priority=\"bulk\"} 3.0", text)
+        self.assertIn("queued 7", text)
+        self.assertIn('latency_seconds_bucket{command="pota_park",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{command="pota_park",le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{command="pota_park",le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_count{command="pota_park"} 3', text)
+
+    def test_register_returns_existing(self):
+        registry = Registry()
+        first = registry.register(Counter("calls_total", "Calls"))
+        self.assertIs(registry.register(Counter("calls_total", "Calls")), first)
+        with self.assertRaises(ValueError):
+            registry.register(Gauge("calls_total", "Calls"))
+        with self.assertRaises(ValueError):
+            first.labels("unexpected")
+
+class TestMetricsServer(unittest.IsolatedAsyncioTestCase):
+
+    async def test_serves_metrics(self):
+        registry = Registry()
+        registry.register(Counter("calls_total", "Calls")).inc()
+        server = MetricsServer(0, "127.0.0.1", registry)
+        await server.start()
+        port = server._server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            response = (await reader.read()).decode()
+            writer.close()
+        finally:
+            await server.stop()
+
+        self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+        self.assertIn("calls_total 1.0", response)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+#
+# test/test_models.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import unittest
+from programs.reference import Reference
+from programs.pota import Park, POTAProfile
+from programs.pota.api import POTAAPI
+from programs.dlbota import Bunker, DLBOTAProfile
+from programs.sota import Summit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return json.load(f)
+
+class TestModels(unittest.TestCase):
+
+    def test_slotted(self):
+        park = Park("DE-0693", "Biosphäre Bliesgau", (49.1666, 7.2555), "JN39", "JN39nd", "DK9JC", "2015-03-08", True, "Biosphere Reserve")
+        self.assertFalse(hasattr(park, "__dict__"))
+        with self.assertRaises(AttributeError):
+            park.unknown = 1
+
+    def test_reference_round_trip(self):
+        references = [
+            Reference("DE-0693", "Biosphäre Bliesgau", (49.1666, 7.2555), "JN39", "JN39nd", "DK9JC", "2015-03-08"),
+            Park("DE-0693", "Biosphäre Bliesgau", (49.1666, 7.2555), "JN39", "JN39nd", "DK9JC", "2015-03-08", True, "Biosphere Reserve"),
+            Bunker("B/DL-0005", "Bunker in Berlin", (52.52, 13.405), "JO62", "JO62qm", "", "", False),
+            Summit("DM/SR-006", "Trautzberg", (49.4117, 6.9808), "JN39", "JN39lj", "", "", 6, 0),
+        ]
+        for reference in references:
+            data = reference.to_bytes()
+            self.assertEqual(type(reference).from_bytes(data), reference)
+            self.assertEqual(json.loads(data), json.loads(json.dumps(reference.to_row())))
+
+    def test_profile_from_api_and_round_trip(self):
+        profile = POTAAPI.parse_profile(fixture("profile_dk8ys.json"))
+        self.assertIsInstance(profile, POTAProfile)
+        self.assertEqual(profile.hunter_qsos, 3120)
+        self.assertEqual(len(profile.references), 10)
+        self.assertEqual(POTAProfile.from_bytes(profile.to_bytes()), profile)
+
+        data = profile.to_dict()
+        self.assertEqual(data["callsign"], "DK8YS")
+        self.assertEqual(data["activator_sucessful_parks"], 123)
+        self.assertEqual(data["references"][0]["name"], profile.references[0].name)
+
+        dlbota = DLBOTAProfile.from_api({"callsign": "DK8YS", "activator": {"activations": 1, "bunkers": 2, "qsos": 3},
+                                         "hunter": {"bunkers": 4, "qsos": 5}})
+        self.assertEqual(DLBOTAProfile.from_bytes(dlbota.to_bytes()), dlbota)
+        self.assertEqual(dlbota.to_dict()["hunter_qsos"], 5)
+
+    def test_parks_from_grid_payloads(self):
+        plain = fixture("park_grid_jn39.json")
+        parks = POTAAPI.parse_parks(plain)
+        self.assertEqual(len(parks), len(plain))
+        self.assertEqual(parks[0].coordinates, (plain[0]["latitude"], plain[0]["longitude"]))
+
+        geojson = {"features": [{"properties": plain[0], "geometry": {"coordinates": [plain[0]["longitude"], plain[0]["latitude"]]}}]}
+        self.assertEqual(POTAAPI.parse_parks(geojson), parks[:1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#
+# test/test_outbound.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import datetime
+import unittest
+from telegram.error import RetryAfter
+from programs.outbound import OutboundScheduler, TokenBucket, INTERACTIVE, BULK, split_message
+
+class FakeBot:
+    def __init__(self, failures: dict = None):
+        self.sent = []
+        self.failures = dict(failures or {})
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.failures.get(chat_id):
+            self.failures[chat_id] -= 1
+            raise RetryAfter(datetime.timedelta(milliseconds=50))
+        self.sent.append((chat_id, text))
+        return (chat_id, text)
+
+    async def send_photo(self, chat_id, photo, caption=None, **kwargs):
+        self.sent.append((chat_id, photo, caption))
+        return (chat_id, photo)
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_rate(self):
+        now = [0.0]
+        bucket = TokenBucket(2.0, 2.0, lambda: now[0])
+        self.assertTrue(bucket.take())
+        self.assertTrue(bucket.take())
+        self.assertFalse(bucket.take())
+        self.assertAlmostEqual(bucket.delay(), 0.5)
+        now[0] = 0.5
+        self.assertTrue(bucket.take())
+
+class TestSplitMessage(unittest.TestCase):
+
+    def test_split(self):
+        self.assertEqual(split_message(["a", "b", "c"], "\n\n", limit=5), ["a\n\nb", "c"])
+        self.assertEqual(split_message(["abcdefg", "h"], limit=3), ["abc", "def", "g\nh"])
+        self.assertEqual(split_message([]), [])
+
+class TestOutboundScheduler(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.bot = FakeBot({3: 1})
+        self.scheduler = OutboundScheduler(self.bot, global_rate=1000, chat_rate=1000, chat_burst=1000)
+
+    async def asyncTearDown(self):
+        await self.scheduler.stop()
+
+    async def test_interactive_before_bulk_and_coalescing(self):
+        bulk = [self.scheduler.enqueue(1, f"alert {i}", BULK) for i in range(3)]
+        other = self.scheduler.enqueue(2, "alert", BULK)
+        reply = self.scheduler.enqueue(1, "reply", INTERACTIVE)
+        self.scheduler.start()
+        await asyncio.gather(reply, other, *bulk)
+
+        self.assertEqual(self.bot.sent[0], (1, "reply"))
+        self.assertEqual(sorted(self.bot.sent[1:]), [(1, "alert 0\nalert 1\nalert 2"), (2, "alert")])
+        self.assertEqual(bulk[0].result(), bulk[2].result())
+        self.assertEqual(self.scheduler.coalesced, 2)
+
+    async def test_retry_after_pauses_only_the_chat(self):
+        self.scheduler.start()
+        blocked = self.scheduler.enqueue(3, "first")
+        await asyncio.sleep(0.01)
+        self.assertEqual(await self.scheduler.send(4, "other"), (4, "other"))
+        self.assertEqual(await blocked, (3, "first"))
+        self.assertEqual(self.bot.sent, [(4, "other"), (3, "first")])
+        self.assertEqual(self.scheduler.retries, 1)
+
+    async def test_photo_is_not_coalesced(self):
+        self.scheduler.start()
+        text = self.scheduler.enqueue(1, "alert", BULK)
+        photo = self.scheduler.enqueue(1, "Karte", BULK, "send_photo", photo=b"png")
+        await asyncio.gather(text, photo)
+        self.assertEqual(self.bot.sent, [(1, "alert"), (1, b"png", "Karte")])
+        self.assertEqual(self.scheduler.coalesced, 0)
+
+if __name__ == '__main__':
+    unittest.main()
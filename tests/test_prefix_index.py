@@ -0,0 +1,69 @@
+#
+# test/test_prefix_index.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+import unittest
+from programs.prefix_index import PrefixIndex, normalize
+
+CODES = ["DE-0693", "DE-0100", "DE-0601", "K-0001", "DE-0610"]
+NAMES = ["Biosphäre Bliesgau", "Pfälzerwald", "Naturpark Saar-Hunsrück", "Acadia National Park", "Naturpark Südeifel"]
+
+class TestPrefixIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PrefixIndex(CODES, NAMES)
+
+    def names(self, query, limit=20):
+        return [CODES[i] for i in self.index.search(query, limit)]
+
+    def test_normalize(self):
+        self.assertEqual(normalize("Pfälzerwald"), "pfalzerwald")
+        self.assertEqual(normalize("Straße"), "strasse")
+
+    def test_code_prefix(self):
+        self.assertEqual(self.names("DE-06"), ["DE-0601", "DE-0610", "DE-0693"])
+        self.assertEqual(self.names("de-0693"), ["DE-0693"])
+        self.assertEqual(self.names("0100"), ["DE-0100"])
+
+    def test_name_words(self):
+        self.assertEqual(self.names("Bliesgau"), ["DE-0693"])
+        self.assertEqual(self.names("biosphare"), ["DE-0693"])
+        self.assertEqual(self.names("pfälz"), ["DE-0100"])
+        self.assertEqual(self.names("natur sud"), ["DE-0610"])
+        self.assertEqual(self.names("hunsruck naturpark"), ["DE-0601"])
+
+    def test_limit_and_empty(self):
+        self.assertEqual(self.names("naturpark", limit=1), ["DE-0601"])
+        self.assertEqual(self.names("   "), [])
+        self.assertEqual(self.names("xyz"), [])
+
+    def test_large_catalog_is_fast(self):
+        codes = [f"{prefix}-{i:04d}" for prefix in ("DE", "US", "K", "F") for i in range(5000)]
+        index = PrefixIndex(codes, [f"Park Nummer {i} am See" for i in range(len(codes))])
+        start = time.perf_counter()
+        for query in ("DE-06", "US-12", "see park", "nummer 4711"):
+            self.assertTrue(index.search(query))
+        self.assertLess((time.perf_counter() - start) / 4, 0.01)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#
+# test/test_profiling.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+from programs.program import Program
+from programs.profiling import CommandProfiler
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+class SlowProgram(Program):
+    def __init__(self, app):
+        super().__init__(app)
+        self.register_handler("slow", self.slow_cmd, "Langsamer Befehl")
+
+    async def slow_cmd(self, update, context):
+        busy(0.03)
+        await asyncio.sleep(0.03)
+        return "ok"
+
+class TestCommandProfiler(unittest.IsolatedAsyncioTestCase):
+
+    async def test_collapsed_stacks(self):
+        program = SlowProgram(MagicMock())
+        original = program.handlers["slow"].callback
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = CommandProfiler([program], sample_rate=1.0, interval=0.001, output_dir=tmp)
+            profiler.enable()
+            self.assertIsNot(program.handlers["slow"].callback, original)
+            self.assertEqual(await program.handlers["slow"].callback(None, None), "ok")
+            profiler.disable()
+            self.assertIs(program.handlers["slow"].callback, original)
+
+            collapsed = profiler.collapsed()
+            self.assertIn("slow;programs.program.Program._instrument.<locals>.instrumented;", collapsed)
+            self.assertIn("SlowProgram.slow_cmd;", collapsed)
+            self.assertIn("test_profiling.busy", collapsed)
+            self.assertIn("[await Future]", collapsed)
+            self.assertGreater(profiler.samples["slow"], 10)
+
+            paths = profiler.dump()
+            self.assertEqual(len(paths), 1)
+            self.assertTrue(os.path.basename(paths[0]).startswith("slow-"))
+
+    async def test_not_sampled(self):
+        program = SlowProgram(MagicMock())
+        profiler = CommandProfiler([program], sample_rate=0.0, interval=0.001)
+        profiler.enable()
+        await program.handlers["slow"].callback(None, None)
+        profiler.disable()
+        self.assertEqual(profiler.samples, {})
+
+if __name__ == '__main__':
+    unittest.main()
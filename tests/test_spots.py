@@ -0,0 +1,92 @@
+#
+# test/test_spots.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import unittest
+import httpx
+from programs.upstream import UpstreamPool
+from programs.pota.spots import SpotPoller
+
+def spot(spot_id, activator, reference, frequency="14285"):
+    return {"spotId": spot_id, "activator": activator, "frequency": frequency, "mode": "SSB",
+            "reference": reference, "parkName": "Park", "spotTime": "2025-06-01T12:00:00",
+            "spotter": "DL1XYZ", "comments": "", "locationDesc": "DE-SL", "grid6": "JN39nd",
+            "latitude": 49.1666, "longitude": 7.2555}
+
+class TestSpotPoller(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.payload = [spot(1, "DK8YS", "DE-0693"), spot(2, "DL2ABC", "DE-0001")]
+        self.etag = '"v1"'
+        self.requests = []
+
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            if request.headers.get("If-None-Match") == self.etag:
+                return httpx.Response(304)
+            return httpx.Response(200, json=self.payload, headers={"ETag": self.etag})
+
+        self.pool = UpstreamPool(transport=httpx.MockTransport(handler))
+        self.poller = SpotPoller(self.pool)
+        self.received = []
+        self.poller.add_consumer(self.received.append)
+
+    async def asyncTearDown(self):
+        await self.pool.aclose()
+
+    async def test_incremental_changes(self):
+        changes = await self.poller.poll()
+        self.assertEqual([s.spot_id for s in changes.new], [1, 2])
+
+        # unchanged list is answered with 304 and emits nothing
+        changes = await self.poller.poll()
+        self.assertFalse(changes)
+        self.assertEqual(self.requests[-1].headers["If-None-Match"], '"v1"')
+        self.assertEqual(self.poller.not_modified, 1)
+
+        self.payload = [spot(1, "DK8YS", "DE-0693", "7144"), spot(3, "DL3DEF", "DE-0100")]
+        self.etag = '"v2"'
+        changes = await self.poller.poll()
+        self.assertEqual([s.spot_id for s in changes.new], [3])
+        self.assertEqual([s.frequency for s in changes.changed], ["7144"])
+        self.assertEqual([s.spot_id for s in changes.expired], [2])
+        self.assertEqual(sorted(self.poller.spots), [1, 3])
+        self.assertEqual(len(self.received), 2)
+
+    async def test_upstream_errors_are_logged(self):
+        def handler(request: httpx.Request):
+            raise httpx.ConnectError("connection refused")
+
+        pool = UpstreamPool(transport=httpx.MockTransport(handler), retries=0, failure_threshold=1)
+        poller = SpotPoller(pool)
+        try:
+            with self.assertLogs("programs.pota.spots", "ERROR"):
+                self.assertFalse(await poller.poll())
+            # mit offenem Breaker
+            with self.assertLogs("programs.pota.spots", "ERROR"):
+                self.assertFalse(await poller.poll())
+        finally:
+            await pool.aclose()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,287 @@
+#
+# test/test_state.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from programs.cache import ResponseCache
+from programs.pota.alerts import SpotAlerts
+from programs.pota.park import Park
+from programs.pota.spots import SpotChanges
+from programs.pota.spot import Spot
+from programs.singleflight import SingleFlight
+from programs.state import Lease, MemoryBackend, RedisBackend, SQLiteBackend, open_backend
+from programs.subscriptions import SubscriptionStore
+
+class RedisStandIn:
+    """
+    Minimal server speaking the Redis protocol for the commands used by RedisBackend.
+    """
+    def __init__(self):
+        self.values: dict[bytes, tuple[bytes, float]] = {}
+        self.hashes: dict[bytes, dict[bytes, bytes]] = {}
+        self.server: asyncio.AbstractServer = None
+        self.port = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self.execute(args))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def get(self, key: bytes) -> bytes:
+        item = self.values.get(key)
+        if item is None or time.monotonic() >= item[1]:
+            self.values.pop(key, None)
+            return None
+        return item[0]
+
+    def execute(self, args: list[bytes]) -> bytes:
+        command = args[0].upper()
+        if command in (b"PING", b"AUTH", b"SELECT"):
+            return b"+OK\r\n"
+        if command == b"GET":
+            return bulk(self.get(args[1]))
+        if command == b"SET":
+            options = [arg.upper() for arg in args[3:]]
+            if b"NX" in options and self.get(args[1]) is not None:
+                return b"$-1\r\n"
+            expires_at = float("inf")
+            if b"PX" in options:
+                expires_at = time.monotonic() + int(options[options.index(b"PX") + 1]) / 1000
+            self.values[args[1]] = (args[2], expires_at)
+            return b"+OK\r\n"
+        if command == b"DEL":
+            return b":%d\r\n" % (self.values.pop(args[1], None) is not None)
+        if command == b"INCR":
+            value = int(self.get(args[1]) or 0) + 1
+            self.values[args[1]] = (b"%d" % value, float("inf"))
+            return b":%d\r\n" % value
+        if command == b"HSET":
+            self.hashes.setdefault(args[1], {})[args[2]] = args[3]
+            return b":1\r\n"
+        if command == b"HDEL":
+            return b":%d\r\n" % (self.hashes.get(args[1], {}).pop(args[2], None) is not None)
+        if command == b"HGETALL":
+            items = [part for item in self.hashes.get(args[1], {}).items() for part in item]
+            return b"*%d\r\n" % len(items) + b"".join(bulk(item) for item in items)
+        return b"-ERR unknown command\r\n"
+
+def bulk(value: bytes) -> bytes:
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+class BackendContract:
+    """
+    Tests every backend has to pass; subclasses create the backend.
+    """
+    async def test_get_set_delete(self):
+        self.assertIsNone(await self.backend.get("a"))
+        await self.backend.set("a", b"1")
+        self.assertEqual(await self.backend.get("a"), b"1")
+        await self.backend.delete("a", b"2")
+        self.assertEqual(await self.backend.get("a"), b"1")
+        await self.backend.delete("a", b"1")
+        self.assertIsNone(await self.backend.get("a"))
+
+    async def test_ttl_and_add(self):
+        self.assertTrue(await self.backend.add("lock", b"x", ttl=0.05))
+        self.assertFalse(await self.backend.add("lock", b"y", ttl=0.05))
+        await asyncio.sleep(0.1)
+        self.assertIsNone(await self.backend.get("lock"))
+        self.assertTrue(await self.backend.add("lock", b"y", ttl=10))
+
+    async def test_incr(self):
+        self.assertEqual(await self.backend.incr("version"), 1)
+        self.assertEqual(await self.backend.incr("version"), 2)
+        self.assertEqual(await self.backend.get("version"), b"2")
+
+    async def test_hash(self):
+        await self.backend.hset("subs", "1:call:DK8YS", b"a")
+        await self.backend.hset("subs", "2:ref:DE-0693", b"b")
+        await self.backend.hdel("subs", "1:call:DK8YS")
+        self.assertEqual(await self.backend.hgetall("subs"), {"2:ref:DE-0693": b"b"})
+        self.assertEqual(await self.backend.hgetall("missing"), {})
+
+class TestMemoryBackend(BackendContract, unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.backend = MemoryBackend()
+
+class TestSQLiteBackend(BackendContract, unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.backend = open_backend("sqlite:state.sqlite3", self.tmp.name)
+        self.assertIsInstance(self.backend, SQLiteBackend)
+
+    async def asyncTearDown(self):
+        await self.backend.close()
+        self.tmp.cleanup()
+
+    async def test_shared_between_connections(self):
+        other = SQLiteBackend(os.path.join(self.tmp.name, "state.sqlite3"))
+        self.assertTrue(await self.backend.add("lock", b"a", ttl=10))
+        self.assertFalse(await other.add("lock", b"b", ttl=10))
+        await other.close()
+
+class TestRedisBackend(BackendContract, unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = RedisStandIn()
+        await self.server.start()
+        self.backend = open_backend(f"redis://:secret@127.0.0.1:{self.server.port}/1")
+        self.assertIsInstance(self.backend, RedisBackend)
+        self.assertEqual((self.backend.db, self.backend.password), (1, "secret"))
+
+    async def asyncTearDown(self):
+        await self.backend.close()
+        await self.server.stop()
+
+    async def test_reconnect(self):
+        await self.backend.set("a", b"1")
+        self.backend._writer.close()
+        self.assertEqual(await self.backend.get("a"), b"1")
+
+class TestReplicas(unittest.IsolatedAsyncioTestCase):
+
+    async def test_open_backend(self):
+        self.assertIsNone(open_backend(""))
+        self.assertIsInstance(open_backend("memory:"), MemoryBackend)
+        with self.assertRaises(ValueError):
+            open_backend("etcd://localhost")
+
+    async def test_lease(self):
+        backend = MemoryBackend()
+        first, second = Lease(backend, "alerts", 10, "a"), Lease(backend, "alerts", 10, "b")
+        self.assertTrue(await first.acquire())
+        self.assertFalse(await second.acquire())
+        self.assertTrue(await first.acquire())
+        await first.release()
+        self.assertTrue(await second.acquire())
+
+    async def test_caches_share_hits(self):
+        backend = MemoryBackend()
+        park = Park("DE-0693", "Biosphäre Bliesgau", (49.1666, 7.2555), "JN39", "JN39nd", "DK9JC", "2015-03-08", True, "Biosphere Reserve")
+        replicas = [ResponseCache(ttls={"pota.park": 60}, shared=backend) for _ in range(2)]
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            return park
+
+        self.assertEqual(await replicas[0].get_or_load("pota.park", "DE-0693", load), park)
+        self.assertEqual(await replicas[1].get_or_load("pota.park", "DE-0693", load), park)
+        self.assertEqual(calls, 1)
+        self.assertEqual(replicas[1].stats["shared_hits"], 1)
+        self.assertEqual(replicas[1].get("pota.park", "DE-0693"), park)
+
+    async def test_single_flight_across_replicas(self):
+        backend = MemoryBackend()
+        flights = [SingleFlight(backend, poll_interval=0.01) for _ in range(2)]
+        shared = {}
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            shared["result"] = "DE-0693"
+            return "DE-0693"
+
+        async def recheck():
+            return shared.get("result")
+
+        results = await asyncio.gather(*(flight.do(("park", "DE-0693"), fetch, recheck) for flight in flights))
+        self.assertEqual(results, ["DE-0693", "DE-0693"])
+        self.assertEqual(calls, 1)
+        self.assertEqual(flights[1].stats["remote_waits"], 1)
+        self.assertIsNone(await backend.get("flight:park:DE-0693"))
+
+    async def test_subscriptions_shared_and_single_alerting_replica(self):
+        backend = MemoryBackend()
+        replicas = []
+        for name in ("a", "b"):
+            app = MagicMock()
+            app.bot.send_message = AsyncMock()
+            replicas.append(SpotAlerts(app, 10, 600, store=SubscriptionStore(backend, "pota:subscriptions"),
+                                       lease=Lease(backend, "pota_alerts", 180, name)))
+
+        update = SimpleNamespace(effective_chat=SimpleNamespace(id=1), message=SimpleNamespace(reply_text=AsyncMock()))
+        await replicas[0].subscribe_cmd(update, SimpleNamespace(args=["call", "DK8YS"]))
+        await replicas[1].subscriptions_cmd(update, SimpleNamespace(args=[]))
+        self.assertIn("call DK8YS", update.message.reply_text.await_args.args[0])
+
+        changes = SpotChanges(new=[Spot(1, "DK8YS", "14285", "SSB", "DE-0693", "Park", "2025-06-01T12:00:00",
+                                        "DL1XYZ", "", "DE-SL", "JN39nd", (49.1666, 7.2555))])
+        for alerts in replicas:
+            await alerts.on_spots(changes)
+        self.assertEqual(replicas[0].app.bot.send_message.await_count, 1)
+        self.assertEqual(replicas[1].app.bot.send_message.await_count, 0)
+
+        await replicas[1].unsubscribe_cmd(update, SimpleNamespace(args=["all"]))
+        await replicas[0].sync()
+        self.assertEqual(len(replicas[0].engine), 0)
+
+    async def test_subscriptions_reloaded_only_after_changes(self):
+        backend = MemoryBackend()
+        store = SubscriptionStore(backend, "pota:subscriptions")
+        alerts = SpotAlerts(MagicMock(), 10, 600, store=store)
+        other = SubscriptionStore(backend, "pota:subscriptions")
+        backend.hgetall = AsyncMock(wraps=backend.hgetall)
+
+        update = SimpleNamespace(effective_chat=SimpleNamespace(id=1), message=SimpleNamespace(reply_text=AsyncMock()))
+        await alerts.subscribe_cmd(update, SimpleNamespace(args=["call", "DK8YS"]))
+        await alerts.sync()
+        await alerts.sync()
+        self.assertEqual(backend.hgetall.await_count, 1)
+
+        await other.save(alerts.engine.create(2, "ref", "DE-0693"))
+        await alerts.sync()
+        await alerts.sync()
+        self.assertEqual(backend.hgetall.await_count, 2)
+        self.assertEqual(len(alerts.engine), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#
+# test/test_store.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import tempfile
+import unittest
+from dataclasses import dataclass
+from programs.reference import Reference
+from programs.catalog import ColumnarSnapshot
+from programs.dlbota.bunker import Bunker
+from programs.pota.park import Park
+from programs.sota.summit import Summit
+from programs.store import ReferenceStore
+
+PARKS = [
+    Park("DE-0693", "Biosphäre Bliesgau", (49.1666, 7.2555), "JN39", "JN39nd", "DK9JC", "2015-03-08", True, "Biosphere Reserve"),
+    Park("DE-0100", "Pfälzerwald", (49.35, 7.85), "JN39", "JN39uh", "", "", False, "Biosphere Reserve"),
+    Park("K-0001", "Acadia National Park", (44.31, -68.2034), "FN54", "FN54vh", "W1AW", "2017-01-01", True, "National Park"),
+]
+
+class TestReferenceStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "parks.refs")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip(self):
+        ReferenceStore.write(self.path, PARKS, Park)
+        store = ReferenceStore.open(self.path, Park)
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual([store.row(i) for i in range(3)], PARKS)
+        self.assertEqual(store.names, ["DE-0693", "DE-0100", "K-0001"])
+        # interned park types
+        self.assertEqual(len(store._tables["park_type"]), 2)
+
+    def test_column(self):
+        ReferenceStore.write(self.path, PARKS, Park)
+        snapshot = ColumnarSnapshot(ReferenceStore.open(self.path, Park))
+        self.assertEqual(snapshot.column("description"), [park.description for park in PARKS])
+        self.assertEqual(snapshot.column("active"), [True, False, True])
+
+    def test_fields_added_later_get_their_default(self):
+        @dataclass(slots=True)
+        class Park(Reference):
+            active: bool
+            park_type: str
+
+        ReferenceStore.write(self.path, [Park(*PARKS[0].to_row()[:-1])], Park)
+        store = ReferenceStore.open(self.path, type(PARKS[0]))
+        self.assertEqual(store.row(0), PARKS[0])
+        self.assertEqual(store.column("location"), [""])
+
+    def test_other_reference_types(self):
+        summits = [Summit("DM/SR-006", "Trautzberg", (49.3, 7.1), "JN39", "JN39mh", "", "", 6, 3)]
+        bunkers = [Bunker("B/DL-0005", "Bunker Berlin", (52.52, 13.4), "JO62", "JO62qm", "", "", False)]
+        ReferenceStore.write(self.path, summits, Summit)
+        self.assertEqual(ReferenceStore.open(self.path, Summit).row(0), summits[0])
+        ReferenceStore.write(self.path, bunkers, Bunker)
+        self.assertEqual(ReferenceStore.open(self.path, Bunker).row(0), bunkers[0])
+        with self.assertRaises(ValueError):
+            ReferenceStore.open(self.path, Park)
+
+    def test_snapshot_and_replace(self):
+        ReferenceStore.write(self.path, PARKS, Park)
+        snapshot = ColumnarSnapshot(ReferenceStore.open(self.path, Park))
+        ReferenceStore.write(self.path, PARKS[:1], Park)
+
+        # the old mapping stays valid after the file was replaced
+        self.assertEqual(snapshot.get("K-0001"), PARKS[2])
+        self.assertEqual([park.name for park, _ in snapshot.within(49.2, 7.3, 50)], ["DE-0693", "DE-0100"])
+        self.assertEqual(len(ReferenceStore.open(self.path, Park)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#
+# test/test_subscriptions.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from programs.subscriptions import SubscriptionEngine, normalize_callsign
+from programs.pota.alerts import SpotAlerts
+from programs.pota.spots import SpotChanges
+from programs.pota.spot import Spot
+
+def spot(spot_id, activator, reference, location="DE-SL", coordinates=(49.1666, 7.2555)):
+    return Spot(spot_id, activator, "14285", "SSB", reference, "Park", "2025-06-01T12:00:00",
+                "DL1XYZ", "", location, "JN39nd", coordinates)
+
+class TestSubscriptionEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = SubscriptionEngine()
+
+    def test_normalize_callsign(self):
+        self.assertEqual(normalize_callsign("dl/dk8ys/p"), "DK8YS")
+        self.assertEqual(normalize_callsign("DK8YS"), "DK8YS")
+
+    def test_match_kinds(self):
+        call = self.engine.create(1, "call", "dk8ys")
+        ref = self.engine.create(2, "ref", "de-0693")
+        prefix = self.engine.create(3, "prefix", "DE-")
+        region = self.engine.create(4, "prefix", "DE-BY")
+        grid = self.engine.create(5, "grid", "JN39", 50)
+        for subscription in (call, ref, prefix, region, grid):
+            self.assertTrue(self.engine.add(subscription))
+        self.assertFalse(self.engine.add(call))
+
+        self.assertEqual(self.engine.match("DK8YS/P", "DE-0693", ("DE-SL",), (49.1666, 7.2555)),
+                         {call, ref, prefix, grid})
+        self.assertEqual(self.engine.match("DL2ABC", "DE-0001", ("DE-BY",), (48.1, 11.5)), {prefix, region})
+        self.assertEqual(self.engine.match("K1ABC", "US-0001", ("US-CA",), (37.0, -120.0)), set())
+
+    def test_grid_radius_across_buckets(self):
+        # JN39mf liegt nahe 49.2N 7.0E, der Radius reicht über mehrere Zellen
+        grid = self.engine.create(1, "grid", "JN39mf", 150)
+        self.engine.add(grid)
+        self.assertEqual(self.engine.match(coordinates=(50.1, 8.6)), {grid})
+        self.assertEqual(self.engine.match(coordinates=(52.5, 13.4)), set())
+
+    def test_remove(self):
+        grid = self.engine.create(1, "grid", "JN39", 50)
+        prefix = self.engine.create(1, "prefix", "DE-")
+        self.engine.add(grid)
+        self.engine.add(prefix)
+        self.assertTrue(self.engine.remove(prefix))
+        self.assertFalse(self.engine.remove(prefix))
+        self.assertEqual(self.engine.match("", "DE-0001", (), (49.5, 7.0)), {grid})
+        self.assertEqual(self.engine.remove_chat(1), 1)
+        self.assertEqual(len(self.engine), 0)
+        self.assertEqual(self.engine.match("", "DE-0001", (), (49.5, 7.0)), set())
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.engine.create(1, "park", "DE-0001")
+        with self.assertRaises(ValueError):
+            self.engine.create(1, "grid", "ZZ99", 50)
+        with self.assertRaises(ValueError):
+            self.engine.create(1, "grid", "JN39", 5000)
+
+class TestSpotAlerts(unittest.IsolatedAsyncioTestCase):
+
+    async def test_one_message_per_chat_with_cooldown(self):
+        app = MagicMock()
+        app.bot.send_message = AsyncMock()
+        alerts = SpotAlerts(app, max_subscriptions=10, cooldown=600)
+        alerts.engine.add(alerts.engine.create(1, "prefix", "DE-"))
+        alerts.engine.add(alerts.engine.create(1, "call", "DK8YS"))
+        alerts.engine.add(alerts.engine.create(2, "ref", "US-0001"))
+
+        await alerts.on_spots(SpotChanges(new=[spot(1, "DK8YS", "DE-0693"), spot(2, "DL2ABC", "DE-0001")]))
+        self.assertEqual(app.bot.send_message.await_count, 1)
+        self.assertEqual(app.bot.send_message.await_args.kwargs["chat_id"], 1)
+        self.assertIn("DL2ABC", app.bot.send_message.await_args.kwargs["text"])
+
+        # dieselben Aktivierer im selben Park werden innerhalb der Sperrzeit nicht erneut gemeldet
+        await alerts.on_spots(SpotChanges(new=[spot(3, "DK8YS", "DE-0693")]))
+        self.assertEqual(app.bot.send_message.await_count, 1)
+
+    async def test_alert_escaped_and_failed_delivery_logged(self):
+        outbound = MagicMock()
+        future = asyncio.get_running_loop().create_future()
+        outbound.enqueue.return_value = future
+        alerts = SpotAlerts(MagicMock(), max_subscriptions=10, cooldown=600, outbound=outbound)
+        alerts.engine.add(alerts.engine.create(1, "call", "DK8YS"))
+        park_spot = spot(1, "DK8YS", "DE-0693")
+        park_spot.park_name = "Wald & <Heide>"
+
+        await alerts.on_spots(SpotChanges(new=[park_spot]))
+        self.assertIn("(Wald &amp; &lt;Heide&gt;)", outbound.enqueue.call_args.args[1])
+        with self.assertLogs("programs.pota.alerts", "ERROR"):
+            future.set_exception(RuntimeError("Bad Request"))
+            await asyncio.sleep(0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#
+# test/test_trigram_index.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+from config import Config
+from programs.catalog import ReferenceSnapshot
+from programs.pota import POTA, Park
+from programs.trigram_index import TrigramIndex, trigrams
+
+def park(name, description, location):
+    return Park(name, description, (49.2, 7.0), "JN39", "JN39mf", "", "", True, "", location)
+
+PARKS = [
+    park("DE-0693", "Biosphäre Bliesgau", "DE-SL"),
+    park("DE-0100", "Naturpark Pfälzerwald", "DE-RP"),
+    park("DE-0038", "Naturpark Saar-Hunsrück", "DE-SL,DE-RP"),
+    park("DE-0610", "Naturpark Südeifel", "DE-RP"),
+]
+
+class TestTrigramIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TrigramIndex()
+        for p in PARKS:
+            self.index.add(p.name, f"{p.description} {p.location}")
+        self.index.compact()
+
+    def keys(self, query):
+        return [key for key, _ in self.index.search(query)]
+
+    def test_trigrams(self):
+        self.assertEqual(trigrams("Au"), {"  a", " au", "au "})
+        self.assertEqual(trigrams("Pfälz"), trigrams("pfalz"))
+
+    def test_typos(self):
+        self.assertEqual(self.keys("Bliesgau")[0], "DE-0693")
+        self.assertEqual(self.keys("Blisegau")[0], "DE-0693")
+        self.assertEqual(self.keys("Plälzerwald")[0], "DE-0100")
+        self.assertEqual(self.keys("hunsrueck")[0], "DE-0038")
+        self.assertEqual(self.keys("xyz"), [])
+
+    def test_ranking(self):
+        result = self.index.search("Naturpark Südeifel")
+        self.assertEqual(result[0], ("DE-0610", 1.0))
+        self.assertEqual({key for key, _ in result[1:]}, {"DE-0100", "DE-0038"})
+
+    def test_incremental_updates(self):
+        self.index.remove("DE-0693")
+        self.index.add("DE-0100", "Naturpark Pfälzerwald Biosphärenreservat DE-RP")
+        self.index.add("DE-0999", "Bliesgau Nord DE-SL")
+        # vor compact() über die ausstehenden Postings
+        self.assertEqual(self.keys("Bliesgau"), ["DE-0999"])
+        self.assertEqual(self.keys("biospharenreservat")[0], "DE-0100")
+        self.index.compact()
+        self.assertEqual(self.keys("Bliesgau"), ["DE-0999"])
+        self.assertEqual(len(self.index), 4)
+        self.assertNotIn("DE-0693", self.index)
+
+    def test_compact_renumbers_documents(self):
+        for i in range(100):
+            self.index.add("DE-0100", f"Naturpark Pfälzerwald {i}")
+            self.index.compact()
+        self.assertLessEqual(len(self.index._keys), 2 * len(PARKS))
+        self.assertEqual(len(self.index._sizes), 1024)
+        self.assertEqual(self.keys("Bliesgau"), ["DE-0693"])
+        self.assertEqual(self.keys("Pfälzerwald 99")[0], "DE-0100")
+        self.assertEqual(self.keys("Südeifel")[0], "DE-0610")
+
+class TestPOTASearch(unittest.IsolatedAsyncioTestCase):
+
+    async def test_index_follows_catalog(self):
+        pota = POTA(MagicMock(), Config("config.sample.json"), MagicMock())
+        first = ReferenceSnapshot(PARKS)
+        pota._on_catalog(ReferenceSnapshot([]).diff(first), first)
+        await pota._fuzzy_task
+        self.assertEqual(pota.fuzzy.search("Bliesgau")[0][0], "DE-0693")
+
+        second = ReferenceSnapshot(PARKS[1:] + [park("DE-0999", "Bliesgau Nord", "DE-SL")])
+        fuzzy = pota.fuzzy
+        pota._on_catalog(first.diff(second), second)
+        await asyncio.gather(pota._fuzzy_task, pota._index_task)
+        self.assertIs(pota.fuzzy, fuzzy)
+        self.assertEqual([key for key, _ in pota.fuzzy.search("Bliesgau")], ["DE-0999"])
+
+        parks = [second.get(key) for key, _ in pota.fuzzy.search("Bliesgau")]
+        self.assertIn("DE-0999 - Bliesgau Nord (DE-SL)", POTA.render_search("<Bliesgau>", parks))
+        self.assertIn("&lt;Bliesgau&gt;", POTA.render_search("<Bliesgau>", parks))
+        self.assertIn("DE-0001 - Park &lt;A&amp;B&gt; (DE-&lt;X&gt;)", POTA.render_search("A", [park("DE-0001", "Park <A&B>", "DE-<X>")]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+#
+# test/test_updates.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import datetime
+import unittest
+from telegram import Chat, Message, Update
+from programs.updates import ChatOrderedUpdateProcessor
+
+def update(update_id, chat_id):
+    message = Message(update_id, datetime.datetime.now(), Chat(chat_id, Chat.PRIVATE), text="/pota_spots")
+    return Update(update_id, message=message)
+
+class TestChatOrderedUpdateProcessor(unittest.IsolatedAsyncioTestCase):
+
+    async def test_order_per_chat_and_worker_bound(self):
+        processor = ChatOrderedUpdateProcessor(workers=3)
+        running = []
+        peak = [0]
+        finished = []
+
+        async def handle(u: Update, delay: float):
+            running.append(u.effective_chat.id)
+            peak[0] = max(peak[0], len(running))
+            # es darf nie zwei gleichzeitige Updates desselben Chats geben
+            self.assertEqual(running.count(u.effective_chat.id), 1)
+            await asyncio.sleep(delay)
+            running.remove(u.effective_chat.id)
+            finished.append(u.update_id)
+
+        updates = [update(1, 1), update(2, 1), update(3, 2), update(4, 3), update(5, 4), update(6, 1)]
+        # das erste Update von Chat 1 ist langsam, die späteren dürfen es nicht überholen
+        delays = {1: 0.05, 2: 0.0, 6: 0.0}
+        async with processor:
+            await asyncio.gather(*(processor.process_update(u, handle(u, delays.get(u.update_id, 0.01)))
+                                   for u in updates))
+
+        self.assertLess(finished.index(1), finished.index(2))
+        self.assertLess(finished.index(2), finished.index(6))
+        self.assertLess(finished.index(3), finished.index(1))
+        self.assertEqual(peak[0], 3)
+        self.assertEqual(processor._chats, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#
+# test/test_util.py - This file is part of DF-TG-Bot
+#
+# Copyright (c) 2025 Yannick Seibert. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import unittest
+import numpy as np
+import util
+
+class TestDistances(unittest.TestCase):
+
+    def test_batch_matches_scalar(self):
+        rng = np.random.default_rng(1)
+        lats = rng.uniform(-90, 90, 500)
+        lons = rng.uniform(-180, 180, 500)
+        batch = util.haversine_distances(49.2, 7.2, lats, lons)
+        for i in range(len(lats)):
+            self.assertAlmostEqual(batch[i], util.haversine_distance(49.2, 7.2, lats[i], lons[i]), places=6)
+
+    def test_nearest_k(self):
+        distances = np.array([50.0, 3.0, 12.0, 80.0, 1.0, 7.0])
+        self.assertEqual(list(util.nearest_k(distances, 3)), [4, 1, 5])
+        self.assertEqual(list(util.nearest_k(distances, 10, 20)), [4, 1, 5, 2])
+        self.assertEqual(list(util.nearest_k(distances, 2, 2)), [4])
+        self.assertEqual(len(util.nearest_k(distances, 0)), 0)
+
+    def test_parse_range(self):
+        self.assertEqual(util.parse_range("50", 500), 50)
+        for text in ("abc", "0", "-5", "501", "2.5"):
+            with self.assertRaises(ValueError):
+                util.parse_range(text, 500)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,70 +22,40 @@
 # SOFTWARE.
 
 import math
+import numpy as np
+import maidenhead
 
-def maidenhead_latlon_to_locator(lat, lon):
+def maidenhead_latlon_to_locator(lat, lon, precision=6):
     """
-    Wandelt gegebene Koordinaten (Breite, Länge) in ein 6-stelliges Maidenhead Grid um.
-    :param lat: Breitengrad (float), z. B. 48.137154
-    :param lon: Längengrad (float), z. B. 11.576124
-    :return: Maidenhead-Locator (z. B. 'JN58TD')
+    Wandelt gegebene Koordinaten (Breite, Länge) in ein Maidenhead Grid um.
+    :param lat: Breitengrad (float), z. B. 48.137154
+    :param lon: Längengrad (float), z. B. 11.576124
+    :param precision: Länge des Locators (2, 4, 6, 8 oder 10, Standard: 6)
+    :return: Maidenhead-Locator (z. B. 'JN58sd')
     """
-
-    if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
-        raise ValueError("Koordinaten außerhalb des gültigen Bereichs.")
-
-    # Shift Koordinaten in positives System
-    lat += 90.0
-    lon += 180.0
-
-    # 1. Field
-    A = ord('A')
-    field_lon = chr(A + int(lon // 20))
-    field_lat = chr(A + int(lat // 10))
-
-    # 2. Square
-    square_lon = str(int((lon % 20) // 2))
-    square_lat = str(int(lat % 10))
-
-    # 3. Subsquare
-    subsquare_lon = chr(A + int(((lon % 2) * 12)))
-    subsquare_lat = chr(A + int(((lat % 1) * 24)))
-
-    return field_lon + field_lat + square_lon + square_lat + subsquare_lon + subsquare_lat
+    return maidenhead.encode(lat, lon, precision)
 
 
 def maidenhead_locator_to_latlon(locator):
     """
-    Wandelt einen 6-stelligen Maidenhead-Locator in die Koordinaten des Zentrumspunkts um.
-    :param locator: 6-stelliger Maidenhead-Locator (z. B. 'JN58TD')
+    Wandelt einen Maidenhead-Locator (2, 4, 6, 8 oder 10 Zeichen) in die Koordinaten des Zentrumspunkts um.
+    :param locator: Maidenhead-Locator (z. B. 'JN58SD')
     :return: (latitude, longitude) in Dezimalgrad
     """
-    if len(locator) != 6:
-        raise ValueError("Locator muss genau 6 Zeichen lang sein.")
-
-    locator = locator.upper()
+    return maidenhead.decode(locator)
 
-    # Field (1. und 2. Zeichen)
-    lon_field = (ord(locator[0]) - ord('A')) * 20.0
-    lat_field = (ord(locator[1]) - ord('A')) * 10.0
-
-    # Square (3. und 4. Zeichen)
-    lon_square = int(locator[2]) * 2.0
-    lat_square = int(locator[3]) * 1.0
-
-    # Subsquare (5. und 6. Zeichen)
-    lon_sub = (ord(locator[4]) - ord('A')) * (2.0 / 24.0)
-    lat_sub = (ord(locator[5]) - ord('A')) * (1.0 / 24.0)
-
-    # Gesamtposition des linken unteren Eckpunkts
-    lon = lon_field + lon_square + lon_sub - 180.0
-    lat = lat_field + lat_square + lat_sub - 90.0
-
-    # Mittelpunkt des Subsquare hinzufügen
-    lon += (2.0 / 24.0) / 2.0  # 5 Minuten → halbe Länge
-    lat += (1.0 / 24.0) / 2.0  # 2.5 Minuten → halbe Breite
-
-    return lat, lon
+def parse_range(text, max_range):
+    """
+    Liest einen Suchradius in km aus einer Benutzereingabe.
+    :param text: Eingabe (z. B. '50')
+    :param max_range: Größter erlaubter Radius in km
+    :return: Radius in km (int)
+    :raises ValueError: wenn die Eingabe keine ganze Zahl oder nicht zwischen 1 und max_range ist
+    """
+    value = int(text)
+    if not 0 < value <= max_range:
+        raise ValueError(f"Bereich {value} nicht zwischen 1 und {max_range} km")
+    return value
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
@@ -118,3 +88,52 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     distance = R * c
 
     return distance
+
+def haversine_distances(lat, lon, lats, lons):
+    """
+    Berechnet die Luftlinien-Entfernungen zwischen einem Punkt und vielen anderen Punkten
+    auf einmal (vektorisierte Haversine-Formel).
+
+    :param lat: Breitengrad des Bezugspunkts (in Dezimalgrad)
+    :param lon: Längengrad des Bezugspunkts (in Dezimalgrad)
+    :param lats: Breitengrade der Zielpunkte (numpy-Array oder Sequenz, in Dezimalgrad)
+    :param lons: Längengrade der Zielpunkte (numpy-Array oder Sequenz, in Dezimalgrad)
+    :return: Entfernungen in Kilometern (numpy-Array vom Typ float64)
+    """
+
+    # Erdradius (mittlerer Radius in km)
+    R = 6371.0
+
+    phi1 = math.radians(lat)
+    phi2 = np.radians(np.asarray(lats, dtype=np.float64))
+    delta_phi = phi2 - phi1
+    delta_lambda = np.radians(np.asarray(lons, dtype=np.float64) - lon)
+
+    a = np.sin(delta_phi / 2) ** 2 + \
+        math.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+
+    # Rundungsfehler können a minimal über 1 heben
+    return 2 * R * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def nearest_k(distances, k, max_distance=None):
+    """
+    Ermittelt die Indizes der k kleinsten Entfernungen, optional begrenzt auf eine Maximalentfernung.
+    Verwendet eine partielle Sortierung (O(n + k log k)) statt alle Entfernungen zu sortieren.
+
+    :param distances: Entfernungen (numpy-Array)
+    :param k: Maximale Anzahl der Ergebnisse
+    :param max_distance: Maximale Entfernung (inklusive), None für unbegrenzt
+    :return: Indizes in distances, aufsteigend nach Entfernung sortiert (numpy-Array)
+    """
+    distances = np.asarray(distances)
+    if max_distance is None:
+        idx = np.arange(len(distances))
+    else:
+        idx = np.flatnonzero(distances <= max_distance)
+
+    if k <= 0:
+        return idx[:0]
+    if k < len(idx):
+        idx = idx[np.argpartition(distances[idx], k - 1)[:k]]
+
+    return idx[np.argsort(distances[idx], kind="stable")]